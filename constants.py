@@ -84,9 +84,13 @@ GRID_NUM = (20, 20)
 GRID_ALPHA = 128
 GRID_THICKNESS = 1 # grid line thickness of map
 MOVE_DELAY = 3 # frame
+TURBO_TIME_BUDGET = 200 # ms of simulation per frame in turbo mode
+CHECKPOINT_PERIOD = 100 # epochs between two checkpoints of a learned pilot in the AI lab
 INIT_LENGTH = 3 # initial length of snake
 MAP_OUTERLINE_THICKNESS = 3
 GRID_OUTERLINE_THICKNESS = 1
 
 REPLAY_DIRECTORY = "replays"
+HAMILTONIAN_CYCLE_DIRECTORY = "hamiltonian_cycles"
+CHECKPOINT_DIRECTORY = "checkpoints"
 TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
\ No newline at end of file
@@ -1,13 +1,18 @@
+import os
+import queue
 import random
+import threading
 import torch
 import torch.nn as nn
 import torch.optim as optim
 import numpy as np
-from collections import deque
 
 from .base_ai import BaseAI
 from constants import DIR_OFFSET_DICT
-from scripts.plugin.custom_func import get_dist, get_relative_x_y_dist
+from scripts.plugin.custom_func import get_dist
+from scripts.ai.feature_extractor import FeatureExtractor
+from scripts.ai.replay_buffer import ReplayBuffer
+from scripts.ai.symmetry import DihedralSymmetry
 
 
 # Define Neural Network (DQN Model)
@@ -24,34 +29,9 @@ class DQN(nn.Module):
         return self.fc3(x)  # Return Q-values
 
 
-# Experience Replay Buffer
-class ReplayBuffer:
-    def __init__(self, capacity):
-        self.buffer = deque(maxlen=capacity)
-
-    def push(self, state, action, reward, next_state, done):
-        self.buffer.append((state, action, reward, next_state, done))
-
-    def sample(self, batch_size):
-        indices = np.arange(len(self.buffer))  # Assign weight to the latest data
-        
-        # Apply log weighting for better balance between old and new data
-        probs = np.log(indices + 1)
-        probs /= probs.sum()  # Normalize to probabilities
-        
-        sampled_indices = np.random.choice(indices, batch_size, p=probs)
-        batch = [self.buffer[i] for i in sampled_indices]
-        
-        states, actions, rewards, next_states, dones = zip(*batch)
-        return np.array(states), actions, np.array(rewards), np.array(next_states), np.array(dones)
-
-    def __len__(self):
-        return len(self.buffer)
-
-
 # DQN Agent Definition
 class DQNAgent:
-    def __init__(self, state_size, action_size, lr=0.001, gamma=0.9, epsilon=0.9, epsilon_min=0.01, epsilon_decay=0.995, epsilon_update_period=1000, tar_net_update_period=500, buffer_size=10000, batch_size=32):
+    def __init__(self, state_size, action_size, lr=0.001, gamma=0.9, epsilon=0.9, epsilon_min=0.01, epsilon_decay=0.995, epsilon_update_period=1000, tar_net_update_period=500, buffer_size=10000, batch_size=32, prioritized_replay=False, train_every=1, gradient_steps=1, max_pending_updates=64, augment_symmetry=False):
         self.state_size = state_size
         self.action_size = action_size
         self.gamma = gamma  # Discount factor
@@ -72,23 +52,117 @@ class DQNAgent:
         self.optimizer = optim.Adam(self.policy_net.parameters(), lr=lr)
         self.criterion = nn.MSELoss()
 
-        self.memory = ReplayBuffer(buffer_size)
+        self.memory = ReplayBuffer(buffer_size, state_size, prioritized=prioritized_replay)
         self.update_target_counter = 0
 
+        # Store every transition under the 8 rotations and reflections of the board
+        self.symmetry = DihedralSymmetry() if augment_symmetry else None
+
+        # Learning cadence: `gradient_steps` updates every `train_every` calls of `learn()`
+        self.train_every = train_every
+        self.gradient_steps = gradient_steps
+        self.learn_counter = 0
+
+        # Background learner, see `start_background_learner()`
+        self.memory_lock = threading.Lock()  # guards the replay buffer
+        self.net_lock = threading.Lock()  # guards the networks, the optimizer and the counters of `update()`
+        self.max_pending_updates = max_pending_updates
+        self.pending_updates: queue.Queue = queue.Queue(max_pending_updates)
+        self.learner_thread: threading.Thread = None
+        self.learner_running = False
+
+        # If set, `learn()` moves the stored transitions here instead of training (used by remote actors)
+        self.transition_sink: list = None
+
     def choose_action(self, state):
         if random.uniform(0, 1) < self.epsilon:
             return random.randint(0, self.action_size - 1)  # Exploration
         else:
             state_tensor = torch.tensor(state, dtype=torch.float32).unsqueeze(0)
-            with torch.no_grad():
+            with torch.no_grad(), self.net_lock:
                 q_values = self.policy_net(state_tensor)
             return torch.argmax(q_values).item()  # Select action with max Q-value
 
-    def learn(self):
-        if len(self.memory) < self.batch_size:
-            return  # Do not train if not enough data
+    def choose_actions(self, states):
+        """Batched `choose_action()` for states of shape (batch, state_size)"""
+        state_tensor = torch.as_tensor(states, dtype=torch.float32)
+        with torch.no_grad(), self.net_lock:
+            actions = torch.argmax(self.policy_net(state_tensor), dim=1).numpy()
+
+        # Exploration per state
+        explore = np.random.uniform(0, 1, len(actions)) < self.epsilon
+        actions[explore] = np.random.randint(0, self.action_size, explore.sum())
+        return actions
+
+    def store_transition(self, state, action, reward, next_state, done):
+        # remote actors leave the augmentation to the learner they send their transitions to
+        if self.symmetry is not None and self.transition_sink is None:
+            states, actions, next_states = self.symmetry.augment(np.array([state]), np.array([action]), np.array([next_state]))
+            num = len(states)
+            with self.memory_lock:
+                self.memory.push_batch(states, actions, np.full(num, reward), next_states, np.full(num, done))
+            return
+
+        with self.memory_lock:
+            self.memory.push(state, action, reward, next_state, done)
+
+    def store_transitions(self, states, actions, rewards, next_states, dones, priorities=None):
+        """Batched `store_transition()`, with optional initial priorities for a prioritized buffer"""
+        if self.symmetry is not None and self.transition_sink is None:
+            states, actions, next_states = self.symmetry.augment(np.asarray(states), np.asarray(actions), np.asarray(next_states))
+            repeat = self.symmetry.transform_num
+            rewards, dones = np.tile(rewards, repeat), np.tile(dones, repeat)
+            priorities = None if priorities is None else np.tile(priorities, repeat)
+
+        with self.memory_lock:
+            self.memory.push_batch(states, actions, rewards, next_states, dones, priorities)
+
+    def compute_td_errors(self, states, actions, rewards, next_states, dones) -> np.ndarray:
+        """
+        TD errors of transitions under the current policy network, without training.
+        Used by actors to give their transitions an initial priority.
+        """
+        with torch.no_grad(), self.net_lock:
+            q_values = self.policy_net(torch.as_tensor(states, dtype=torch.float32))
+            next_q_values = self.policy_net(torch.as_tensor(next_states, dtype=torch.float32))
+
+        q_values = q_values.gather(1, torch.as_tensor(actions, dtype=torch.int64).unsqueeze(1)).squeeze(1).numpy()
+        max_next_q_values = next_q_values.max(1)[0].numpy()
+        return np.asarray(rewards) + (1 - np.asarray(dones, dtype=np.float32)) * self.gamma * max_next_q_values - q_values
 
-        states, actions, rewards, next_states, dones = self.memory.sample(self.batch_size)
+    def learn(self):
+        """
+        Called once per stored transition.
+        Runs `gradient_steps` updates every `train_every` calls,
+        or hands them to the background learner if it runs.
+        """
+        if self.transition_sink is not None:
+            with self.memory_lock:
+                self.transition_sink.extend(self.memory.get_transitions())
+                self.memory.clear()
+            return
+
+        self.learn_counter += 1
+        if self.learn_counter % self.train_every != 0:
+            return
+
+        for _ in range(self.gradient_steps):
+            if self.learner_running:
+                self.pending_updates.put(None)  # waits while `max_pending_updates` are queued
+            else:
+                self.update()
+
+    def update(self):
+        """
+        One gradient step on a batch sampled from the replay buffer
+        """
+        with self.memory_lock:
+            if len(self.memory) < self.batch_size:
+                return  # Do not train if not enough data
+
+            states, actions, rewards, next_states, dones = self.memory.sample(self.batch_size)
+            sampled_indices, sampled_weights = self.memory.sampled_indices, self.memory.sampled_weights
+            sampled_generations = self.memory.sampled_generations
 
         states = torch.tensor(states, dtype=torch.float32)
         actions = torch.tensor(actions, dtype=torch.int64).unsqueeze(1)
@@ -96,77 +170,171 @@ class DQNAgent:
         next_states = torch.tensor(next_states, dtype=torch.float32)
         dones = torch.tensor(dones, dtype=torch.float32)
 
-        # Compute Q(s, a)
-        q_values = self.policy_net(states).gather(1, actions).squeeze(1)
-
-        # Compute Q_target(s', a') using target network
-        with torch.no_grad():
-            max_next_q_values = self.target_net(next_states).max(1)[0]
-            target_q_values = rewards + (1 - dones) * self.gamma * max_next_q_values
-
-        loss = self.criterion(q_values, target_q_values)
-
-        # Update neural network
-        self.optimizer.zero_grad()
-        loss.backward()
-        self.optimizer.step()
+        with self.net_lock:
+            # Compute Q(s, a)
+            q_values = self.policy_net(states).gather(1, actions).squeeze(1)
 
-        self.update_target_counter += 1
-
-        # Decrease epsilon every epsilon_update_period (Reduce exploration)
-        if self.epsilon > self.epsilon_min and self.update_target_counter % self.epsilon_update_period == 0:
-            prev_epsilon = self.epsilon
-            self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
-            print(f"epsilon decrease: {prev_epsilon} -> {self.epsilon}")
-
-        # Update target network periodically
-        if self.update_target_counter % self.tar_net_update_period == 0:
-            self.target_net.load_state_dict(self.policy_net.state_dict())
+            # Compute Q_target(s', a') using target network
+            with torch.no_grad():
+                max_next_q_values = self.target_net(next_states).max(1)[0]
+                target_q_values = rewards + (1 - dones) * self.gamma * max_next_q_values
+
+            if self.memory.prioritized:
+                # weight the loss by importance sampling, and reprioritize by the new TD errors
+                weights = torch.as_tensor(sampled_weights)
+                loss = (weights * (q_values - target_q_values) ** 2).mean()
+                with self.memory_lock:  # transitions stored meanwhile keep their own priority
+                    self.memory.update_priorities(sampled_indices, (target_q_values - q_values).detach().numpy(), sampled_generations)
+            else:
+                loss = self.criterion(q_values, target_q_values)
+
+            # Update neural network
+            self.optimizer.zero_grad()
+            loss.backward()
+            self.optimizer.step()
+
+            self.update_target_counter += 1
+
+            # Decrease epsilon every epsilon_update_period (Reduce exploration)
+            if self.epsilon > self.epsilon_min and self.update_target_counter % self.epsilon_update_period == 0:
+                prev_epsilon = self.epsilon
+                self.epsilon = max(self.epsilon_min, self.epsilon * self.epsilon_decay)
+                print(f"epsilon decrease: {prev_epsilon} -> {self.epsilon}")
+
+            # Update target network periodically
+            if self.update_target_counter % self.tar_net_update_period == 0:
+                self.target_net.load_state_dict(self.policy_net.state_dict())
+
+    # about checkpoint
+    def save_checkpoint(self, directory: str, with_memory: bool = False):
+        """
+        Save the networks, the optimizer and the exploration schedule into `directory`,
+        and the replay buffer too if `with_memory`
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        with self.net_lock:
+            state = {
+                "policy_net": self.policy_net.state_dict(),
+                "target_net": self.target_net.state_dict(),
+                "optimizer": self.optimizer.state_dict(),
+                "epsilon": self.epsilon,
+                "update_target_counter": self.update_target_counter,
+                "learn_counter": self.learn_counter,
+            }
+            torch.save(state, os.path.join(directory, "agent.pt"))
+
+        if with_memory:
+            with self.memory_lock:
+                self.memory.save(os.path.join(directory, "memory"))
+
+    def load_checkpoint(self, directory: str, mmap: bool = True):
+        """
+        Restore a checkpoint saved by `save_checkpoint()`, with its replay buffer if it has one.
+
+        Args:
+            directory (str): Directory given to `save_checkpoint()`.
+            mmap (bool): Memory-map the replay buffer instead of reading it in, see `ReplayBuffer.load()`.
+        """
+        state = torch.load(os.path.join(directory, "agent.pt"), map_location="cpu")
+
+        with self.net_lock:
+            self.policy_net.load_state_dict(state["policy_net"])
+            self.target_net.load_state_dict(state["target_net"])
+            self.optimizer.load_state_dict(state["optimizer"])
+            self.epsilon = state["epsilon"]
+            self.update_target_counter = state["update_target_counter"]
+        self.learn_counter = state["learn_counter"]
+
+        memory_dir = os.path.join(directory, "memory")
+        if os.path.isdir(memory_dir):
+            with self.memory_lock:
+                self.memory.load(memory_dir, mmap)
+
+    # about background learner
+    def start_background_learner(self):
+        """
+        Run the updates on a background thread, so `learn()` only schedules them
+        and choosing actions only waits for a backward pass while one holds `net_lock`.
+        At most `max_pending_updates` wait at once, `learn()` blocks until the learner catches up.
+        """
+        if self.learner_running:
+            return
+
+        self.pending_updates = queue.Queue(self.max_pending_updates)
+        self.learner_running = True
+        self.learner_thread = threading.Thread(target=self.run_background_learner, daemon=True)
+        self.learner_thread.start()
+
+    def stop_background_learner(self):
+        """
+        Stop the background learner, dropping the updates it has not run yet
+        """
+        if not self.learner_running:
+            return
+
+        self.learner_running = False
+        try:
+            self.pending_updates.put_nowait(None)  # wake the thread up
+        except queue.Full:
+            pass  # it wakes up on the next queued update anyway
+        self.learner_thread.join()
+        self.learner_thread = None
+
+    def wait_background_learner(self):
+        """
+        Wait until the background learner has run every update queued so far
+        """
+        if self.learner_running:
+            self.pending_updates.join()
+
+    def run_background_learner(self):
+        while True:
+            self.pending_updates.get()
+            if not self.learner_running:
+                return
+            try:
+                self.update()
+            finally:
+                self.pending_updates.task_done()
 
 
 # DQN-based Snake AI
 class DQNAI(BaseAI):
-    def __init__(self):
+    def __init__(self, background_learner: bool = False, **agent_params):
+        """
+        Args:
+            background_learner (bool): Train on a background thread once the pilot plays a game,
+                see `DQNAgent.start_background_learner()`.
+            agent_params: Hyperparameters passed on to `DQNAgent`, e.g. lr, gamma, buffer_size, train_every.
+        """
+        super().__init__()
+        self.background_learner = background_learner
         self.actions = list(DIR_OFFSET_DICT.keys())  # ['E', 'W', 'S', 'N']
         self.action_size = len(self.actions)
         self.state_size = 11
         
-        self.agent = DQNAgent(self.state_size, self.action_size)
+        self.agent = DQNAgent(self.state_size, self.action_size, **agent_params)
 
-        self.dir_offset_list = list(DIR_OFFSET_DICT.values())
+        self.feature_extractor = FeatureExtractor()
 
         self.last_state = None
         self.last_feed_dist = None
         self.last_score = None
         self.last_action = None
 
-    def get_collision_mapping_values(self, head, mapping_dict):
-        collision_values = []
-
-        for dir_offset in self.dir_offset_list:
-            predicted_coord = (head[0] + dir_offset[0], head[1] + dir_offset[1])
-            predicted_collision = self.game.check_collision(predicted_coord)[0]
-            collision_values.append(mapping_dict[predicted_collision])
-        
-        return collision_values
-    
-    def get_dists_from_wall(self, head, grid_size):
-        return [grid_size[0]-1 - head[0], grid_size[1]-1 - head[1], head[0], head[1]]
+    def set_current_game(self, game):
+        super().set_current_game(game)
+        if self.background_learner:
+            self.agent.start_background_learner()
 
     def decide_direction(self):
-        grid_size = self.game.grid_size
+        head = self.game.player.get_head()
 
-        bodies = self.game.player.get_bodies()
-        head = bodies[0]
-        feed = self.game.fs.get_nearest_feed_coord(head)
-
-        collision_mapping = {'none': 0, 'wall': 1, 'body': 2, 'feed': 3}
         # Define current state
-        state = get_relative_x_y_dist(head, feed, grid_size) + \
-                tuple(self.get_collision_mapping_values(head, collision_mapping),) + \
-                (len(bodies),) + \
-                tuple(self.get_dists_from_wall(head, grid_size))
-        
+        state = self.feature_extractor.extract(self.game).copy()
+        feed = self.feature_extractor.feed_coord
+
         feed_dist = get_dist(head, feed)
         score = self.game.scores["score"]
 
@@ -194,5 +362,5 @@ class DQNAI(BaseAI):
         if done or next_state is None:
             next_state = np.zeros_like(self.last_state)  # Zero vector with same shape
 
-        self.agent.memory.push(self.last_state, self.last_action, reward, next_state, done)
+        self.agent.store_transition(self.last_state, self.last_action, reward, next_state, done)
         self.agent.learn()
\ No newline at end of file
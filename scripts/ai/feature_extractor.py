@@ -0,0 +1,156 @@
+import numpy as np
+
+from constants import DIR_OFFSET_DICT, OBJECT_DICT
+
+from typing import Tuple, List
+
+class FeatureExtractor:
+    """
+    Builds the state vector of the learned pilots from a game.
+
+    The 11 features are, in order:
+    relative x and y distance to the nearest feed, the collision code (`OBJECT_DICT`)
+    of the 4 neighbours of the head in `DIR_OFFSET_DICT` order, the length of the player,
+    and the distances from the head to the E, S, W and N walls.
+    With `with_neck_dir`, the index of the neck direction is appended as a 12th feature.
+
+    Collisions are read from the bitboards of the game in one pass,
+    and the features are written into a preallocated buffer.
+    """
+    base_size: int = 11
+
+    def __init__(self, with_neck_dir: bool = False, batch_size: int = 0):
+        """
+        Create FeatureExtractor Class
+
+        Args:
+            with_neck_dir (bool): Append the index of the neck direction.
+            batch_size (int): Preallocate the buffer of `extract_batch()` for this many games.
+        """
+        self.with_neck_dir = with_neck_dir
+        self.size: int = self.base_size + (1 if with_neck_dir else 0)
+
+        self.buffer = np.zeros(self.size, dtype=np.float32)
+        self.batch_buffer = np.zeros((batch_size, self.size), dtype=np.float32)
+
+        self.dir_offsets: List[Tuple[int, int]] = list(DIR_OFFSET_DICT.values())
+        self.dir_index_table = np.zeros((3, 3), dtype=np.int64)  # [dy + 1, dx + 1] -> index in `dir_offsets`
+        for idx, (dx, dy) in enumerate(self.dir_offsets):
+            self.dir_index_table[dy + 1, dx + 1] = idx
+        self.feed_coord: Tuple[int, int] = None  # nearest feed found by the last extraction
+
+    def extract(self, game, out: np.ndarray = None) -> np.ndarray:
+        """
+        Write the features of the game into `out`.
+
+        Args:
+            game: BaseGame, HeadlessPilotGame or SnakeSimulation.
+            out (np.ndarray): Array of shape (size,). Defaults to the buffer of the extractor,
+                which is overwritten on the next call, so copy it to keep it.
+
+        Returns:
+            np.ndarray: `out`, filled.
+        """
+        if out is None:
+            out = self.buffer
+
+        grid_size = game.grid_size
+        player = game.player
+        head = player.get_head()
+
+        feed = game.fs.get_nearest_feed_coord(head)
+        self.feed_coord = feed
+        if feed is None:
+            out[0] = out[1] = 0.0
+        else:
+            out[0] = (feed[0] - head[0]) / grid_size[0]
+            out[1] = (feed[1] - head[1]) / grid_size[1]
+
+        bitboard = game.bitboard
+        body_bits = player.get_body_bits()
+        feed_bits = game.fs.get_feed_bits()
+        tail = player.get_tail()
+        for idx, (dx, dy) in enumerate(self.dir_offsets):
+            coord = (head[0] + dx, head[1] + dy)
+            bit = bitboard.get_bit(coord)
+            if not bit:
+                out[2 + idx] = OBJECT_DICT['wall']
+            elif bit & body_bits and coord != tail:  # the tail leaves on this move
+                out[2 + idx] = OBJECT_DICT['body']
+            elif bit & feed_bits:
+                out[2 + idx] = OBJECT_DICT['feed']
+            else:
+                out[2 + idx] = OBJECT_DICT['none']
+
+        out[6] = player.get_length()
+        out[7] = grid_size[0] - 1 - head[0]
+        out[8] = grid_size[1] - 1 - head[1]
+        out[9] = head[0]
+        out[10] = head[1]
+
+        if self.with_neck_dir:
+            neck = player.get_neck()
+            out[11] = self.dir_offsets.index((neck[0] - head[0], neck[1] - head[1]))
+
+        return out
+
+    def extract_batch(self, grid_size: Tuple[int, int], heads: np.ndarray, tails: np.ndarray, lengths: np.ndarray, grids: np.ndarray, feeds: np.ndarray,
+                      necks: np.ndarray = None, out: np.ndarray = None) -> np.ndarray:
+        """
+        Write the features of many games at once, one row per game, with array operations
+        over their stacked boards. The features are the same as `extract()`.
+        A cell is addressed by its flat index `y * width + x`.
+
+        Args:
+            grid_size (Tuple[int, int]): Size of the grid shared by the games.
+            heads (np.ndarray): Head cell of every game, shape (N,).
+            tails (np.ndarray): Tail cell of every game, shape (N,).
+            lengths (np.ndarray): Length of the player of every game, shape (N,).
+            grids (np.ndarray): `OBJECT_DICT` code of every cell of every game, shape (N, width * height).
+            feeds (np.ndarray): Feed cells of every game, shape (N, slots), `-1` for an empty slot.
+                On a tie, the nearest feed is the one in the first slot.
+            necks (np.ndarray): Neck cell of every game, shape (N,). Needed with `with_neck_dir`.
+            out (np.ndarray): Array of shape (N, size).
+                Defaults to the batch buffer of the extractor, grown if needed.
+
+        Returns:
+            np.ndarray: `out`, filled.
+        """
+        num = len(heads)
+        if out is None:
+            if len(self.batch_buffer) < num:
+                self.batch_buffer = np.zeros((num, self.size), dtype=np.float32)
+            out = self.batch_buffer[:num]
+
+        width, height = grid_size
+        game_indices = np.arange(num)
+        head_x, head_y = heads % width, heads // width
+
+        # nearest feed by Manhattan distance
+        feed_x, feed_y = feeds % width, feeds // width
+        feed_dists = np.abs(feed_x - head_x[:, None]) + np.abs(feed_y - head_y[:, None])
+        feed_dists = np.where(feeds >= 0, feed_dists, np.iinfo(np.int64).max)
+        nearest = np.argmin(feed_dists, axis=1)
+        has_feed = (feeds >= 0).any(axis=1)
+        out[:, 0] = np.where(has_feed, (feed_x[game_indices, nearest] - head_x) / width, 0.0)
+        out[:, 1] = np.where(has_feed, (feed_y[game_indices, nearest] - head_y) / height, 0.0)
+
+        for idx, (dx, dy) in enumerate(self.dir_offsets):
+            next_x, next_y = head_x + dx, head_y + dy
+            walls = (next_x < 0) | (next_x >= width) | (next_y < 0) | (next_y >= height)
+            cells = np.where(walls, 0, next_y * width + next_x)
+            codes = grids[game_indices, cells]
+            codes = np.where((codes == OBJECT_DICT['body']) & (cells == tails), OBJECT_DICT['none'], codes)  # the tail leaves on this move
+            out[:, 2 + idx] = np.where(walls, OBJECT_DICT['wall'], codes)
+
+        out[:, 6] = lengths
+        out[:, 7] = width - 1 - head_x
+        out[:, 8] = height - 1 - head_y
+        out[:, 9] = head_x
+        out[:, 10] = head_y
+
+        if self.with_neck_dir:
+            neck_dx, neck_dy = necks % width - head_x, necks // width - head_y
+            out[:, 11] = self.dir_index_table[neck_dy + 1, neck_dx + 1]
+
+        return out
@@ -1,10 +1,12 @@
 from sys import maxsize
+from collections import deque
 
 from .base_ai import BaseAI
+from scripts.plugin.region_analyzer import RegionAnalyzer
 
 from constants import DIR_OFFSET_DICT
 
-from typing import Tuple, List, TYPE_CHECKING
+from typing import Tuple, List, Iterator, TYPE_CHECKING
 if TYPE_CHECKING:
     from scripts.entity.feed_system import Feed
 
@@ -20,11 +22,11 @@ def get_dist(pos_a: Tuple[int, int], pos_b: Tuple[int, int]):
 
 def flood_fill_safety_check(coord: Tuple[int, int], p_bodies, grid_size):
     visited = set()
-    queue = [coord]
+    queue = deque([coord])
     count = 0
 
     while queue:
-        x, y = queue.pop(0)
+        x, y = queue.popleft()
         if (x, y) in visited or not is_safe((x, y), p_bodies, grid_size):
             continue
         visited.add((x, y))
@@ -49,12 +51,107 @@ def get_closest_dist_with_feed(coord: Tuple[int, int], feeds: List["Feed"]):
     return (min_dist, closest_feed)
 
 class GreedyAI(BaseAI):
+    """
+    Moves toward the nearest feed, weighted by how much space is left around the next cell.
+
+    A body cell counts as free space once it is released by the time the head gets there
+    (see `get_moves_until_free()` of the game), as `PathfindingAI` does for its paths.
+    On a move that eats, the tail stays one more move, so every body cell is released a move later.
+    """
+    def __init__(self):
+        super().__init__()
+        self.region_analyzer: RegionAnalyzer = None
+
+        # body parts released within `arrival` moves, walked lazily from the tail on every decision
+        self.released_bits: List[int] = []
+        self.unreleased_bodies: Iterator[Tuple[int, int]] = iter(())
+
+    def get_region_analyzer(self) -> RegionAnalyzer:
+        """
+        Get the region analyzer of the current game, `None` if the game keeps no bitboards
+        """
+        bitboard = getattr(self.game, "bitboard", None)
+        if bitboard is None:
+            return None
+
+        if self.region_analyzer is None or self.region_analyzer.bitboard is not bitboard:
+            self.region_analyzer = RegionAnalyzer(bitboard)
+        return self.region_analyzer
+
+    def analyze(self):
+        """
+        Label the free regions and start walking the body from the tail, once per decision
+        """
+        player = self.game.player
+        self.region_analyzer.analyze(player.get_body_bits())
+        self.released_bits = [0] * self.game.get_moves_until_free(player.get_tail())
+        self.unreleased_bodies = player.get_bodies_from_tail()
+
+    def is_passable(self, coord: Tuple[int, int], arrival: int) -> bool:
+        """
+        Check if the head can be on the coordinate `arrival` moves from now
+        """
+        return self.game.is_in_bound(coord) and self.game.get_moves_until_free(coord) <= arrival
+
+    def get_released_bits(self, arrival: int) -> int:
+        """
+        Get the body parts released within `arrival` moves as bits.
+        Parts are released from the tail on, one per move, so the body is only walked as far as asked.
+        """
+        released_bits = self.released_bits
+        while len(released_bits) <= arrival:
+            body = next(self.unreleased_bodies, None)
+            if body is None:
+                return released_bits[-1]
+            released_bits.append(released_bits[-1] | self.game.bitboard.get_bit(body))
+        return released_bits[arrival]
+
+    def get_region_size(self, coord: Tuple[int, int], delay: int) -> int:
+        """
+        Get the number of cells reachable from the coordinate entered on the next move.
+        The free region around it counts as a whole, and grows one step further each move
+        through the body parts released by then.
+
+        Args:
+            coord (Tuple[int, int]): Coordinate entered on the next move.
+            delay (int): Moves every body part is released later by, `1` if the next move eats.
+
+        Returns:
+            int: Size of the reachable region, `coord` included.
+        """
+        bitboard = self.game.bitboard
+        free_bits = self.region_analyzer.free_bits
+
+        region = self.region_analyzer.get_region_bits(coord) or bitboard.get_bit(coord)
+        arrival = 1
+        while True:
+            joined_bits = self.get_released_bits(arrival - delay)
+            if joined_bits and not joined_bits & ~region:
+                # every part released so far is in the region, and the next one lies next to the last one:
+                # the region follows the whole body
+                return bitboard.count(bitboard.flood_fill(region, bitboard.board_mask))
+
+            arrival += 1
+            grown = bitboard.expand(region) & (free_bits | self.get_released_bits(arrival - delay)) | region
+            if grown == region:
+                return bitboard.count(region)
+            region = grown
+
     def decide_direction(self):
-        bodies = self.game.player.get_bodies()
-        head = bodies[0]
+        player = self.game.player
+        head = player.get_head()
         grid_size = self.game.grid_size
         feeds = self.game.fs.get_feeds()
 
+        # label the free regions once, instead of flood filling from every neighbour
+        region_analyzer = self.get_region_analyzer()
+        if region_analyzer is not None:
+            self.analyze()
+            region_sizes = {}  # (region, delay) -> size, the size only depends on the free region entered
+        else:
+            bodies = set(player.get_bodies())
+            bodies_without_tail = bodies - {player.get_tail()}
+
         secure_weight = 0.3
 
         best_dir = None
@@ -62,10 +159,20 @@ class GreedyAI(BaseAI):
         
         for dir, (offset_x, offset_y) in DIR_OFFSET_DICT.items():
             next_coord = (head[0] + offset_x, head[1] + offset_y)
-            if not is_safe(next_coord, bodies, grid_size):
-                continue
-            
-            s_score = flood_fill_safety_check(next_coord, bodies, grid_size)
+            delay = 1 if self.game.fs.is_feed_exist(next_coord) else 0
+
+            if region_analyzer is not None:
+                if not self.is_passable(next_coord, 1 - delay):
+                    continue
+                key = (region_analyzer.get_region_label(next_coord), delay)
+                if key[0] < 0 or key not in region_sizes:
+                    region_sizes[key] = self.get_region_size(next_coord, delay)
+                s_score = region_sizes[key]
+            else:
+                blocked = bodies if delay else bodies_without_tail
+                if not is_safe(next_coord, blocked, grid_size):
+                    continue
+                s_score = flood_fill_safety_check(next_coord, blocked, grid_size)
             f_dist = get_closest_dist_with_feed(next_coord, feeds)[0]
 
             total_score = s_score * secure_weight + (grid_size[0] + grid_size[1] - f_dist)
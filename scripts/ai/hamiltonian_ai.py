@@ -0,0 +1,122 @@
+from .base_ai import BaseAI
+from scripts.plugin.hamiltonian_cycle import HamiltonianCycle
+
+from constants import DIR_OFFSET_DICT, HAMILTONIAN_CYCLE_DIRECTORY
+
+from typing import Tuple
+
+class HamiltonianAI(BaseAI):
+    """
+    Follows a Hamiltonian cycle of the grid, so it clears any game,
+    and takes shortcuts towards the next feed while the player is short.
+
+    The body always lies on the part of the cycle running from the tail to the head.
+    A shortcut jumps ahead of the head without passing the next feed nor the tail,
+    so the body keeps that order and the cycle stays safe to follow.
+    Every decision is a table lookup over the neighbours of the head.
+    """
+    def __init__(self, shortcut_limit: float = 0.5, cycle_directory: str = HAMILTONIAN_CYCLE_DIRECTORY):
+        """
+        Create HamiltonianAI Class
+
+        Args:
+            shortcut_limit (float): Ratio of the grid filled by the player
+                from which shortcuts are no longer taken.
+            cycle_directory (str): Directory caching the cycle tables.
+        """
+        super().__init__()
+        self.shortcut_limit = shortcut_limit
+        self.cycle_directory = cycle_directory
+
+        self.cycle: HamiltonianCycle = None
+        self.expected_head: Tuple[int, int] = None
+        self.ordered_moves: int = 0  # moves in a row made along the cycle order
+
+    def set_current_game(self, game):
+        super().set_current_game(game)
+        self.cycle = None
+
+    def decide_direction(self):
+        grid_size = tuple(self.game.grid_size)
+        if self.cycle is None or self.cycle.grid_size != grid_size:
+            self.cycle = HamiltonianCycle.get(grid_size, self.cycle_directory)
+
+        player = self.game.player
+        head = player.get_head()
+        length = player.get_length()
+
+        if head != self.expected_head:  # a new game
+            self.ordered_moves = 0
+
+        # the body lies in the cycle order once the player moved its length along it
+        if self.ordered_moves >= length:
+            max_jump = self.cycle.length if length < self.shortcut_limit * self.cycle.length else 1
+            next_coord = self.find_shortcut(head, player.get_tail(), max_jump)
+        else:
+            next_coord = self.get_next_coord(head)
+
+        if not self.is_passable(next_coord):
+            # the initial body may be across the cycle, step aside until it is not
+            self.ordered_moves = 0
+            next_coord = None
+            for offset in DIR_OFFSET_DICT.values():
+                coord = (head[0] + offset[0], head[1] + offset[1])
+                if self.is_passable(coord):
+                    next_coord = coord
+                    break
+            if next_coord is None:
+                return "surrender"
+        else:
+            self.ordered_moves += 1
+
+        self.expected_head = next_coord
+        return self.get_dir(head, next_coord)
+
+    def find_shortcut(self, head: Tuple[int, int], tail: Tuple[int, int], max_jump: int) -> Tuple[int, int]:
+        """
+        Get the neighbour of the head furthest along the cycle, relative to the tail,
+        at most `max_jump` cells ahead of the head and not beyond the next feed.
+        """
+        cycle = self.cycle
+        head_dist = cycle.get_distance(tail, head)
+
+        feed_coords = set()
+        feed_dist = cycle.length
+        for feed in self.game.fs.get_feeds():
+            feed_coords.add(feed.get_coord())
+            dist = cycle.get_distance(tail, feed.get_coord())
+            if head_dist < dist < feed_dist:
+                feed_dist = dist
+        max_dist = min(feed_dist, head_dist + max_jump)
+
+        best_coord = self.get_next_coord(head)
+        best_dist = head_dist + 1
+        for offset in DIR_OFFSET_DICT.values():
+            coord = (head[0] + offset[0], head[1] + offset[1])
+            if not self.game.is_in_bound(coord) or self.game.get_moves_until_free(coord) > 0:
+                continue
+
+            # the skipped corner of an odd x odd grid shares its order with another cell,
+            # so only the cell holding the feed may be landed on at the order of the feed
+            dist = cycle.get_distance(tail, coord)
+            if not head_dist < dist <= max_dist or (dist == feed_dist and coord not in feed_coords):
+                continue
+
+            if dist > best_dist or (dist == best_dist and coord in feed_coords):
+                best_coord = coord
+                best_dist = dist
+
+        return best_coord
+
+    def get_next_coord(self, coord: Tuple[int, int]) -> Tuple[int, int]:
+        offset = DIR_OFFSET_DICT[self.cycle.get_next_dir(coord)]
+        return (coord[0] + offset[0], coord[1] + offset[1])
+
+    def get_dir(self, pos_from: Tuple[int, int], pos_to: Tuple[int, int]) -> str:
+        offset = (pos_to[0] - pos_from[0], pos_to[1] - pos_from[1])
+        for dir, dir_offset in DIR_OFFSET_DICT.items():
+            if dir_offset == offset:
+                return dir
+
+    def is_passable(self, coord: Tuple[int, int]) -> bool:
+        return self.game.is_in_bound(coord) and self.game.get_moves_until_free(coord) <= 1
@@ -0,0 +1,258 @@
+import heapq
+from collections import deque
+
+from .base_ai import BaseAI
+from scripts.plugin.region_analyzer import RegionAnalyzer
+
+from constants import DIR_OFFSET_DICT
+
+from typing import Tuple, List, Set, Deque
+
+OFFSET_DIR_DICT = {offset: dir for dir, offset in DIR_OFFSET_DICT.items()}
+FEED_RETRY_LIMIT = 8  # most re-plans a rejected feed path is put off for
+
+def get_dist(pos_a: Tuple[int, int], pos_b: Tuple[int, int]) -> int:
+    return abs(pos_b[0] - pos_a[0]) + abs(pos_b[1] - pos_a[1])
+
+def get_dir(pos_from: Tuple[int, int], pos_to: Tuple[int, int]) -> str:
+    return OFFSET_DIR_DICT[(pos_to[0] - pos_from[0], pos_to[1] - pos_from[1])]
+
+class PathfindingAI(BaseAI):
+    """
+    Follows a shortest safe path to the nearest feed.
+
+    The path is searched once and cached, then replayed one move per decision.
+    It is searched again only when it gets invalidated: a feed appeared or was eaten,
+    the next cell of the path is still held by the body, or the player left the path.
+
+    Searches are time-aware: a body cell can be passed if the body leaves it
+    by the time the head arrives (see `get_moves_until_free()` of the game).
+    A path is only taken if the player can still reach its tail after eating,
+    otherwise the player chases its own tail. That chase is cached like a feed path,
+    and a rejected feed is searched again only once the feeds change, or after
+    half the length of its path in re-plans (at most `FEED_RETRY_LIMIT`), when the body has moved on.
+    """
+    def __init__(self, method: str = "bfs"):
+        """
+        Create PathfindingAI Class
+
+        Args:
+            method (str): "bfs" searches the nearest reachable feed,
+                "a-star" searches a path to the nearest feed by Manhattan distance.
+        """
+        if method not in ["bfs", "a-star"]:
+            raise ValueError("parameter(method) must be the one of ['bfs', 'a-star']")
+
+        super().__init__()
+        self.method = method
+
+        self.path: Deque[Tuple[int, int]] = deque()  # cells to move on, the next one first
+        self.path_head: Tuple[int, int] = None  # head expected before the next move of the path
+        self.path_feed_bits: int = 0  # feeds when the path was searched
+        self.rejected_feed_bits: int = 0  # feeds when a feed path was last rejected
+        self.feed_retry_count: int = 0  # re-plans left before the feeds are searched again
+
+        self.region_analyzer: RegionAnalyzer = None
+
+    def set_current_game(self, game):
+        super().set_current_game(game)
+        self.clear_path()
+
+    def clear_path(self):
+        self.path.clear()
+        self.path_head = None
+        self.feed_retry_count = 0
+
+    def decide_direction(self):
+        head = self.game.player.get_head()
+
+        if not self.is_path_valid(head):
+            self.path.clear()
+            path = self.search_safe_feed_path(head)
+            if not path:
+                path = self.search_chase_path(head)
+            if not path:
+                return self.decide_region_direction(head)
+
+            self.path.extend(path)
+            self.path_feed_bits = self.game.fs.get_feed_bits()
+
+        next_coord = self.path.popleft()
+        self.path_head = next_coord
+
+        return get_dir(head, next_coord)
+
+    def is_path_valid(self, head: Tuple[int, int]) -> bool:
+        """
+        Check if the cached path can be followed on this move.
+        Only the next cell is checked, the rest was planned with the body expiry,
+        which holds as long as no feed is eaten, i.e. the feeds did not change.
+        """
+        if not self.path or head != self.path_head:
+            return False
+
+        if self.game.fs.get_feed_bits() != self.path_feed_bits:
+            return False
+
+        return self.is_passable(self.path[0], 1)
+
+    def is_passable(self, coord: Tuple[int, int], arrival: int) -> bool:
+        """
+        Check if the head can be on the coordinate `arrival` moves from now
+        """
+        return self.game.is_in_bound(coord) and self.game.get_moves_until_free(coord) <= arrival
+
+
+    # about search
+    def search_safe_feed_path(self, head: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Get a feed path after which the tail is still reachable, `None` if there is none
+        or the last rejected one is not to be retried yet.
+        """
+        feed_bits = self.game.fs.get_feed_bits()
+        if feed_bits != self.rejected_feed_bits:
+            self.feed_retry_count = 0
+        if self.feed_retry_count > 0:
+            self.feed_retry_count -= 1
+            return None
+
+        path = self.search_feed_path(head)
+        if path and self.is_tail_reachable_after(path):
+            return path
+
+        self.rejected_feed_bits = feed_bits
+        self.feed_retry_count = min(len(path) // 2, FEED_RETRY_LIMIT) if path else 0
+        return None
+
+    def search_feed_path(self, head: Tuple[int, int]) -> List[Tuple[int, int]]:
+        feed_coords = {feed.get_coord() for feed in self.game.fs.get_feeds()}
+        if not feed_coords:
+            return None
+
+        if self.method == "a-star":
+            return self.search_path_a_star(head, self.game.fs.get_nearest_feed_coord(head))
+        return self.search_path_bfs(head, feed_coords)
+
+    def search_path_bfs(self, start: Tuple[int, int], targets: Set[Tuple[int, int]]) -> List[Tuple[int, int]]:
+        """
+        Get the shortest path from `start` to the nearest of `targets`, `None` if none is reachable.
+
+        Returns:
+            List[Tuple[int, int]]: Cells to move on, `start` excluded.
+        """
+        parents = {start: None}
+        queue = deque([(start, 0)])
+
+        while queue:
+            coord, dist = queue.popleft()
+            if coord in targets:
+                return self.build_path(parents, coord)
+
+            for dx, dy in DIR_OFFSET_DICT.values():
+                next_coord = (coord[0] + dx, coord[1] + dy)
+                if next_coord not in parents and self.is_passable(next_coord, dist + 1):
+                    parents[next_coord] = coord
+                    queue.append((next_coord, dist + 1))
+
+        return None
+
+    def search_path_a_star(self, start: Tuple[int, int], target: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Get the shortest path from `start` to `target` with a Manhattan heuristic, `None` if it is unreachable.
+
+        Returns:
+            List[Tuple[int, int]]: Cells to move on, `start` excluded.
+        """
+        parents = {start: None}
+        dists = {start: 0}
+        heap = [(get_dist(start, target), 0, start)]
+
+        while heap:
+            _, dist, coord = heapq.heappop(heap)
+            if coord == target:
+                return self.build_path(parents, coord)
+            if dist > dists[coord]:  # outdated entry
+                continue
+
+            for dx, dy in DIR_OFFSET_DICT.values():
+                next_coord = (coord[0] + dx, coord[1] + dy)
+                next_dist = dist + 1
+                if next_dist < dists.get(next_coord, next_dist + 1) and self.is_passable(next_coord, next_dist):
+                    parents[next_coord] = coord
+                    dists[next_coord] = next_dist
+                    heapq.heappush(heap, (next_dist + get_dist(next_coord, target), next_dist, next_coord))
+
+        return None
+
+    def build_path(self, parents, end: Tuple[int, int]) -> List[Tuple[int, int]]:
+        path = []
+        coord = end
+        while parents[coord] is not None:
+            path.append(coord)
+            coord = parents[coord]
+        path.reverse()
+        return path
+
+    def is_tail_reachable_after(self, path: List[Tuple[int, int]]) -> bool:
+        """
+        Check if the player, having followed the path and eaten the feed at its end,
+        can still reach its tail, so it is not trapped in a dead end.
+        """
+        bitboard = self.game.bitboard
+        player = self.game.player
+
+        # the player grows by one on the feed
+        length = player.get_length() + 1
+        bodies = path[::-1][:length]
+        if len(bodies) < length:
+            bodies.extend(player.get_bodies()[:length - len(bodies)])
+
+        free_bits = bitboard.board_mask & ~bitboard.from_coords(bodies[:-1])
+        reachable_bits = bitboard.flood_fill(bitboard.expand(bitboard.get_bit(bodies[0])), free_bits)
+
+        return bool(reachable_bits & bitboard.get_bit(bodies[-1]))
+
+
+    # about fallback
+    def search_chase_path(self, head: Tuple[int, int]) -> List[Tuple[int, int]]:
+        """
+        Get a path to the tail, `None` if it is cut off.
+
+        On arrival the tail is as many cells further along the body as the path is long.
+        If the path crossed those cells, the head would be boxed in behind its own neck,
+        so only the first move is returned and the chase is searched again on the next one.
+        """
+        tail_path = self.search_path_bfs(head, {self.game.player.get_tail()})
+        if not tail_path:
+            return None
+
+        # cells the tail leaves while the head is on its way, nearest to the tail first
+        trail = self.game.player.get_bodies()[-len(tail_path) - 1:-1]
+        if not set(trail).isdisjoint(tail_path):
+            return tail_path[:1]
+        return tail_path
+
+    def decide_region_direction(self, head: Tuple[int, int]):
+        """
+        Move to the largest free region, for when the tail is cut off
+        """
+        bitboard = self.game.bitboard
+        if self.region_analyzer is None or self.region_analyzer.bitboard is not bitboard:
+            self.region_analyzer = RegionAnalyzer(bitboard)
+        self.region_analyzer.analyze(self.game.player.get_body_bits())
+
+        best_dir = None
+        best_size = 0
+        for dir, (offset_x, offset_y) in DIR_OFFSET_DICT.items():
+            next_coord = (head[0] + offset_x, head[1] + offset_y)
+            if not self.is_passable(next_coord, 1):
+                continue
+
+            size = max(self.region_analyzer.get_region_size(next_coord), 1)
+            if size > best_size:
+                best_dir = dir
+                best_size = size
+
+        if best_dir is None:
+            return "surrender"
+        return best_dir
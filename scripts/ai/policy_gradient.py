@@ -1,3 +1,4 @@
+import os
 import torch
 import torch.nn as nn
 import torch.optim as optim
@@ -5,7 +6,8 @@ import numpy as np
 
 from .base_ai import BaseAI
 from constants import DIR_OFFSET_DICT
-from scripts.plugin.custom_func import get_dist, get_relative_x_y_dist
+from scripts.plugin.custom_func import get_dist
+from scripts.ai.feature_extractor import FeatureExtractor
 
 def check_for_nan(model, optimizer):
     for name, param in model.named_parameters():
@@ -32,15 +34,20 @@ class PolicyNetwork(nn.Module):
 
 # Policy Gradient Agent
 class PolicyGradientAgent:
-    def __init__(self, state_size, action_size, lr=0.001, gamma=0.99):
+    def __init__(self, state_size, action_size, lr=0.001, gamma=0.99, episodes_per_update=1):
         self.state_size = state_size
         self.action_size = action_size
         self.gamma = gamma  # Discount factor
+        self.episodes_per_update = episodes_per_update  # Episodes gathered into one update
 
         self.policy_net = PolicyNetwork(state_size, action_size)
         self.optimizer = optim.Adam(self.policy_net.parameters(), lr=lr)
 
         self.memory = []  # Store (state, action, reward, done)
+        self.episode_count = 0  # Finished episodes in memory
+
+        # If set, `learn()` moves the stored transitions here instead of training (used by remote actors)
+        self.transition_sink: list = None
         
     def choose_action(self, state):
         state_tensor = torch.tensor(state, dtype=torch.float32).unsqueeze(0)
@@ -60,43 +67,99 @@ class PolicyGradientAgent:
 
         return np.random.choice(self.action_size, p=action_probs)  # Sample action from probability distribution
 
+    def choose_actions(self, states):
+        """Batched `choose_action()` for states of shape (batch, state_size)"""
+        state_tensor = torch.as_tensor(states, dtype=torch.float32)
+
+        with torch.no_grad():
+            action_probs = self.policy_net(state_tensor)
+
+        action_probs = action_probs.clamp(min=1e-5)
+        action_probs /= action_probs.sum(dim=1, keepdim=True)
+
+        # Rows with NaN fall back to uniform probability
+        nan_rows = torch.isnan(action_probs).any(dim=1)
+        action_probs[nan_rows] = 1.0 / self.action_size
+
+        return torch.multinomial(action_probs, 1).squeeze(1).numpy()  # Sample one action per state
+
     def store_transition(self, state, action, reward, done):
         self.memory.append((state, action, reward, done))
+        if done:
+            self.episode_count += 1
+
+    def compute_returns(self, rewards, dones):
+        """
+        Discounted returns, reset at every episode end.
+
+        Within a block of steps, the return of a step is the reverse cumulative sum of the
+        gamma-scaled rewards up to its episode end, scaled back. Blocks are kept short enough
+        for `gamma ** -length` to stay finite, and the return is carried from one block to the previous one.
+        """
+        rewards = np.asarray(rewards, dtype=np.float64)
+        dones = np.asarray(dones, dtype=bool)
+        returns = np.zeros(len(rewards), dtype=np.float32)
+        if self.gamma <= 0:
+            returns[:] = rewards
+            return returns
+
+        block_size = max(1, len(rewards) if self.gamma >= 1 else int(200 / -np.log(self.gamma)))  # gamma ** -block_size <= e ** 200
+        carry = 0.0  # return of the step right after the block
+        for end in range(len(rewards), 0, -block_size):
+            start = max(0, end - block_size)
+            block_rewards, block_dones = rewards[start:end], dones[start:end]
+            positions = np.arange(end - start)
+            powers = self.gamma ** positions
+
+            sums = np.cumsum((block_rewards * powers)[::-1])[::-1]
+            sums_after = np.append(sums[1:], 0.0)  # sums from the next step on
+
+            # last step of the episode of every step, the block end if the episode goes on past it
+            end_positions = np.append(np.flatnonzero(block_dones), len(positions) - 1)
+            episode_ends = end_positions[np.searchsorted(end_positions, positions)]
+            has_end = block_dones[episode_ends]
+
+            block_returns = (sums - sums_after[episode_ends]) / powers
+            block_returns += np.where(has_end, 0.0, carry * self.gamma ** (len(positions) - positions))
+            returns[start:end] = block_returns
+            carry = block_returns[0]
+
+        return returns
 
     def learn(self):
         if not self.memory:
             return  # No data to learn from
 
+        if self.transition_sink is not None:
+            self.transition_sink.extend(self.memory)
+            self.memory = []
+            self.episode_count = 0
+            return
+
+        if self.episode_count < self.episodes_per_update:
+            return  # Gather more episodes into the batch
+
         # Check for NaN in model weights before training
         if check_for_nan(self.policy_net, self.optimizer):
             print(": occured on PolicyGradientAgent.learn()")
             return
         
+        states, actions, rewards, dones = zip(*self.memory)
+
         # Compute discounted rewards
-        R = 0
-        rewards = []
-        for reward, done in reversed([(r, d) for _, _, r, d in self.memory]):
-            if done:
-                R = 0  # Reset reward at game over
-            R = reward + self.gamma * R
-            rewards.insert(0, R)  # Discounted rewards
-
-        rewards = torch.tensor(rewards, dtype=torch.float32)
+        rewards = torch.from_numpy(self.compute_returns(rewards, dones))
         rewards = (rewards - rewards.mean()) / (rewards.std() + 1e-9)  # Normalize rewards
 
-        # Compute policy loss
-        policy_loss = []
-        for (state, action, reward, _), Gt in zip(self.memory, rewards):
-            state_tensor = torch.tensor(state, dtype=torch.float32).unsqueeze(0)
-            action_tensor = torch.tensor(action, dtype=torch.int64)
+        # Compute policy loss over the whole batch in one forward pass
+        state_tensor = torch.as_tensor(np.array(states), dtype=torch.float32)
+        action_tensor = torch.as_tensor(actions, dtype=torch.int64).unsqueeze(1)
 
-            action_probs = self.policy_net(state_tensor)
-            action_log_prob = torch.log(action_probs.squeeze(0)[action_tensor].clamp(min=1e-5))
-            policy_loss.append(-action_log_prob * Gt)  # Gradient ascent
+        action_probs = self.policy_net(state_tensor).gather(1, action_tensor).squeeze(1)
+        action_log_probs = torch.log(action_probs.clamp(min=1e-5))
+        loss = -(action_log_probs * rewards).sum()  # Gradient ascent
 
         # Optimize policy network
         self.optimizer.zero_grad()
-        loss = torch.stack(policy_loss).sum()
         loss.backward()
 
         # Apply Gradient Clipping
@@ -106,51 +169,71 @@ class PolicyGradientAgent:
 
         # Clear memory after learning
         self.memory = []
+        self.episode_count = 0
+
+    # about checkpoint
+    def save_checkpoint(self, directory: str, with_memory: bool = False):
+        """
+        Save the network and the optimizer into `directory`,
+        and the transitions gathered for the next update too if `with_memory`
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        state = {
+            "policy_net": self.policy_net.state_dict(),
+            "optimizer": self.optimizer.state_dict(),
+        }
+        torch.save(state, os.path.join(directory, "agent.pt"))
+
+        if with_memory and self.memory:
+            states, actions, rewards, dones = zip(*self.memory)
+            np.savez(os.path.join(directory, "memory.npz"), states=np.array(states), actions=np.array(actions), rewards=np.array(rewards), dones=np.array(dones))
+
+    def load_checkpoint(self, directory: str, mmap: bool = True):
+        """
+        Restore a checkpoint saved by `save_checkpoint()`.
+        The gathered transitions are small and always read in, so `mmap` changes nothing.
+        """
+        state = torch.load(os.path.join(directory, "agent.pt"), map_location="cpu")
+
+        self.policy_net.load_state_dict(state["policy_net"])
+        self.optimizer.load_state_dict(state["optimizer"])
+
+        self.memory = []
+        self.episode_count = 0
+        memory_path = os.path.join(directory, "memory.npz")
+        if os.path.exists(memory_path):
+            with np.load(memory_path) as memory:
+                for transition in zip(memory["states"], memory["actions"].tolist(), memory["rewards"].tolist(), memory["dones"].tolist()):
+                    self.store_transition(*transition)
 
 
 # Policy Gradient-based Snake AI
 class PolicyGradientAI(BaseAI):
-    def __init__(self):
+    def __init__(self, **agent_params):
+        """
+        Args:
+            agent_params: Hyperparameters passed on to `PolicyGradientAgent`, e.g. lr, gamma.
+        """
         self.actions = list(DIR_OFFSET_DICT.keys())  # ['E', 'W', 'S', 'N']
         self.action_size = len(self.actions)
         self.state_size = 11
 
-        self.agent = PolicyGradientAgent(self.state_size, self.action_size)
+        self.agent = PolicyGradientAgent(self.state_size, self.action_size, **agent_params)
 
-        self.dir_offset_list = list(DIR_OFFSET_DICT.values())
+        self.feature_extractor = FeatureExtractor()
 
         self.last_state = None
         self.last_feed_dist = None
         self.last_score = None
         self.last_action = None
 
-    def get_collision_mapping_values(self, head, mapping_dict):
-        collision_values = []
-
-        for dir_offset in self.dir_offset_list:
-            predicted_coord = (head[0] + dir_offset[0], head[1] + dir_offset[1])
-            predicted_collision = self.game.check_collision(predicted_coord)[0]
-            collision_values.append(mapping_dict[predicted_collision])
-        
-        return collision_values
-    
-    def get_dists_from_wall(self, head, grid_size):
-        return [grid_size[0] - 1 - head[0], grid_size[1] - 1 - head[1], head[0], head[1]]
-    
     def get_current_state_and_feed_dist(self):
-        grid_size = self.game.grid_size
-
-        bodies = self.game.player.get_bodies()
-        head = bodies[0]
-        feed = self.game.fs.get_nearest_feed_coord(head)
+        head = self.game.player.get_head()
 
-        collision_mapping = {'none': 0, 'wall': 1, 'body': 2, 'feed': 3}
         # Define current state
-        state = get_relative_x_y_dist(head, feed, grid_size) + \
-                tuple(self.get_collision_mapping_values(head, collision_mapping),) + \
-                (len(bodies),) + \
-                tuple(self.get_dists_from_wall(head, grid_size))
-        feed_dist = get_dist(head, feed)
+        state = self.feature_extractor.extract(self.game).copy()
+        feed_dist = get_dist(head, self.feature_extractor.feed_coord)
         
         return state, feed_dist
 
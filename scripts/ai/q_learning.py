@@ -1,62 +1,60 @@
+import json
+import os
 import random
+import numpy as np
 
 from .base_ai import BaseAI
 
 from constants import DIR_OFFSET_DICT
-from scripts.plugin.custom_func import get_dist, get_relative_x_y_dist
+from scripts.plugin.custom_func import get_dist
+from scripts.ai.feature_extractor import FeatureExtractor
+from scripts.ai.state_discretizer import StateDiscretizer, SNAKE_FEATURE_BINS
+from scripts.ai.symmetry import DihedralSymmetry
 
-from collections import defaultdict
-
-from typing import Tuple
+from typing import List
     
 class QLearningAI(BaseAI):
-    def __init__(self, alpha=0.1, gamma=0.9, epsilon=0.9):
+    def __init__(self, alpha=0.1, gamma=0.9, epsilon=0.9, use_symmetry=True):
         self.actions = list(DIR_OFFSET_DICT.keys())
 
-        self.agent = QLearningAgent(self.actions, alpha, gamma, epsilon)
-
-        self.dir_offset_list = list(DIR_OFFSET_DICT.values())
+        # the neck direction tells which way the player cannot turn
+        self.feature_extractor = FeatureExtractor(with_neck_dir=True)
+        self.discretizer = StateDiscretizer(SNAKE_FEATURE_BINS)
+
+        # rotated or mirrored states share one row of the Q-table, the actions turned along
+        self.use_symmetry = use_symmetry
+        state_num = self.discretizer.state_num
+        if use_symmetry:
+            self.symmetry = DihedralSymmetry()
+            canonical_states, canonical_transforms, state_num = self.symmetry.build_canonical_table(self.discretizer)
+            self.canonical_states: List[int] = canonical_states.tolist()
+            self.canonical_transforms: List[int] = canonical_transforms.tolist()
+            # board_actions[g][canonical action]: the action to take on the board
+            self.board_actions = [
+                {action: self.actions[idx] for action, idx in zip(self.actions, self.symmetry.inverse_dir_perms[g])}
+                for g in range(self.symmetry.transform_num)
+            ]
+
+        self.agent = QLearningAgent(self.actions, alpha, gamma, epsilon, state_num)
 
         self.last_state = None
         self.last_feed_dist = None
         self.last_score = None
         self.last_action = None
 
-    def get_collision_values(self, head):
-        collision_values = []
-
-        for dir_offset in self.dir_offset_list:
-            predicted_coord = (head[0] + dir_offset[0], head[1] + dir_offset[1])
-            predicted_collision = self.game.check_collision(predicted_coord)[0]
-            collision_values.append(predicted_collision)
-        
-        return collision_values
-    
-    def get_neck_dir(self, head, neck):
-        neck_offset = (neck[0] - head[0], neck[1] - head[1])
-
-        for dir, dir_offset in DIR_OFFSET_DICT.items():
-            if neck_offset == dir_offset:
-                return dir
-    
-    def get_dists_from_wall(self, head, grid_size):
-        return [grid_size[0]-1 - head[0], grid_size[1]-1 - head[1], head[0], head[1]]
-
     def decide_direction(self):
-        grid_size = self.game.grid_size
+        head = self.game.player.get_head()
 
-        bodies = self.game.player.get_bodies()
-        head = bodies[0]
-        neck = bodies[1]
-        feed = self.game.fs.get_nearest_feed_coord(head)
-
-        state = get_relative_x_y_dist(head, feed, grid_size) + \
-                tuple(self.get_collision_values(head)) + \
-                (self.get_neck_dir(head, neck), len(bodies)) + \
-                tuple(self.get_dists_from_wall(head, grid_size))
+        # row of the Q-table
+        state = self.discretizer.get_index(self.feature_extractor.extract(self.game))
+        feed = self.feature_extractor.feed_coord
         feed_dist = get_dist(head, feed)
         score = self.game.scores["score"]
-        action = self.agent.choose_action(state)
+        transform = 0
+        if self.use_symmetry:
+            transform = self.canonical_transforms[state]
+            state = self.canonical_states[state]
+        action = self.agent.choose_action(state)  # in the frame of the canonical state
 
         if self.last_state is not None:
             reward = score - self.last_score
@@ -70,39 +68,105 @@ class QLearningAI(BaseAI):
         self.last_score = score
         self.last_action = action
 
+        if self.use_symmetry:
+            return self.board_actions[transform][action]
         return action
     
     def learn(self, reward, next_state):
         self.agent.learn(self.last_state, self.last_action, reward, next_state)
 
 class QLearningAgent:
-    def __init__(self, actions, alpha, gamma, epsilon):
+    def __init__(self, actions, alpha, gamma, epsilon, state_num):
         """
         Initialize Q-Learning Agent
         :param actions: list of possible actions (['N', 'E', 'S', 'W'])
         :param alpha: learning rate
         :param gamma: discount factor
         :param epsilon: exploration probability (ε-greedy)
+        :param state_num: number of discretized states, rows of the Q-table
         """
-        self.q_table = defaultdict(float)  # Q-value storage table
+        self.q_table = np.zeros((state_num, len(actions)), dtype=np.float32)  # Q-value storage table
         self.actions = actions
+        self.action_indices = {action: idx for idx, action in enumerate(actions)}
         self.alpha = alpha
         self.gamma = gamma
         self.epsilon = epsilon
 
-    def choose_action(self, state: Tuple[int, int]) -> str:
+        # If set, `learn()` appends the transitions here instead of updating the table (used by remote actors)
+        self.transition_sink: list = None
+
+    def choose_action(self, state: int) -> str:
         if random.uniform(0, 1) < self.epsilon:
             return random.choice(self.actions)  # exploration
         else:
             # exploitation
-            q_values = [self.q_table[(state, action)] for action in self.actions]
+            q_values = self.q_table[state].tolist()
             max_q = max(q_values)
             return random.choice([action for action, q in zip(self.actions, q_values) if q == max_q])
 
+    def choose_actions(self, states: np.ndarray) -> List[str]:
+        """Batched `choose_action()` for an array of states"""
+        action_indices = np.argmax(self.q_table[states], axis=1)
+
+        # Exploration per state
+        explore = np.random.uniform(0, 1, len(action_indices)) < self.epsilon
+        action_indices[explore] = np.random.randint(0, len(self.actions), explore.sum())
+        return [self.actions[idx] for idx in action_indices]
+
     def learn(self, state, action, reward, next_state):
-        current_q = self.q_table[(state, action)]
-        max_next_q = max([self.q_table[(next_state, a)] for a in self.actions])
-        new_q = current_q + self.alpha * (reward + self.gamma * max_next_q - current_q)
-        self.q_table[(state, action)] = new_q
+        if self.transition_sink is not None:
+            self.transition_sink.append((state, action, reward, next_state))
+            return
 
-        self.epsilon = max(0.01, self.epsilon * 0.995)  # gradually increase greedy behavior
\ No newline at end of file
+        action_idx = self.action_indices[action]
+        current_q = self.q_table[state, action_idx]
+        max_next_q = 0.0 if next_state is None else max(self.q_table[next_state].tolist())
+        self.q_table[state, action_idx] = current_q + self.alpha * (reward + self.gamma * max_next_q - current_q)
+
+        self.epsilon = max(0.01, self.epsilon * 0.995)  # gradually increase greedy behavior
+
+    def save(self, file_path: str):
+        """
+        Save the Q-table as a `.npy` file
+        """
+        q_table = np.lib.format.open_memmap(file_path, mode='w+', dtype=self.q_table.dtype, shape=self.q_table.shape)
+        q_table[:] = self.q_table
+        q_table.flush()
+
+    def load(self, file_path: str, mmap: bool = True):
+        """
+        Load a Q-table saved by `save()`.
+
+        Args:
+            file_path (str): Path of the `.npy` file.
+            mmap (bool): Work on the file through a memory map instead of reading it in,
+                so updates go straight to the file and memory stays bounded.
+        """
+        self.q_table = self.read_q_table(file_path, 'r+' if mmap else None)
+
+    def read_q_table(self, file_path: str, mmap_mode: str) -> np.ndarray:
+        q_table = np.load(file_path, mmap_mode=mmap_mode)
+        if q_table.shape != self.q_table.shape:
+            raise ValueError(f"Q-table shape mismatch on `load()`: {q_table.shape} != {self.q_table.shape}")
+        return q_table
+
+    # about checkpoint
+    def save_checkpoint(self, directory: str, with_memory: bool = False):
+        """
+        Save the Q-table and the exploration rate into `directory`.
+        The agent keeps no replay memory, so `with_memory` changes nothing.
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        self.save(os.path.join(directory, "q_table.npy"))
+        with open(os.path.join(directory, "agent.json"), 'w') as f:
+            json.dump({"epsilon": self.epsilon}, f)
+
+    def load_checkpoint(self, directory: str, mmap: bool = True):
+        """
+        Restore a checkpoint saved by `save_checkpoint()`.
+        With `mmap`, the Q-table is mapped copy-on-write, so the checkpoint itself is never modified.
+        """
+        self.q_table = self.read_q_table(os.path.join(directory, "q_table.npy"), 'c' if mmap else None)
+        with open(os.path.join(directory, "agent.json"), 'r') as f:
+            self.epsilon = json.load(f)["epsilon"]
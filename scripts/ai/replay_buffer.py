@@ -0,0 +1,297 @@
+import json
+import os
+import numpy as np
+
+from typing import Tuple, List, Dict
+
+class SumTree:
+    """
+    Binary tree over `capacity` leaf priorities, each node holding the sum of its children.
+    Updating a priority and finding the leaf of a prefix sum both cost O(log N),
+    and both run on whole batches of leaves at once.
+    """
+    def __init__(self, capacity: int):
+        """
+        Create SumTree Class
+
+        Args:
+            capacity (int): Number of leaves.
+        """
+        self.depth: int = max(1, (capacity - 1).bit_length())
+        self.leaf_num: int = 1 << self.depth  # leaves padded to a power of two, so they share one depth
+        self.tree = np.zeros(2 * self.leaf_num, dtype=np.float64)  # node 1 is the root
+
+    def total(self) -> float:
+        return self.tree[1]
+
+    def get(self, indices: np.ndarray) -> np.ndarray:
+        return self.tree[np.asarray(indices) + self.leaf_num]
+
+    def update(self, indices: np.ndarray, priorities: np.ndarray):
+        nodes = np.asarray(indices, dtype=np.int64) + self.leaf_num
+        self.tree[nodes] = priorities
+
+        for _ in range(self.depth):
+            nodes = np.unique(nodes // 2)
+            self.tree[nodes] = self.tree[2 * nodes] + self.tree[2 * nodes + 1]
+
+    def clear(self, size: int):
+        """
+        Zero the first `size` leaves and their ancestors, the other leaves being zero already.
+        The ancestors of a leaf prefix are a prefix of every level, so each level is one slice.
+        """
+        first, last = self.leaf_num, self.leaf_num + size
+        for _ in range(self.depth + 1):
+            self.tree[first:last] = 0.0
+            first, last = first // 2, (last + 1) // 2
+
+    def find(self, values: np.ndarray) -> np.ndarray:
+        """
+        Get the leaf of every prefix sum in `values`
+        """
+        values = np.array(values, dtype=np.float64)
+        nodes = np.ones(len(values), dtype=np.int64)
+
+        for _ in range(self.depth):
+            left = 2 * nodes
+            left_sum = self.tree[left]
+            go_right = values >= left_sum
+            values = np.where(go_right, values - left_sum, values)
+            nodes = np.where(go_right, left + 1, left)
+
+        return nodes - self.leaf_num
+
+class ReplayBuffer:
+    """
+    Experience replay memory of (state, action, reward, next_state, done) transitions.
+
+    Transitions are kept in preallocated columnar arrays used as a ring buffer,
+    so pushing costs O(1) and sampling a batch costs O(batch), whatever the capacity.
+
+    In prioritized mode, transitions are sampled proportionally to `priority ** alpha`
+    through a sum tree, in O(batch * log N). `sample()` then also keeps the indices
+    and importance-sampling weights of the batch, for `update_priorities()`.
+    Every slot remembers which push wrote it, so the priorities of a batch
+    are not given to transitions pushed over it since it was sampled.
+    """
+    def __init__(self, capacity: int, state_size: int = None, prioritized: bool = False, alpha: float = 0.6, beta: float = 0.4, priority_epsilon: float = 1e-5):
+        """
+        Create ReplayBuffer Class
+
+        Args:
+            capacity (int): Maximum number of transitions, the oldest ones are overwritten.
+            state_size (int): Length of a state. `None` to take it from the first pushed state.
+            prioritized (bool): Sample by priority instead of uniformly.
+            alpha (float): How much the priorities count, `0` for uniform.
+            beta (float): How much the importance-sampling weights correct the bias, `1` for fully.
+            priority_epsilon (float): Added to the TD errors, so no transition gets a zero priority.
+        """
+        self.capacity = capacity
+        self.size: int = 0
+        self.ptr: int = 0  # where the next transition goes
+
+        self.states: np.ndarray = None
+        self.actions = np.zeros(capacity, dtype=np.int64)
+        self.rewards = np.zeros(capacity, dtype=np.float32)
+        self.next_states: np.ndarray = None
+        self.dones = np.zeros(capacity, dtype=np.float32)
+        if state_size is not None:
+            self.allocate_states(state_size)
+
+        self.prioritized = prioritized
+        self.alpha = alpha
+        self.beta = beta
+        self.priority_epsilon = priority_epsilon
+        self.tree = SumTree(capacity) if prioritized else None
+        self.max_priority: float = 1.0  # given to new transitions, so they get sampled at least once
+
+        # number of the push which wrote every slot, `0` for none
+        self.push_count: int = 0
+        self.generations = np.zeros(capacity, dtype=np.int64) if prioritized else None
+
+        # indices, importance-sampling weights and generations of the last sampled batch
+        self.sampled_indices: np.ndarray = None
+        self.sampled_weights: np.ndarray = None
+        self.sampled_generations: np.ndarray = None
+
+    def allocate_states(self, state_size: int):
+        self.states = np.zeros((self.capacity, state_size), dtype=np.float32)
+        self.next_states = np.zeros((self.capacity, state_size), dtype=np.float32)
+
+    def push(self, state, action, reward, next_state, done):
+        if self.states is None:
+            self.allocate_states(len(state))
+
+        idx = self.ptr
+        self.states[idx] = state
+        self.actions[idx] = action
+        self.rewards[idx] = reward
+        self.next_states[idx] = next_state
+        self.dones[idx] = done
+
+        if self.prioritized:
+            self.tree.update([idx], [self.max_priority ** self.alpha])
+            self.push_count += 1
+            self.generations[idx] = self.push_count
+
+        self.ptr = (idx + 1) % self.capacity
+        self.size = min(self.size + 1, self.capacity)
+
+    def push_batch(self, states, actions, rewards, next_states, dones, priorities=None):
+        """
+        Push many transitions at once, e.g. one per game of `BatchSnakeEnv`.
+        In prioritized mode, `priorities` (e.g. TD errors computed by an actor) replace the max priority.
+        """
+        states = np.asarray(states, dtype=np.float32)[-self.capacity:]
+        if self.states is None:
+            self.allocate_states(states.shape[1])
+
+        num = len(states)
+        indices = (self.ptr + np.arange(num)) % self.capacity
+        self.states[indices] = states
+        self.actions[indices] = np.asarray(actions)[-num:]
+        self.rewards[indices] = np.asarray(rewards)[-num:]
+        self.next_states[indices] = np.asarray(next_states, dtype=np.float32)[-num:]
+        self.dones[indices] = np.asarray(dones)[-num:]
+
+        if self.prioritized:
+            if priorities is None:
+                self.tree.update(indices, np.full(num, self.max_priority ** self.alpha))
+            else:
+                priorities = np.abs(np.asarray(priorities, dtype=np.float64)[-num:]) + self.priority_epsilon
+                self.max_priority = max(self.max_priority, float(priorities.max()))
+                self.tree.update(indices, priorities ** self.alpha)
+            self.generations[indices] = self.push_count + np.arange(1, num + 1)
+            self.push_count += num
+
+        self.ptr = (self.ptr + num) % self.capacity
+        self.size = min(self.size + num, self.capacity)
+
+    def sample(self, batch_size: int) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+        if self.prioritized:
+            indices = self.sample_prioritized_indices(batch_size)
+        else:
+            indices = np.random.randint(0, self.size, batch_size)
+            self.sampled_indices = indices
+            self.sampled_weights = np.ones(batch_size, dtype=np.float32)
+
+        return self.states[indices], self.actions[indices], self.rewards[indices], self.next_states[indices], self.dones[indices]
+
+    def sample_prioritized_indices(self, batch_size: int) -> np.ndarray:
+        # one value per equal segment of the total priority, for a spread-out batch
+        total = self.tree.total()
+        segment = total / batch_size
+        values = (np.arange(batch_size) + np.random.uniform(0, 1, batch_size)) * segment
+        indices = np.minimum(self.tree.find(np.minimum(values, total * (1 - 1e-9))), self.size - 1)
+
+        probs = self.tree.get(indices) / total
+        weights = (self.size * probs) ** -self.beta
+        weights /= weights.max()
+
+        self.sampled_indices = indices
+        self.sampled_weights = weights.astype(np.float32)
+        self.sampled_generations = self.generations[indices]
+        return indices
+
+    def update_priorities(self, indices: np.ndarray, td_errors: np.ndarray, generations: np.ndarray = None):
+        """
+        Set the priorities of sampled transitions from their new TD errors
+
+        Args:
+            indices (np.ndarray): Slots of the transitions, e.g. `sampled_indices`.
+            td_errors (np.ndarray): New TD errors of the transitions.
+            generations (np.ndarray): `sampled_generations` of the batch. If given,
+                slots pushed over since the batch was sampled are left as they are.
+        """
+        if not self.prioritized:
+            return
+
+        if generations is not None:
+            kept = self.generations[indices] == generations
+            indices, td_errors = np.asarray(indices)[kept], np.asarray(td_errors)[kept]
+            if not len(indices):
+                return
+
+        priorities = np.abs(td_errors) + self.priority_epsilon
+        self.max_priority = max(self.max_priority, float(priorities.max()))
+        self.tree.update(indices, priorities ** self.alpha)
+
+    def get_transitions(self) -> List[tuple]:
+        """
+        Get the stored transitions as tuples, the oldest first
+        """
+        start = self.ptr if self.size == self.capacity else 0
+        indices = (start + np.arange(self.size)) % self.capacity
+        return [
+            (self.states[idx].copy(), int(self.actions[idx]), float(self.rewards[idx]), self.next_states[idx].copy(), bool(self.dones[idx]))
+            for idx in indices
+        ]
+
+    # about checkpoint
+    def save(self, directory: str):
+        """
+        Save the buffer as one `.npy` file per column, so `load()` can memory-map them
+        """
+        os.makedirs(directory, exist_ok=True)
+
+        for name, column in self.get_columns().items():
+            if column is not None:
+                np.save(os.path.join(directory, f"{name}.npy"), column)
+        if self.prioritized:
+            np.save(os.path.join(directory, "priorities.npy"), self.tree.tree)
+
+        with open(os.path.join(directory, "buffer.json"), 'w') as f:
+            json.dump({"capacity": self.capacity, "size": self.size, "ptr": self.ptr, "max_priority": self.max_priority}, f)
+
+    def load(self, directory: str, mmap: bool = True):
+        """
+        Load a buffer saved by `save()`.
+
+        Args:
+            directory (str): Directory given to `save()`.
+            mmap (bool): Map the columns copy-on-write instead of reading them in,
+                so loading is instant, pages are read on first use and the files stay untouched.
+        """
+        with open(os.path.join(directory, "buffer.json"), 'r') as f:
+            meta = json.load(f)
+        if meta["capacity"] != self.capacity:
+            raise ValueError(f"Replay buffer capacity mismatch on `load()`: {meta['capacity']} != {self.capacity}")
+
+        for name in self.get_columns().keys():
+            file_path = os.path.join(directory, f"{name}.npy")
+            if os.path.exists(file_path):
+                setattr(self, name, np.load(file_path, mmap_mode='c' if mmap else None))
+
+        if self.prioritized:
+            file_path = os.path.join(directory, "priorities.npy")
+            if os.path.exists(file_path):
+                tree = np.load(file_path, mmap_mode='c' if mmap else None)
+                if tree.shape != self.tree.tree.shape:
+                    raise ValueError(f"Replay buffer priorities mismatch on `load()`: {tree.shape} != {self.tree.tree.shape}")
+                self.tree.tree = tree
+            else:  # saved uniform, every transition starts even
+                self.clear()
+                self.tree.update(np.arange(meta["size"]), np.ones(meta["size"]))
+            self.generations[:] = 0  # batches sampled before do not match the loaded transitions
+
+        self.size = meta["size"]
+        self.ptr = meta["ptr"]
+        self.max_priority = meta["max_priority"]
+
+    def get_columns(self) -> Dict[str, np.ndarray]:
+        return {"states": self.states, "actions": self.actions, "rewards": self.rewards, "next_states": self.next_states, "dones": self.dones}
+
+    def clear(self):
+        """
+        Forget every transition. Only the priorities in use are zeroed,
+        so clearing a barely used buffer does not cost O(capacity).
+        `max_priority` is kept, new transitions still get the highest priority seen.
+        """
+        if self.prioritized:
+            self.tree.clear(self.size)
+            self.generations[:self.size] = 0  # the used slots are the first `size` ones
+        self.size = 0
+        self.ptr = 0
+
+    def __len__(self):
+        return self.size
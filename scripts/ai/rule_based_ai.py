@@ -1,10 +1,11 @@
 from .base_ai import BaseAI
+from scripts.plugin.hamiltonian_cycle import HamiltonianCycle
 
 from sys import maxsize
 
 from typing import Tuple, List
 
-from constants import DIR_OFFSET_DICT
+from constants import DIR_OFFSET_DICT, HAMILTONIAN_CYCLE_DIRECTORY
 
 def get_dist(pos_a: Tuple[int, int], pos_b: Tuple[int, int]) -> int:
     return abs(pos_b[0] - pos_a[0]) + abs(pos_b[1] - pos_a[1])
@@ -16,13 +17,18 @@ def get_neck_dir(head, neck) -> str:
         if dir_offset == offset:
             return dir
 
-def is_even(num: int) -> bool:
-    return num % 2 == 0
-
 class RuleBasedAI(BaseAI):
-    def __init__(self, method: str):
+    def __init__(self, method: str, cycle_directory: str = HAMILTONIAN_CYCLE_DIRECTORY):
+        """
+        Create RuleBasedAI Class
+
+        Args:
+            method (str): Rule followed, e.g. "priority-larger" or "maximalism".
+            cycle_directory (str): Directory caching the cycle tables of "maximalism".
+        """
         super().__init__()
         self.method = method
+        self.cycle_directory = cycle_directory
 
     def decide_direction(self):
         head = self.game.player.get_head()
@@ -84,7 +90,7 @@ class RuleBasedAI(BaseAI):
             # avoid the player's body
             for _ in range(len(valid_dirs)):
                 next_pos = tuple(head[i] + DIR_OFFSET_DICT[dir][i] for i in [0, 1])
-                if next_pos in self.game.player.get_bodies() or not self.game.is_in_bound(next_pos):
+                if self.game.player.is_body(next_pos) or not self.game.is_in_bound(next_pos):
                     valid_dirs.remove(dir)
                     if len(valid_dirs) == 0:
                         dir = "surrender"
@@ -93,41 +99,24 @@ class RuleBasedAI(BaseAI):
                 else:
                     break
         else: # method: maximalism
-            is_width_even, is_height_even = tuple(is_even(grid_size[i]) for i in [0, 1])
-
-            if is_width_even:
-                if head[0] < grid_size[0] - 1 and head[1] == grid_size[1] - 1:
-                    dir = 'E'
-                elif head[0] == 0 and head[1] < grid_size[1] - 1:
-                    dir = 'S'
-                elif head[0] == grid_size[0] - 1 and head[1] > 0:
-                    dir = 'N'
-                elif (not is_even(head[0]) and head[1] == 0) \
-                     or (is_even(head[0]) and head[1] == grid_size[1] - 2):
-                    dir = 'W'
-                elif is_even(head[0]) and head[1] < grid_size[1] - 2:
-                    dir = 'S'
-                else:
-                    dir = 'N'
-
-            elif is_height_even:
-                if head[0] < grid_size[0] - 1 and head[1] == grid_size[1] - 1:
-                    dir = 'E'
-                elif head[0] == 0 and head[1] < grid_size[1] - 1:
-                    dir = 'S'
-                elif head[1] == 0:
-                    dir = 'W'
-                elif (head[0] == grid_size[0] - 1 and not is_even(head[1])) \
-                     or (head[0] == 1 and is_even(head[1])):
-                    dir = 'N'
-                elif head[0] > 1 and is_even(head[1]):
-                    dir = 'W'
-                else:
-                    dir = 'E'
-
-            else:
-                # There will inevitably be empty spaces.
-                # Causes too much deliberation, so it's put on hold.
-                pass
+            # follow the precomputed Hamiltonian cycle
+            cycle = HamiltonianCycle.get(grid_size, self.cycle_directory)
+            dir = cycle.get_next_dir(head)
+
+            # an odd x odd cycle leaves out the bottom-right corner, detour into it when a feed waits there
+            detour_dir = cycle.get_detour_dir(head)
+            if detour_dir is not None and self.game.fs.is_feed_exist(cycle.skipped_corner):
+                dir = detour_dir
+
+            # the initial body may lie across the cycle, step aside until it does not
+            if not self.is_passable(tuple(head[i] + DIR_OFFSET_DICT[dir][i] for i in [0, 1])):
+                dir = "surrender"
+                for side_dir, offset in DIR_OFFSET_DICT.items():
+                    if self.is_passable((head[0] + offset[0], head[1] + offset[1])):
+                        dir = side_dir
+                        break
 
         return dir
+
+    def is_passable(self, coord: Tuple[int, int]) -> bool:
+        return self.game.is_in_bound(coord) and self.game.get_moves_until_free(coord) <= 1
@@ -0,0 +1,78 @@
+import bisect
+import numpy as np
+
+from typing import Tuple, List, Sequence
+
+class StateDiscretizer:
+    """
+    Maps feature vectors to dense integer state indices.
+
+    Every chosen feature is cut into bins by its edges (as `np.digitize`),
+    and the bin numbers are combined in mixed radix, so the indices run
+    from `0` to `state_num - 1` with no gap. Features not listed are ignored.
+    """
+    def __init__(self, feature_bins: List[Tuple[int, Sequence[float]]]):
+        """
+        Create StateDiscretizer Class
+
+        Args:
+            feature_bins (List[Tuple[int, Sequence[float]]]): (feature index, bin edges) per used feature.
+        """
+        self.feature_indices = np.array([idx for idx, _ in feature_bins], dtype=np.int64)
+        self.edges: List[np.ndarray] = [np.asarray(edges, dtype=np.float64) for _, edges in feature_bins]
+        self.bins: List[Tuple[int, List[float], int]] = []  # plain (feature index, edges, place value), for `get_index()`
+
+        bin_nums = [len(edges) + 1 for edges in self.edges]
+        self.radixes = np.ones(len(bin_nums), dtype=np.int64)  # place value of every feature
+        for idx in range(len(bin_nums) - 2, -1, -1):
+            self.radixes[idx] = self.radixes[idx + 1] * bin_nums[idx + 1]
+        self.state_num: int = int(np.prod(bin_nums))
+
+        for feature_idx, edges, radix in zip(self.feature_indices, self.edges, self.radixes):
+            self.bins.append((int(feature_idx), edges.tolist(), int(radix)))
+
+    def get_index(self, features: np.ndarray) -> int:
+        index = 0
+        for feature_idx, edges, radix in self.bins:
+            index += bisect.bisect_right(edges, features[feature_idx]) * radix
+        return index
+
+    def get_indices(self, features: np.ndarray) -> np.ndarray:
+        """
+        Batched `get_index()` for features of shape (batch, feature_size)
+        """
+        features = np.asarray(features)
+        indices = np.zeros(len(features), dtype=np.int64)
+        for edges, feature_idx, radix in zip(self.edges, self.feature_indices, self.radixes):
+            indices += np.searchsorted(edges, features[:, feature_idx], side='right') * radix
+        return indices
+
+    def get_representatives(self) -> np.ndarray:
+        """
+        Get one feature vector per state index, of shape (state_num, feature_size),
+        each used feature set to the middle of its bin (the outer bins mirror their neighbour).
+        """
+        feature_size = int(self.feature_indices.max()) + 1
+        representatives = np.zeros((self.state_num, feature_size), dtype=np.float32)
+
+        states = np.arange(self.state_num)
+        for edges, feature_idx, radix in zip(self.edges, self.feature_indices, self.radixes):
+            half_width = (edges[1] - edges[0]) / 2 if len(edges) > 1 else 1.0
+            last_half_width = (edges[-1] - edges[-2]) / 2 if len(edges) > 1 else 1.0
+            values = np.concatenate(([edges[0] - half_width], (edges[:-1] + edges[1:]) / 2, [edges[-1] + last_half_width]))
+
+            bin_indices = (states // radix) % (len(edges) + 1)
+            representatives[:, feature_idx] = values[bin_indices]
+        return representatives
+
+# Bins of the `FeatureExtractor(with_neck_dir=True)` features used by QLearningAI.
+# The wall distances are left out, the collision codes already tell the walls next to the head.
+SIGN_EDGES = (-1e-9, 1e-9)  # negative, zero, positive
+CODE_EDGES = (0.5, 1.5, 2.5)  # the 4 codes of `OBJECT_DICT`, or the 4 directions
+LENGTH_EDGES = (5, 10, 20)
+SNAKE_FEATURE_BINS = [
+    (0, SIGN_EDGES), (1, SIGN_EDGES),  # feed direction
+    (2, CODE_EDGES), (3, CODE_EDGES), (4, CODE_EDGES), (5, CODE_EDGES),  # collisions
+    (6, LENGTH_EDGES),
+    (11, CODE_EDGES),  # neck direction
+]
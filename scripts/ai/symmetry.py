@@ -0,0 +1,97 @@
+import numpy as np
+
+from constants import DIR_OFFSET_DICT
+
+from typing import Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from scripts.ai.state_discretizer import StateDiscretizer
+
+# The 8 rotations and reflections of the board, as matrices acting on (x, y)
+DIHEDRAL_MATRICES = [
+    ((1, 0), (0, 1)), ((0, -1), (1, 0)), ((-1, 0), (0, -1)), ((0, 1), (-1, 0)),  # rotations
+    ((-1, 0), (0, 1)), ((1, 0), (0, -1)), ((0, 1), (1, 0)), ((0, -1), (-1, 0)),  # reflections
+]
+
+# position of the wall distance of every direction (in `DIR_OFFSET_DICT` order) in the features
+WALL_FEATURE_INDICES = {'E': 7, 'S': 8, 'W': 9, 'N': 10}
+
+class DihedralSymmetry:
+    """
+    Transforms the `FeatureExtractor` features and the actions of the learned pilots
+    by the 8 symmetries of the board.
+
+    Relative feed distances are rotated as vectors, and the per-direction features
+    (collisions, wall distances, neck direction) follow their direction.
+    On a non-square grid a quarter turn gives the state of the transposed grid.
+    """
+    transform_num: int = len(DIHEDRAL_MATRICES)
+
+    def __init__(self):
+        dir_offsets = list(DIR_OFFSET_DICT.values())
+
+        # dir_perms[g][d]: index of the direction `d` turns into under the transform `g`
+        self.dir_perms = np.zeros((self.transform_num, len(dir_offsets)), dtype=np.int64)
+        for g, ((a, b), (c, d)) in enumerate(DIHEDRAL_MATRICES):
+            for dir_idx, (x, y) in enumerate(dir_offsets):
+                self.dir_perms[g, dir_idx] = dir_offsets.index((a * x + b * y, c * x + d * y))
+        self.inverse_dir_perms = np.argsort(self.dir_perms, axis=1)
+
+        self.matrices = np.array(DIHEDRAL_MATRICES, dtype=np.float32)
+
+        # feature_sources[g][i]: feature moved to position `i` under the transform `g`
+        wall_indices = [WALL_FEATURE_INDICES[dir] for dir in DIR_OFFSET_DICT.keys()]
+        self.feature_sources = np.tile(np.arange(12), (self.transform_num, 1))
+        for g in range(self.transform_num):
+            for dir_idx, new_dir_idx in enumerate(self.dir_perms[g]):
+                self.feature_sources[g, 2 + new_dir_idx] = 2 + dir_idx
+                self.feature_sources[g, wall_indices[new_dir_idx]] = wall_indices[dir_idx]
+
+    def transform_features(self, features: np.ndarray, g: int) -> np.ndarray:
+        """
+        Get the features of shape (..., 11 or 12) seen through the transform `g`
+        """
+        features = np.asarray(features, dtype=np.float32)
+        size = features.shape[-1]
+
+        transformed = features[..., self.feature_sources[g, :size]]
+        transformed[..., 0:2] = features[..., 0:2] @ self.matrices[g].T
+        if size > 11:  # neck direction
+            neck_dirs = np.clip(np.rint(features[..., 11]), 0, 3).astype(np.int64)
+            transformed[..., 11] = self.dir_perms[g][neck_dirs]
+        return transformed
+
+    def transform_actions(self, actions: np.ndarray, g: int) -> np.ndarray:
+        return self.dir_perms[g][actions]
+
+    def inverse_transform_actions(self, actions: np.ndarray, g: int) -> np.ndarray:
+        return self.inverse_dir_perms[g][actions]
+
+    def augment(self, states: np.ndarray, actions: np.ndarray, next_states: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Get the transitions of shape (batch, ...) under all 8 transforms, stacked transform by transform
+        """
+        augmented_states = np.concatenate([self.transform_features(states, g) for g in range(self.transform_num)])
+        augmented_actions = np.concatenate([self.transform_actions(actions, g) for g in range(self.transform_num)])
+        augmented_next_states = np.concatenate([self.transform_features(next_states, g) for g in range(self.transform_num)])
+        return augmented_states, augmented_actions, augmented_next_states
+
+    def build_canonical_table(self, discretizer: "StateDiscretizer") -> Tuple[np.ndarray, np.ndarray, int]:
+        """
+        Group the discretized states by symmetry, for a discretizer whose bins are symmetric.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray, int]: For every state, the dense index of its group
+                and the transform taking it to the group's representative, and the number of groups.
+        """
+        representatives = discretizer.get_representatives()
+
+        transformed_indices = np.stack([
+            discretizer.get_indices(self.transform_features(representatives, g))
+            for g in range(self.transform_num)
+        ])
+        canonical_transforms = np.argmin(transformed_indices, axis=0)
+        canonical_indices = transformed_indices[canonical_transforms, np.arange(discretizer.state_num)]
+
+        _, canonical_states = np.unique(canonical_indices, return_inverse=True)
+        return canonical_states, canonical_transforms, int(canonical_states.max()) + 1
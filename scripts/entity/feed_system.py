@@ -1,50 +1,130 @@
 from constants import *
 
-from typing import Tuple, Dict, List
+from typing import Tuple, Dict, List, Iterator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from scripts.plugin.bitboard import Bitboard
 
 class FeedSystem:
-    def __init__(self):
+    linear_scan_limit: int = 16  # below this many feeds, a plain scan beats the spatial index
+
+    def __init__(self, bucket_size: int = 4, bitboard: "Bitboard" = None):
         """
         Create FeedSystem Class
+
+        Args:
+            bucket_size (int): Side length (in cells) of each bucket of the spatial index.
+            bitboard (Bitboard): If given, also keep the feeds as a bitboard.
         """
         self._feeds: Dict[Tuple[int, int], Feed] = {}
-    
+
+        self._type_counts: Dict[str, int] = {}
+
+        # spatial index: bucket coord -> {feed coord: insertion order}
+        self._bucket_size = bucket_size
+        self._buckets: Dict[Tuple[int, int], Dict[Tuple[int, int], int]] = {}
+        self._insertion_count: int = 0
+
+        self._bitboard = bitboard
+        self._feed_bits: int = 0
+
     def is_feed_empty(self, feed_type: str = 'normal'):
-        return not any(feed._type == feed_type for feed in self._feeds.values())
-    
+        return not self._type_counts.get(feed_type, 0)
+
     def is_feed_exist(self, coord: Tuple[int, int]) -> bool:
         """
         Check if the given coordinates are currently in feeds list
         """
         return coord in self._feeds
-    
+
     def get_feeds(self) -> List["Feed"]:
         return list(self._feeds.values())
-    
+
     def get_feed(self, coord: Tuple[int, int]) -> "Feed":
         return self._feeds[coord]
-    
+
+    def get_feed_bits(self) -> int:
+        """
+        Get the bitboard of the feeds, `0` if the system has no bitboard
+        """
+        return self._feed_bits
+
+    def get_feed_count(self, feed_type: str = 'normal') -> int:
+        return self._type_counts.get(feed_type, 0)
+
     def get_nearest_feed_coord(self, coord: Tuple[int, int]) -> "Feed":
         if not self._feeds:
             return None  # return `None` if no feeds exist
-        
-        return min(self._feeds.keys(), key=lambda feed_coord: self._calculate_distance(feed_coord, coord))
-    
+
+        if len(self._feeds) <= self.linear_scan_limit:
+            return min(self._feeds.keys(), key=lambda feed_coord: self._calculate_distance(feed_coord, coord))
+
+        # Search the buckets ring by ring around the one holding `coord`,
+        # until no bucket in the next ring can be closer than the best so far.
+        # Ties are broken by insertion order, same as the plain scan.
+        bucket = self._get_bucket(coord)
+        best_key: Tuple[int, int] = None
+        best_coord: Tuple[int, int] = None
+        ring = 0
+        while best_key is None or max(0, (ring - 1) * self._bucket_size + 1) <= best_key[0]:
+            for ring_bucket in self._get_ring_buckets(bucket, ring):
+                for feed_coord, order in self._buckets.get(ring_bucket, {}).items():
+                    key = (self._calculate_distance(feed_coord, coord), order)
+                    if best_key is None or key < best_key:
+                        best_key = key
+                        best_coord = feed_coord
+            ring += 1
+
+        return best_coord
+
     def _calculate_distance(self, pos1: Tuple[int, int], pos2: Tuple[int, int]) -> int:
         """ Calculate Manhatten distance """
         return abs(pos2[0] - pos1[0]) + abs(pos2[1] - pos1[1])
 
+    def _get_bucket(self, coord: Tuple[int, int]) -> Tuple[int, int]:
+        return (coord[0] // self._bucket_size, coord[1] // self._bucket_size)
+
+    def _get_ring_buckets(self, center: Tuple[int, int], ring: int) -> Iterator[Tuple[int, int]]:
+        """ Buckets at Chebyshev distance `ring` from the center bucket """
+        cx, cy = center
+        if ring == 0:
+            yield center
+            return
+
+        for dx in range(-ring, ring + 1):
+            yield (cx + dx, cy - ring)
+            yield (cx + dx, cy + ring)
+        for dy in range(-ring + 1, ring):
+            yield (cx - ring, cy + dy)
+            yield (cx + ring, cy + dy)
+
     def add_feed(self, coord: Tuple[int, int], feed_type: str = 'normal'):
         if coord in self._feeds.keys():
             raise ValueError("Feed already exists at the inserted coordinates")
 
         self._feeds[coord] = Feed(coord=coord, type=feed_type)
+        self._type_counts[feed_type] = self._type_counts.get(feed_type, 0) + 1
+
+        self._buckets.setdefault(self._get_bucket(coord), {})[coord] = self._insertion_count
+        self._insertion_count += 1
+
+        if self._bitboard is not None:
+            self._feed_bits |= self._bitboard.get_bit(coord)
 
     def remove_feed(self, coord: Tuple[int, int]):
         if coord not in self._feeds.keys():
             raise ValueError("No feed exists at the inserted coordinates")
 
-        del self._feeds[coord]
+        feed = self._feeds.pop(coord)
+        self._type_counts[feed.get_type()] -= 1
+
+        bucket = self._get_bucket(coord)
+        del self._buckets[bucket][coord]
+        if not self._buckets[bucket]:
+            del self._buckets[bucket]
+
+        if self._bitboard is not None:
+            self._feed_bits &= ~self._bitboard.get_bit(coord)
 
 class Feed:
     def __init__(self, coord: Tuple[int, int], type: str):
@@ -53,9 +133,9 @@ class Feed:
 
     def get_coord(self) -> Tuple[int, int]:
         return self._coord
-    
+
     def get_type(self) -> str:
         return self._type
 
     def to_list(self) -> List[any]:
-        return [list(self._coord), self._type]
\ No newline at end of file
+        return [list(self._coord), self._type]
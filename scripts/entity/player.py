@@ -1,55 +1,116 @@
 from constants import DIR_OFFSET_DICT
 
-from typing import List, Tuple
+from collections import deque
+from itertools import islice
+
+from typing import List, Tuple, Dict, Deque, Iterator, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from scripts.plugin.bitboard import Bitboard
 
 class Player:
-    def __init__(self, bodies: List[Tuple[int, int]]):
+    def __init__(self, bodies: List[Tuple[int, int]], bitboard: "Bitboard" = None):
         """
         Create Player Class
 
         Args:
             bodies (List[Tuple[int, int]]): initial bodies of the player
+            bitboard (Bitboard): If given, also keep the bodies as a bitboard
         """
-        self._bodies = bodies
+        self._bodies: Deque[Tuple[int, int]] = deque(bodies)
+        # number of body parts on each coord, for O(1) membership test
+        self._occupancy: Dict[Tuple[int, int], int] = {}
+        self._bitboard = bitboard
+        self._body_bits: int = 0
+        for coord in self._bodies:
+            self._occupy(coord)
+
+    def _occupy(self, coord: Tuple[int, int]):
+        count = self._occupancy.get(coord, 0)
+        self._occupancy[coord] = count + 1
+        if not count and self._bitboard is not None:
+            self._body_bits |= self._bitboard.get_bit(coord)
+
+    def _release(self, coord: Tuple[int, int]):
+        count = self._occupancy[coord] - 1
+        if count:
+            self._occupancy[coord] = count
+        else:
+            del self._occupancy[coord]
+            if self._bitboard is not None:
+                self._body_bits ^= self._bitboard.get_bit(coord)
 
     def get_head(self) -> Tuple[int, int]:
         """
         Get player's second first coord
         """
         return self._bodies[0]
-    
+
     def get_neck(self) -> Tuple[int, int]:
         """
         Get player's second body coord
         """
         return self._bodies[1]
-    
+
     def get_tail(self) -> Tuple[int, int]:
         """
         Get player's second last coord
         """
         return self._bodies[-1]
-    
+
     def get_next_head(self, dir: str):
         head = self.get_head()
         dir_offset = DIR_OFFSET_DICT[dir]
 
-        next_head = tuple(head[i] + dir_offset[i] for i in [0, 1])
+        next_head = (head[0] + dir_offset[0], head[1] + dir_offset[1])
 
         return next_head
-    
+
+    def get_length(self) -> int:
+        return len(self._bodies)
+
     def get_bodies(self, start_index: int = 0) -> List[Tuple[int, int]]:
-        return self._bodies[start_index:]
-    
+        return list(islice(self._bodies, start_index, None))
+
+    def get_bodies_from_tail(self) -> Iterator[Tuple[int, int]]:
+        """
+        Iterate player's bodies from the tail to the head, without copying them
+        """
+        return reversed(self._bodies)
+
     def get_bodies_without_tail(self) -> List[Tuple[int, int]]:
-        return self._bodies[:-1]
-    
+        return list(islice(self._bodies, 0, len(self._bodies) - 1))
+
+    def get_body_bits(self) -> int:
+        """
+        Get the bitboard of the bodies, `0` if the player has no bitboard
+        """
+        return self._body_bits
+
+    def is_body(self, coord: Tuple[int, int]) -> bool:
+        """
+        Check if the given coordinate is one of the player's bodies
+        """
+        return coord in self._occupancy
+
+    def is_body_without_tail(self, coord: Tuple[int, int]) -> bool:
+        """
+        Check if the given coordinate is one of the player's bodies,
+        excluding the tail unless another body part is on it.
+        """
+        count = self._occupancy.get(coord, 0)
+        if coord == self._bodies[-1]:
+            count -= 1
+        return count > 0
+
     def add_head(self, coord):
-        self._bodies.insert(0, coord)
+        self._bodies.appendleft(coord)
+        self._occupy(coord)
 
     def add_tail(self, coord):
         self._bodies.append(coord)
+        self._occupy(coord)
 
     def remove_tail(self, num: int = 1):
         for _ in range(num):
-            self._bodies.pop()
\ No newline at end of file
+            self._release(self._bodies.pop())
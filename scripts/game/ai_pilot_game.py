@@ -1,6 +1,7 @@
 import pygame
 
 from scripts.game.base_game import BaseGame
+from scripts.game.headless_pilot_game import learn_on_game_end
 from scripts.ai.base_ai import BaseAI
 
 from constants import *
@@ -11,21 +12,19 @@ from scripts.manager.state_manager import GameState
 
 from typing import Tuple, TYPE_CHECKING
 
-from scripts.ai.q_learning import QLearningAI
-from scripts.ai.dqn import DQNAI
-from scripts.ai.policy_gradient import PolicyGradientAI
-
 if TYPE_CHECKING:
     from scripts.scene.base_scene import BaseScene
 
 class AIPilotGame(BaseGame):
-    def __init__(self, scene: "BaseScene", rect: pygame.Rect, pilot_ai: BaseAI, pilot_ai_name: str, player_move_delay: int, grid_size: Tuple[int, int], feed_amount: int, clear_goal: float):
+    def __init__(self, scene: "BaseScene", rect: pygame.Rect, pilot_ai: BaseAI, pilot_ai_name: str, player_move_delay: int, grid_size: Tuple[int, int], feed_amount: int, clear_goal: float, turbo_time_budget: int = TURBO_TIME_BUDGET):
         super().__init__(scene, rect, player_move_delay, grid_size, feed_amount, clear_goal)
         self.pilot_ai = pilot_ai
         self.pilot_ai_name = pilot_ai_name
 
         self.final_epoch_flag: bool = False  # If `True`, terminate at the current epoch
         self.enable_speed_limit_flag: bool = False  # If `True`, enable speed restriction
+        self.turbo_mode_flag: bool = False  # If `True`, run as many moves as fit in `turbo_time_budget` per frame
+        self.turbo_time_budget: int = turbo_time_budget  # ms
 
         self.save_as_replay: bool = False  # If `True`, save as a replay when the current game ends
 
@@ -46,7 +45,8 @@ class AIPilotGame(BaseGame):
         self.instruction_list = [ # key, act
             ("P", "Pause"),
             ("E", "Set as final epoch"),
-            ("Q", "Enable speed limit")
+            ("Q", "Enable speed limit"),
+            ("T", "Turbo mode")
         ]
 
     def init_paused_layout(self, rect):
@@ -88,20 +88,8 @@ class AIPilotGame(BaseGame):
 
 
     def on_state_changed(self):
-        if self.is_state(GameState.GAMEOVER):
-            if isinstance(self.pilot_ai, QLearningAI):
-                self.pilot_ai.learn(-1, None)
-            elif isinstance(self.pilot_ai, DQNAI):
-                self.pilot_ai.learn(-1, None, True)
-            elif isinstance(self.pilot_ai, PolicyGradientAI):
-                self.pilot_ai.learn(-1, True)
-            self.handle_game_end()
-
-        elif self.is_state(GameState.CLEAR):
-            if isinstance(self.pilot_ai, DQNAI):
-                self.pilot_ai.learn(5, None, True)
-            elif isinstance(self.pilot_ai, PolicyGradientAI):
-                self.pilot_ai.learn(5, True)
+        if self.is_state(GameState.GAMEOVER) or self.is_state(GameState.CLEAR):
+            learn_on_game_end(self.pilot_ai, self.state)
             self.handle_game_end()
 
 
@@ -140,6 +128,16 @@ class AIPilotGame(BaseGame):
         self.start_game()
 
     def update(self):
+        if self.turbo_mode_flag:
+            # the screen is only refreshed once per budget
+            end_ticks = pygame.time.get_ticks() + self.turbo_time_budget
+            while self.is_state(GameState.ACTIVE) and pygame.time.get_ticks() < end_ticks:
+                self.update_step()
+            self.scene.refresh_figure()
+        else:
+            self.update_step()
+
+    def update_step(self):
         super().update()
 
         if self.player is not None and self.is_state(GameState.ACTIVE) and self.next_direction is None:
@@ -156,6 +154,15 @@ class AIPilotGame(BaseGame):
 
     def flip_speed_limit_flag(self):
         self.enable_speed_limit_flag = not self.enable_speed_limit_flag
+        if self.enable_speed_limit_flag:
+            self.turbo_mode_flag = False
+
+    def flip_turbo_mode_flag(self):
+        self.turbo_mode_flag = not self.turbo_mode_flag
+        if self.turbo_mode_flag:
+            self.enable_speed_limit_flag = False
+        else:
+            self.scene.refresh_figure()
 
 
     def update_score(self, amount = 1):
@@ -178,7 +185,10 @@ class AIPilotGame(BaseGame):
             print(f"new game saved: {self.scores["score"]} points on {self.scores["epoch"]} epoch")
             self.save_game()
 
-        self.scene.add_score_to_figure(self.scores["epoch"], self.scores["score"])
+        # redrawing the figure every epoch would eat up the turbo budget
+        self.scene.add_score_to_figure(self.scores["epoch"], self.scores["score"], not self.turbo_mode_flag)
+
+        self.scene.save_ai_checkpoint(self.scores["epoch"])
 
         self.scores["avg_score_last_100"] = self.scene.get_last_average_score_last_100()
         self.scores["overall_avg_score"] = self.scene.get_average_score()
@@ -203,4 +213,6 @@ class AIPilotGame(BaseGame):
             if key == pygame.K_e:
                 self.flip_final_epoch_flag()
             if key == pygame.K_q:
-                self.flip_speed_limit_flag()
\ No newline at end of file
+                self.flip_speed_limit_flag()
+            if key == pygame.K_t:
+                self.flip_turbo_mode_flag()
\ No newline at end of file
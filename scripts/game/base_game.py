@@ -2,16 +2,12 @@ from abc import ABC, abstractmethod
 
 import pygame
 
-import random
-
 from constants import *
 
 from scripts.ui.ui_components import UILayout, RelativeRect, Button, Board, TextBox
 from scripts.ui.map_structure import Map
 from scripts.ui.instruction import Instruction
-from scripts.entity.player import Player
-from scripts.entity.feed_system import FeedSystem
-from scripts.manager.cell_manager import CellManager
+from scripts.game.snake_simulation import SnakeSimulation, GameSnapshot
 
 from scripts.manager.state_manager import GameState
 from scripts.render.render import GameRenderer
@@ -20,7 +16,10 @@ from typing import List, Tuple, Dict, TYPE_CHECKING
 
 if TYPE_CHECKING:
     from scripts.scene.base_scene import BaseScene
-    from scripts.entity.feed_system import Feed
+    from scripts.entity.player import Player
+    from scripts.entity.feed_system import FeedSystem
+    from scripts.manager.cell_manager import CellManager
+    from scripts.plugin.bitboard import Bitboard
 
 class BaseGame(ABC):
     def __init__(self, scene: "BaseScene", rect: pygame.Rect, player_move_delay: int, grid_size: Tuple[int, int], feed_amount: int, clear_goal: float):
@@ -34,15 +33,14 @@ class BaseGame(ABC):
         self.player_move_delay = player_move_delay
         self.grid_size = grid_size
         self.feed_amount = feed_amount
-        self.clear_condition: int = round(self.grid_size[0] * self.grid_size[1] * clear_goal) - INIT_LENGTH
+
+        # rules of the game, this class only draws and controls it
+        self.sim = SnakeSimulation(grid_size, feed_amount, clear_goal)
 
         self.surf = pygame.Surface(self.size)
 
         self.map: Map = None
         self.map_surface: pygame.Surface = None
-        self.player: Player = None
-        self.fs: FeedSystem = None
-        self.cell_manager: CellManager = None
 
         self.score_info_list: List[Tuple[str, str, str]] = [] # key, title, content format
         self.instruction_list: List[Tuple[str, str]] = [] # key, act
@@ -62,7 +60,6 @@ class BaseGame(ABC):
         self.state: GameState = None
 
         self.move_accum: int = 0
-        self.direction: str = 'E'
         self.next_direction: str = None  # use for ai pilot game
 
     @abstractmethod
@@ -172,6 +169,32 @@ class BaseGame(ABC):
         pass
 
 
+    # about simulation
+    @property
+    def player(self) -> "Player":
+        return self.sim.player
+
+    @property
+    def fs(self) -> "FeedSystem":
+        return self.sim.fs
+
+    @property
+    def cell_manager(self) -> "CellManager":
+        return self.sim.cell_manager
+
+    @property
+    def bitboard(self) -> "Bitboard":
+        return self.sim.bitboard
+
+    @property
+    def clear_condition(self) -> int:
+        return self.sim.clear_condition
+
+    @property
+    def direction(self) -> str:
+        return self.sim.direction
+
+
     # about getter
     def get_state_layout_rect(self):
         return RelativeRect(0, 0.3, 1, 0.35).to_absolute(self.rect.size)
@@ -183,7 +206,10 @@ class BaseGame(ABC):
         return self.state == state
 
     def is_in_bound(self, coord) -> bool:
-        return self.map.is_inside(coord)
+        return self.sim.is_in_bound(coord)
+
+    def get_moves_until_free(self, coord) -> int:
+        return self.sim.get_moves_until_free(coord)
 
     @abstractmethod
     def is_on_move(self) -> bool:
@@ -200,10 +226,20 @@ class BaseGame(ABC):
 
     # about progress
     def start_game(self):
-        self.cell_manager = CellManager(self.grid_size)
-        self.player = Player(self.create_random_bodies(INIT_LENGTH))
-        self.fs = FeedSystem()
-        self.add_feed_random_coord(self.feed_amount)
+        self.sim.reset()
+
+    def snapshot(self) -> GameSnapshot:
+        snapshot = self.sim.snapshot()
+        snapshot.scores = self.scores.copy()
+        return snapshot
+
+    def restore(self, snapshot: GameSnapshot):
+        self.sim.restore(snapshot)
+        self.state = snapshot.state  # no hooking, a restored game over is not a new one
+        if snapshot.scores is not None:
+            self.scores.update(snapshot.scores)
+            for key, _, _ in self.score_info_list:
+                self.renderer.update_board_content(key, self.scores[key])
 
     def start_countdown(self, count_ms: int = 3000):
         self.set_state(GameState.COUNTDOWN)
@@ -251,124 +287,26 @@ class BaseGame(ABC):
 
     # about game logic
     ## about player logic
-    def create_random_bodies(self, length: int) -> List[Tuple[int, int]]:
-        grid_num = self.cell_manager.get_grid_size()
-        rand_coord = (random.randint(0, grid_num[0] - 1), random.randint(0, grid_num[1] - 1))
-        ret = [rand_coord]
-        self.cell_manager.mark_cell_used(rand_coord)
-
-        dirs = ['E', 'W', 'S', 'N']
-        for _ in range(length - 1):
-            prev_body_coord = ret[-1]
-            dirs_copy = dirs.copy()
-            while True:
-                dir = dirs_copy[random.randint(0, len(dirs_copy) - 1)]
-                dir_offset = DIR_OFFSET_DICT[dir]
-                body_coord = (prev_body_coord[0] + dir_offset[0], prev_body_coord[1] + dir_offset[1])
-                # validation
-                if self.is_in_bound(body_coord) and body_coord not in ret:
-                    ret.append(body_coord)
-                    self.cell_manager.mark_cell_used(body_coord)
-
-                    # set the player's initial direction to
-                    #  the opposite direction of the second body part
-                    if self.direction == None:
-                        if dir == 'E':
-                            self.direction = 'W'
-                        elif dir == 'W':
-                            self.direction = 'E'
-                        elif dir == 'S':
-                            self.direction = 'N'
-                        else:
-                            self.direction = 'S'
-
-                    break
-                else:
-                    dirs_copy.remove(dir)
-
-        return ret
-
     def set_direction(self, dir: str, with_validate: bool = True):
-        if dir not in DIR_OFFSET_DICT:
-            raise ValueError("parameter(dir) must be the one of [EWSN]")
-
-        if with_validate and not self.validate_direction(dir):
-            return
-
-        self.direction = dir
+        self.sim.set_direction(dir, with_validate)
 
     def validate_direction(self, dir: str) -> bool:
-        next_head = self.player.get_next_head(dir)
-        neck = self.player.get_neck()
-
-        # restrict movement towards walls or the neck direction
-        return self.is_in_bound(next_head) and next_head != neck
+        return self.sim.validate_direction(dir)
 
     def is_player_body_collision(self, coord: Tuple[int, int]) -> bool:
-        """
-        Check if the given coordinate collides with the player's body
-        (excluding the tail).
-        """
-        return coord in self.player.get_bodies_without_tail()
+        return self.sim.is_player_body_collision(coord)
 
     def move_player(self):
-        tail = self.player.get_tail()
-        next_head = self.player.get_next_head(self.direction)
-
-        collision = self.check_collision(next_head)
+        collision, feed = self.sim.step()
         # game over when colliding with walls or the player's own body
-        if collision[0] in ['wall', 'body']:
+        if collision in ['wall', 'body']:
             self.set_state(GameState.GAMEOVER)
-        elif collision[0] == 'feed':
-            curr_feed = collision[1]
-            self.eat_feed(next_head, curr_feed)
-        else:
-            self.basic_movement(next_head, tail)
-
-    def eat_feed(self, new_head: Tuple[int, int], feed: "Feed"):
-        self.player.add_head(new_head)
-        self.fs.remove_feed(feed.get_coord())
-
-        if feed.get_type() == 'normal':
+        elif collision == 'feed' and feed.get_type() == 'normal':
             self.update_score(1)
 
-        # If no feed exists, generate
-        if self.is_state(GameState.ACTIVE) and self.fs.is_feed_empty(feed.get_type()):
-            self.add_feed_random_coord(self.feed_amount, feed.get_type())
-
-    def basic_movement(self, next_head: Tuple[int, int], tail: Tuple[int, int]):
-        self.player.add_head(next_head)
-        self.cell_manager.mark_cell_used(next_head)
-
-        self.player.remove_tail()
-        self.cell_manager.mark_cell_free(tail)
-
-
-    ## about feed system logic
-    def add_feed(self, coord: Tuple[int, int], feed_type: str = 'normal'):
-        self.fs.add_feed(coord, feed_type)
-        self.cell_manager.mark_cell_used(coord)
-
-    def add_feed_random_coord(self, k: int, feed_type: str = 'normal'):
-        if k < 1:
-            return
-
-        random_cell_coords = self.cell_manager.get_random_available_cells(k)
-
-        for rand_coord in random_cell_coords:
-            self.add_feed(rand_coord, feed_type)
-
     ## about coordinate system
     def check_collision(self, coord):
-        if not self.is_in_bound(coord):
-            return 'wall', None
-        # 'body' collision is not valid for tail
-        if self.is_player_body_collision(coord):
-            return 'body', None
-        if self.fs.is_feed_exist(coord):
-            feed = self.fs.get_feed(coord)
-            return 'feed', feed
-        return 'none', None
+        return self.sim.check_collision(coord)
 
     ## about game flow
     def update_score(self, amount: int = 1):
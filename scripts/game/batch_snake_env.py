@@ -0,0 +1,238 @@
+import numpy as np
+
+from scripts.ai.feature_extractor import FeatureExtractor
+
+from constants import DIR_OFFSET_DICT, INIT_LENGTH, OBJECT_DICT
+
+from typing import List, Tuple
+
+NONE_CELL = OBJECT_DICT['none']
+WALL_CELL = OBJECT_DICT['wall']
+BODY_CELL = OBJECT_DICT['body']
+FEED_CELL = OBJECT_DICT['feed']
+
+DIR_LIST = list(DIR_OFFSET_DICT.keys())  # ['E', 'W', 'S', 'N'], index is used as action
+DIR_DX = np.array([offset[0] for offset in DIR_OFFSET_DICT.values()], dtype=np.int64)
+DIR_DY = np.array([offset[1] for offset in DIR_OFFSET_DICT.values()], dtype=np.int64)
+OPPOSITE_DIR_INDEX = np.array([DIR_LIST.index(dir) for dir in ['W', 'E', 'N', 'S']], dtype=np.int64)
+
+class BatchSnakeEnv:
+    """
+    Steps `num_envs` independent games in lockstep.
+    Follows the same rules as `SnakeSimulation`, but bodies, occupancy grids,
+    feeds and scores are kept in preallocated NumPy arrays and every move is
+    computed for all games at once.
+
+    A cell is addressed by its flat index `y * width + x`.
+    Each body is a ring buffer whose head is at `head_ptrs` and whose tail
+    is `lengths - 1` slots behind it.
+    """
+    def __init__(self, num_envs: int, grid_size: Tuple[int, int], feed_amount: int, clear_goal: float, init_length: int = INIT_LENGTH, seed: int = None):
+        """
+        Create BatchSnakeEnv Class
+
+        Args:
+            num_envs (int): Number of games stepped together.
+            grid_size (Tuple[int, int]): Size of the grid as (width, height).
+            feed_amount (int): Number of feeds spawned at once.
+            clear_goal (float): Ratio of the grid to be filled to clear the game.
+            init_length (int): Initial length of the player.
+            seed (int): Seed of the random generator. `None` for a random seed.
+        """
+        self.num_envs = num_envs
+        self.grid_size = grid_size
+        self.width, self.height = grid_size
+        self.area = self.width * self.height
+        self.feed_amount = min(feed_amount, self.area)
+        self.init_length = init_length
+        self.clear_condition: int = round(self.area * clear_goal) - init_length
+
+        self.rng = np.random.default_rng(seed)
+
+        self.env_indices = np.arange(num_envs)
+
+        self.grids = np.zeros((num_envs, self.area), dtype=np.int8)
+        self.bodies = np.zeros((num_envs, self.area), dtype=np.int64)
+        self.head_ptrs = np.zeros(num_envs, dtype=np.int64)
+        self.lengths = np.zeros(num_envs, dtype=np.int64)
+        self.directions = np.zeros(num_envs, dtype=np.int64)
+        self.feeds = np.full((num_envs, self.feed_amount), -1, dtype=np.int64)
+        self.feed_counts = np.zeros(num_envs, dtype=np.int64)
+        self.scores = np.zeros(num_envs, dtype=np.int64)
+        self.move_counts = np.zeros(num_envs, dtype=np.int64)
+        self.dones = np.zeros(num_envs, dtype=bool)
+        self.clears = np.zeros(num_envs, dtype=bool)
+
+        self.feature_extractor = FeatureExtractor(batch_size=num_envs)
+
+    def reset(self, seed: int = None) -> np.ndarray:
+        """
+        Start new games on every env.
+
+        Returns:
+            np.ndarray: States of all games, same as `get_states()`.
+        """
+        if seed is not None:
+            self.rng = np.random.default_rng(seed)
+
+        self.reset_envs(self.env_indices)
+
+        return self.get_states()
+
+    def reset_done(self) -> np.ndarray:
+        """
+        Start new games on the envs whose game is over or cleared.
+
+        Returns:
+            np.ndarray: Indices of the envs that were reset.
+        """
+        done_envs = np.flatnonzero(self.dones)
+        self.reset_envs(done_envs)
+
+        return done_envs
+
+    def reset_envs(self, envs: np.ndarray):
+        if len(envs) == 0:
+            return
+
+        self.grids[envs] = NONE_CELL
+        self.feeds[envs] = -1
+        self.feed_counts[envs] = 0
+        self.scores[envs] = 0
+        self.move_counts[envs] = 0
+        self.dones[envs] = False
+        self.clears[envs] = False
+
+        for env in envs:
+            self.create_random_bodies(env)
+
+        self.add_feed_random_cells(envs)
+
+    def step(self, actions) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Move the player of every running game by one cell.
+        Finished games are left untouched until they are reset.
+
+        Args:
+            actions: Direction index per game, following the order of `DIR_OFFSET_DICT`.
+                Negative values keep the current direction.
+
+        Returns:
+            Tuple[np.ndarray, np.ndarray]: Score gained by this move and done flag, per game.
+        """
+        actions = np.asarray(actions, dtype=np.int64)
+        active = ~self.dones
+
+        self.directions = np.where(active & (actions >= 0), actions, self.directions)
+
+        heads = self.get_heads()
+        tails = self.get_tails()
+        next_x = heads % self.width + DIR_DX[self.directions]
+        next_y = heads // self.width + DIR_DY[self.directions]
+
+        walls = (next_x < 0) | (next_x >= self.width) | (next_y < 0) | (next_y >= self.height)
+        next_heads = np.where(walls, 0, next_y * self.width + next_x)
+        cells = self.grids[self.env_indices, next_heads]
+
+        # 'body' collision is not valid for tail
+        body_hits = ~walls & (cells == BODY_CELL) & (next_heads != tails)
+        moves = active & ~walls & ~body_hits
+        eats = moves & (cells == FEED_CELL)
+        plains = moves & ~eats
+
+        # free the tail first, the head may move into the cell it leaves
+        self.grids[self.env_indices[plains], tails[plains]] = NONE_CELL
+
+        move_envs = self.env_indices[moves]
+        self.head_ptrs[move_envs] = (self.head_ptrs[move_envs] + 1) % self.area
+        self.bodies[move_envs, self.head_ptrs[move_envs]] = next_heads[move_envs]
+        self.grids[move_envs, next_heads[move_envs]] = BODY_CELL
+        self.move_counts[active] += 1
+
+        eat_envs = self.env_indices[eats]
+        self.lengths[eat_envs] += 1
+        self.scores[eat_envs] += 1
+        eaten_slots = self.feeds[eat_envs] == next_heads[eat_envs, None]
+        self.feeds[eat_envs] = np.where(eaten_slots, -1, self.feeds[eat_envs])
+        self.feed_counts[eat_envs] -= 1
+
+        clears = eats & (self.scores >= self.clear_condition)
+        self.clears |= clears
+        self.dones |= (active & ~moves) | clears
+
+        # If no feed exists, generate
+        self.add_feed_random_cells(self.env_indices[eats & ~clears & (self.feed_counts == 0)])
+
+        return eats.astype(np.int64), self.dones.copy()
+
+
+    # about getter
+    def get_heads(self) -> np.ndarray:
+        return self.bodies[self.env_indices, self.head_ptrs]
+
+    def get_tails(self) -> np.ndarray:
+        return self.bodies[self.env_indices, (self.head_ptrs - self.lengths + 1) % self.area]
+
+    def get_bodies(self, env: int) -> List[Tuple[int, int]]:
+        """
+        Get the body coords of a game, from head to tail
+        """
+        ptrs = (self.head_ptrs[env] - np.arange(self.lengths[env])) % self.area
+        return [(int(cell % self.width), int(cell // self.width)) for cell in self.bodies[env, ptrs]]
+
+    def get_feed_coords(self, env: int) -> List[Tuple[int, int]]:
+        return [(int(cell % self.width), int(cell // self.width)) for cell in self.feeds[env] if cell >= 0]
+
+    def get_states(self) -> np.ndarray:
+        """
+        Get the state of every game used by the learned pilots, see `FeatureExtractor`
+
+        Returns:
+            np.ndarray: States of shape (num_envs, 11). The buffer is reused on the next call.
+        """
+        return self.feature_extractor.extract_batch(self.grid_size, self.get_heads(), self.get_tails(), self.lengths, self.grids, self.feeds)
+
+
+    # about player logic
+    def create_random_bodies(self, env: int):
+        head = (int(self.rng.integers(self.width)), int(self.rng.integers(self.height)))
+        coords = [head]
+
+        for idx in range(self.init_length - 1):
+            prev_x, prev_y = coords[-1]
+            valid_dirs = [dir_index for dir_index in range(len(DIR_LIST))
+                          if 0 <= prev_x + DIR_DX[dir_index] < self.width
+                          and 0 <= prev_y + DIR_DY[dir_index] < self.height
+                          and (prev_x + DIR_DX[dir_index], prev_y + DIR_DY[dir_index]) not in coords]
+            dir_index = valid_dirs[self.rng.integers(len(valid_dirs))]
+            coords.append((prev_x + int(DIR_DX[dir_index]), prev_y + int(DIR_DY[dir_index])))
+
+            # set the player's initial direction to
+            #  the opposite direction of the second body part
+            if idx == 0:
+                self.directions[env] = OPPOSITE_DIR_INDEX[dir_index]
+
+        cells = [y * self.width + x for x, y in reversed(coords)]  # tail first
+        self.bodies[env, :len(cells)] = cells
+        self.head_ptrs[env] = len(cells) - 1
+        self.lengths[env] = len(cells)
+        self.grids[env, cells] = BODY_CELL
+
+
+    # about feed system logic
+    def add_feed_random_cells(self, envs: np.ndarray):
+        """
+        Fill every feed slot of the given envs with distinct random free cells.
+        """
+        if len(envs) == 0 or self.feed_amount < 1:
+            return
+
+        # the `feed_amount` smallest random keys among free cells form a uniform sample
+        keys = self.rng.random((len(envs), self.area))
+        keys[self.grids[envs] != NONE_CELL] = np.inf
+        picks = np.argpartition(keys, self.feed_amount - 1, axis=1)[:, :self.feed_amount]
+        valid = np.isfinite(np.take_along_axis(keys, picks, axis=1))
+
+        self.feeds[envs] = np.where(valid, picks, -1)
+        self.feed_counts[envs] = valid.sum(axis=1)
+        self.grids[np.repeat(envs, self.feed_amount)[valid.ravel()], picks[valid]] = FEED_CELL
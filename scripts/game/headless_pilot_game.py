@@ -0,0 +1,131 @@
+import time
+
+from scripts.game.snake_simulation import SnakeSimulation
+from scripts.ai.base_ai import BaseAI
+
+from scripts.manager.state_manager import GameState
+
+from scripts.ai.q_learning import QLearningAI
+from scripts.ai.dqn import DQNAI
+from scripts.ai.policy_gradient import PolicyGradientAI
+
+from typing import Tuple, Dict, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from scripts.entity.player import Player
+    from scripts.entity.feed_system import FeedSystem
+    from scripts.manager.cell_manager import CellManager
+    from scripts.plugin.bitboard import Bitboard
+
+def learn_on_game_end(pilot_ai: BaseAI, state: GameState):
+    """
+    Give the final reward of a game to the learned pilots
+    """
+    if state == GameState.GAMEOVER:
+        if isinstance(pilot_ai, QLearningAI):
+            pilot_ai.learn(-1, None)
+        elif isinstance(pilot_ai, DQNAI):
+            pilot_ai.learn(-1, None, True)
+        elif isinstance(pilot_ai, PolicyGradientAI):
+            pilot_ai.learn(-1, True)
+
+    elif state == GameState.CLEAR:
+        if isinstance(pilot_ai, DQNAI):
+            pilot_ai.learn(5, None, True)
+        elif isinstance(pilot_ai, PolicyGradientAI):
+            pilot_ai.learn(5, True)
+
+class HeadlessPilotGame:
+    """
+    AIPilotGame without pygame.
+    Lets the pilot AI play on a SnakeSimulation as fast as it can decide,
+    with the same learning hooks on game end.
+    """
+    def __init__(self, pilot_ai: BaseAI, grid_size: Tuple[int, int], feed_amount: int, clear_goal: float, seed: int = None, stall_limit: int = None):
+        """
+        Create HeadlessPilotGame Class
+
+        Args:
+            pilot_ai (BaseAI): AI deciding every move.
+            grid_size (Tuple[int, int]): Size of the grid as (width, height).
+            feed_amount (int): Number of feeds spawned at once.
+            clear_goal (float): Ratio of the grid to be filled to clear the game.
+            seed (int): Seed of the simulation. `None` for a random seed.
+            stall_limit (int): Moves allowed without eating before the game is over,
+                so looping pilots cannot run forever. Defaults to 4 times the grid area.
+        """
+        self.sim = SnakeSimulation(grid_size, feed_amount, clear_goal, seed=seed)
+        self.grid_size = grid_size
+        self.stall_limit = stall_limit if stall_limit is not None else grid_size[0] * grid_size[1] * 4
+
+        self.scores: Dict[str, any] = {"score": 0}
+
+        # if set to a list, `play_episode()` appends the time of every decision in ns (used by benchmarks)
+        self.decision_times: List[int] = None
+
+        self.pilot_ai = pilot_ai
+        self.pilot_ai.set_current_game(self)
+
+
+    # same interface as BaseGame, used by the pilot AIs
+    @property
+    def player(self) -> "Player":
+        return self.sim.player
+
+    @property
+    def fs(self) -> "FeedSystem":
+        return self.sim.fs
+
+    @property
+    def cell_manager(self) -> "CellManager":
+        return self.sim.cell_manager
+
+    @property
+    def bitboard(self) -> "Bitboard":
+        return self.sim.bitboard
+
+    def is_in_bound(self, coord) -> bool:
+        return self.sim.is_in_bound(coord)
+
+    def get_moves_until_free(self, coord) -> int:
+        return self.sim.get_moves_until_free(coord)
+
+    def check_collision(self, coord):
+        return self.sim.check_collision(coord)
+
+
+    def play_episode(self, seed: int = None) -> int:
+        """
+        Play a game until it is over or cleared.
+
+        Args:
+            seed (int): Reseed the simulation before the game if given.
+
+        Returns:
+            int: Final score of the game.
+        """
+        self.sim.reset(seed)
+        self.scores["score"] = 0
+
+        stall = 0
+        while not self.sim.is_done() and stall < self.stall_limit:
+            if self.decision_times is None:
+                direction = self.pilot_ai.decide_direction()
+            else:
+                start_time = time.perf_counter_ns()
+                direction = self.pilot_ai.decide_direction()
+                self.decision_times.append(time.perf_counter_ns() - start_time)
+            if direction == "surrender":  # Maintain previous movement upon surrender
+                direction = None
+
+            collision, _ = self.sim.step(direction)
+            self.scores["score"] = self.sim.score
+
+            stall = 0 if collision == 'feed' else stall + 1
+
+        if not self.sim.is_done():  # stalled
+            self.sim.state = GameState.GAMEOVER
+
+        learn_on_game_end(self.pilot_ai, self.sim.state)
+
+        return self.sim.score
@@ -0,0 +1,138 @@
+import gym
+from gym import spaces
+import numpy as np
+
+from functools import partial
+
+from constants import DIR_OFFSET_DICT, OBJECT_DICT
+
+from scripts.game.snake_simulation import SnakeSimulation
+from scripts.ai.feature_extractor import FeatureExtractor
+from scripts.manager.state_manager import GameState
+
+from typing import Tuple, Dict
+
+class SnakeEnv(gym.Env):
+    """
+    Gym (0.26 API) environment over SnakeSimulation.
+
+    Actions are direction indices in the order of `DIR_OFFSET_DICT`.
+    Observations are either the 11-dim state used by the learned pilots ("features"),
+    or the grid filled with `OBJECT_DICT` codes ("grid").
+    """
+    metadata = {"render_modes": ["ansi"]}
+
+    feed_reward: float = 1.0
+    gameover_reward: float = -1.0
+    clear_reward: float = 5.0
+
+    def __init__(self, grid_size: Tuple[int, int] = (10, 10), feed_amount: int = 3, clear_goal: float = 0.75, obs_type: str = "features", stall_limit: int = None, render_mode: str = None):
+        """
+        Create SnakeEnv Class
+
+        Args:
+            grid_size (Tuple[int, int]): Size of the grid as (width, height).
+            feed_amount (int): Number of feeds spawned at once.
+            clear_goal (float): Ratio of the grid to be filled to clear the game.
+            obs_type (str): "features" or "grid".
+            stall_limit (int): Moves allowed without eating before the episode is truncated.
+                Defaults to 4 times the grid area.
+            render_mode (str): `None` or "ansi".
+        """
+        if obs_type not in ["features", "grid"]:
+            raise ValueError("parameter(obs_type) must be the one of ['features', 'grid']")
+
+        self.grid_size = tuple(grid_size)
+        self.obs_type = obs_type
+        self.stall_limit = stall_limit if stall_limit is not None else self.grid_size[0] * self.grid_size[1] * 4
+        self.render_mode = render_mode
+
+        self.sim = SnakeSimulation(self.grid_size, feed_amount, clear_goal)
+        self.feature_extractor = FeatureExtractor()
+        self.actions = list(DIR_OFFSET_DICT.keys())
+        self.stall = 0
+
+        self.action_space = spaces.Discrete(len(self.actions))
+        if obs_type == "features":
+            self.observation_space = spaces.Box(-np.inf, np.inf, shape=(11,), dtype=np.float32)
+        else:
+            self.observation_space = spaces.Box(0, max(OBJECT_DICT.values()), shape=(self.grid_size[1], self.grid_size[0]), dtype=np.int8)
+
+    def reset(self, *, seed: int = None, options: dict = None) -> Tuple[np.ndarray, Dict[str, any]]:
+        super().reset(seed=seed)
+
+        self.sim.reset(seed)
+        self.stall = 0
+
+        return self.get_observation(), self.get_info()
+
+    def step(self, action: int) -> Tuple[np.ndarray, float, bool, bool, Dict[str, any]]:
+        collision, feed = self.sim.step(self.actions[int(action)])
+
+        reward = 0.0
+        if collision == 'feed':
+            self.stall = 0
+            if feed.get_type() == 'normal':
+                reward += self.feed_reward
+        else:
+            self.stall += 1
+
+        if self.sim.is_state(GameState.GAMEOVER):
+            reward += self.gameover_reward
+        elif self.sim.is_state(GameState.CLEAR):
+            reward += self.clear_reward
+
+        terminated = self.sim.is_done()
+        truncated = not terminated and self.stall >= self.stall_limit
+
+        return self.get_observation(), reward, terminated, truncated, self.get_info()
+
+    def render(self):
+        if self.render_mode == "ansi":
+            chars = {OBJECT_DICT['none']: '.', OBJECT_DICT['body']: 'o', OBJECT_DICT['feed']: '*'}
+            grid = self.get_grid()
+            head = self.sim.player.get_head()
+            rows = [[chars[cell] for cell in row] for row in grid]
+            rows[head[1]][head[0]] = '@'
+            return "\n".join("".join(row) for row in rows)
+
+
+    # about observation
+    def get_info(self) -> Dict[str, any]:
+        return {"score": self.sim.score, "clear": self.sim.is_state(GameState.CLEAR)}
+
+    def get_observation(self) -> np.ndarray:
+        if self.obs_type == "features":
+            return self.get_features()
+        return self.get_grid()
+
+    def get_grid(self) -> np.ndarray:
+        grid = np.zeros((self.grid_size[1], self.grid_size[0]), dtype=np.int8)
+        for x, y in self.sim.player.get_bodies():
+            grid[y, x] = OBJECT_DICT['body']
+        for feed in self.sim.fs.get_feeds():
+            x, y = feed.get_coord()
+            grid[y, x] = OBJECT_DICT['feed']
+        return grid
+
+    def get_features(self) -> np.ndarray:
+        """
+        Same 11-dim state as DQNAI and PolicyGradientAI
+        """
+        return self.feature_extractor.extract(self.sim, np.zeros(self.feature_extractor.size, dtype=np.float32))
+
+def make_vector_env(num_envs: int, asynchronous: bool = True, **env_kwargs) -> gym.vector.VectorEnv:
+    """
+    Create `num_envs` SnakeEnvs stepped together.
+
+    Args:
+        num_envs (int): Number of sub-environments.
+        asynchronous (bool): Run each sub-environment in its own process,
+            with observations passed through shared memory.
+        **env_kwargs: Arguments of `SnakeEnv`.
+    """
+    env_fns = [partial(SnakeEnv, **env_kwargs) for _ in range(num_envs)]
+
+    if asynchronous:
+        return gym.vector.AsyncVectorEnv(env_fns, shared_memory=True)
+    return gym.vector.SyncVectorEnv(env_fns)
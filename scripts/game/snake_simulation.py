@@ -0,0 +1,301 @@
+import random
+
+from constants import DIR_OFFSET_DICT, INIT_LENGTH
+
+from scripts.entity.player import Player
+from scripts.entity.feed_system import FeedSystem
+from scripts.manager.cell_manager import CellManager
+from scripts.plugin.bitboard import Bitboard
+
+from scripts.manager.state_manager import GameState
+
+from typing import List, Tuple, Dict, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from scripts.entity.feed_system import Feed
+
+OPPOSITE_DIR_DICT = {
+    'E': 'W',
+    'W': 'E',
+    'S': 'N',
+    'N': 'S'
+}
+
+class GameSnapshot:
+    """
+    Immutable copy of everything needed to continue a game from a given move,
+    including the random state, so restored games spawn the same feeds.
+    """
+    __slots__ = ("bodies", "direction", "feeds", "available_cells", "score", "move_count", "state", "rng_state", "scores")
+
+    def __init__(self, bodies: Tuple[Tuple[int, int], ...], direction: str, feeds: Tuple[Tuple[Tuple[int, int], str], ...], available_cells: Tuple[Tuple[int, int], ...], score: int, move_count: int, state: GameState, rng_state: tuple, scores: Dict[str, any] = None):
+        self.bodies = bodies
+        self.direction = direction
+        self.feeds = feeds  # (coord, type) in insertion order
+        self.available_cells = available_cells  # in free-list order
+        self.score = score
+        self.move_count = move_count
+        self.state = state
+        self.rng_state = rng_state
+        self.scores = scores  # score boards of the game view, if any
+
+class SnakeSimulation:
+    """
+    Headless snake rules engine.
+    Owns the player, feeds and cells without importing pygame,
+    so games can be stepped without any surface or layout.
+    """
+    def __init__(self, grid_size: Tuple[int, int], feed_amount: int, clear_goal: float, init_length: int = INIT_LENGTH, seed: int = None):
+        """
+        Create SnakeSimulation Class
+
+        Args:
+            grid_size (Tuple[int, int]): Size of the grid as (width, height).
+            feed_amount (int): Number of feeds spawned at once.
+            clear_goal (float): Ratio of the grid to be filled to clear the game.
+            init_length (int): Initial length of the player.
+            seed (int): Seed of the random generator. `None` for a random seed.
+        """
+        self.grid_size = grid_size
+        self.feed_amount = feed_amount
+        self.clear_goal = clear_goal
+        self.init_length = init_length
+        self.clear_condition: int = round(grid_size[0] * grid_size[1] * clear_goal) - init_length
+
+        self.rng = random.Random(seed)
+
+        # bodies and feeds are mirrored as bitboards for bitwise collision and flood fill
+        self.bitboard = Bitboard(grid_size)
+
+        self.player: Player = None
+        self.fs: FeedSystem = None
+        self.cell_manager: CellManager = None
+
+        self.state: GameState = None
+        self.direction: str = None
+        self.score: int = 0
+        self.move_count: int = 0
+
+    def reset(self, seed: int = None):
+        """
+        Start a new game.
+
+        Args:
+            seed (int): Reseed the random generator if given,
+                otherwise continue the current random sequence.
+        """
+        if seed is not None:
+            self.rng.seed(seed)
+
+        self.cell_manager = CellManager(self.grid_size, rng=self.rng)
+        self.direction = None
+        self.player = Player(self.create_random_bodies(self.init_length), self.bitboard)
+        self.push_player_bodies()
+        self.fs = FeedSystem(bitboard=self.bitboard)
+
+        self.score = 0
+        self.move_count = 0
+        self.state = GameState.ACTIVE
+
+        self.add_feed_random_coord(self.feed_amount)
+
+    def step(self, action: str = None) -> Tuple[str, "Feed"]:
+        """
+        Move the player by one cell.
+
+        Args:
+            action (str): Direction to move to, one of [EWSN].
+                `None` keeps the current direction.
+
+        Returns:
+            Tuple[str, Feed]: Collision result of the move, same as `check_collision()`.
+        """
+        if not self.is_state(GameState.ACTIVE):
+            raise RuntimeError(f"Invalid GameState on `step()`: {self.state}")
+
+        if action is not None:
+            self.set_direction(action, False)
+
+        self.move_count += 1
+        return self.move_player()
+
+    def snapshot(self) -> GameSnapshot:
+        return GameSnapshot(
+            bodies=tuple(self.player.get_bodies()),
+            direction=self.direction,
+            feeds=tuple((feed.get_coord(), feed.get_type()) for feed in self.fs.get_feeds()),
+            available_cells=tuple(self.cell_manager.available_cells),
+            score=self.score,
+            move_count=self.move_count,
+            state=self.state,
+            rng_state=self.rng.getstate()
+        )
+
+    def restore(self, snapshot: GameSnapshot):
+        self.player = Player(snapshot.bodies, self.bitboard)
+        self.fs = FeedSystem(bitboard=self.bitboard)
+        for coord, feed_type in snapshot.feeds:
+            self.fs.add_feed(coord, feed_type)
+        self.cell_manager = CellManager(self.grid_size, rng=self.rng, available_cells=snapshot.available_cells)
+        self.push_player_bodies()
+
+        self.direction = snapshot.direction
+        self.score = snapshot.score
+        self.move_count = snapshot.move_count
+        self.state = snapshot.state
+        self.rng.setstate(snapshot.rng_state)
+
+    def clone(self) -> "SnakeSimulation":
+        """
+        Get an independent copy of this game, e.g. for lookahead or rollouts
+        """
+        other = SnakeSimulation(self.grid_size, self.feed_amount, self.clear_goal, self.init_length)
+        other.clear_condition = self.clear_condition
+        other.restore(self.snapshot())
+        return other
+
+
+    # about getter
+    def is_state(self, state: GameState) -> bool:
+        return self.state == state
+
+    def is_done(self) -> bool:
+        return self.state in [GameState.GAMEOVER, GameState.CLEAR]
+
+    def is_in_bound(self, coord: Tuple[int, int]) -> bool:
+        return (0 <= coord[0] < self.grid_size[0]) and (0 <= coord[1] < self.grid_size[1])
+
+
+    # about player logic
+    def create_random_bodies(self, length: int) -> List[Tuple[int, int]]:
+        grid_num = self.cell_manager.get_grid_size()
+        rand_coord = (self.rng.randint(0, grid_num[0] - 1), self.rng.randint(0, grid_num[1] - 1))
+        ret = [rand_coord]
+        self.cell_manager.mark_cell_used(rand_coord)
+
+        dirs = ['E', 'W', 'S', 'N']
+        for _ in range(length - 1):
+            prev_body_coord = ret[-1]
+            dirs_copy = dirs.copy()
+            while True:
+                dir = dirs_copy[self.rng.randint(0, len(dirs_copy) - 1)]
+                dir_offset = DIR_OFFSET_DICT[dir]
+                body_coord = (prev_body_coord[0] + dir_offset[0], prev_body_coord[1] + dir_offset[1])
+                # validation
+                if self.is_in_bound(body_coord) and body_coord not in ret:
+                    ret.append(body_coord)
+                    self.cell_manager.mark_cell_used(body_coord)
+
+                    # set the player's initial direction to
+                    #  the opposite direction of the second body part
+                    if self.direction is None:
+                        self.direction = OPPOSITE_DIR_DICT[dir]
+
+                    break
+                else:
+                    dirs_copy.remove(dir)
+
+        return ret
+
+    def push_player_bodies(self):
+        """
+        Register the player's bodies on the body-expiry grid, from the tail to the head
+        """
+        for coord in reversed(self.player.get_bodies()):
+            self.cell_manager.push_body(coord)
+
+    def get_moves_until_free(self, coord: Tuple[int, int]) -> int:
+        """
+        Get in how many moves the cell is left by the player's body, `0` if it is not a body.
+        Assumes no feed is eaten meanwhile, so it is a lower bound.
+        """
+        return self.cell_manager.get_moves_until_free(coord)
+
+    def set_direction(self, dir: str, with_validate: bool = True):
+        if dir not in DIR_OFFSET_DICT:
+            raise ValueError("parameter(dir) must be the one of [EWSN]")
+
+        if with_validate and not self.validate_direction(dir):
+            return
+
+        self.direction = dir
+
+    def validate_direction(self, dir: str) -> bool:
+        next_head = self.player.get_next_head(dir)
+        neck = self.player.get_neck()
+
+        # restrict movement towards walls or the neck direction
+        return self.is_in_bound(next_head) and next_head != neck
+
+    def is_player_body_collision(self, coord: Tuple[int, int]) -> bool:
+        """
+        Check if the given coordinate collides with the player's body
+        (excluding the tail).
+        """
+        return self.player.is_body_without_tail(coord)
+
+    def move_player(self) -> Tuple[str, "Feed"]:
+        tail = self.player.get_tail()
+        next_head = self.player.get_next_head(self.direction)
+
+        collision = self.check_collision(next_head)
+        # game over when colliding with walls or the player's own body
+        if collision[0] in ['wall', 'body']:
+            self.state = GameState.GAMEOVER
+        elif collision[0] == 'feed':
+            self.eat_feed(next_head, collision[1])
+        else:
+            self.basic_movement(next_head, tail)
+
+        return collision
+
+    def eat_feed(self, new_head: Tuple[int, int], feed: "Feed"):
+        self.player.add_head(new_head)
+        self.cell_manager.push_body(new_head)
+        self.fs.remove_feed(feed.get_coord())
+
+        if feed.get_type() == 'normal':
+            self.score += 1
+            if self.clear_condition is not None and self.score >= self.clear_condition:
+                self.state = GameState.CLEAR
+
+        # If no feed exists, generate
+        if self.is_state(GameState.ACTIVE) and self.fs.is_feed_empty(feed.get_type()):
+            self.add_feed_random_coord(self.feed_amount, feed.get_type())
+
+    def basic_movement(self, next_head: Tuple[int, int], tail: Tuple[int, int]):
+        # free the tail first, the head may move into the cell it leaves
+        self.player.remove_tail()
+        self.cell_manager.pop_body(tail)
+
+        self.player.add_head(next_head)
+        self.cell_manager.push_body(next_head)
+
+
+    # about feed system logic
+    def add_feed(self, coord: Tuple[int, int], feed_type: str = 'normal'):
+        self.fs.add_feed(coord, feed_type)
+        self.cell_manager.mark_cell_used(coord)
+
+    def add_feed_random_coord(self, k: int, feed_type: str = 'normal'):
+        if k < 1:
+            return
+
+        random_cell_coords = self.cell_manager.get_random_available_cells(k)
+
+        for rand_coord in random_cell_coords:
+            self.add_feed(rand_coord, feed_type)
+
+
+    # about coordinate system
+    def check_collision(self, coord: Tuple[int, int]) -> Tuple[str, "Feed"]:
+        bit = self.bitboard.get_bit(coord)
+        if not bit:
+            return 'wall', None
+        # 'body' collision is not valid for tail
+        if bit & self.player.get_body_bits() and coord != self.player.get_tail():
+            return 'body', None
+        if bit & self.fs.get_feed_bits():
+            feed = self.fs.get_feed(coord)
+            return 'feed', feed
+        return 'none', None
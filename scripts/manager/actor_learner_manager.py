@@ -0,0 +1,249 @@
+import argparse
+import multiprocessing
+import queue
+import time
+
+import numpy as np
+import torch
+
+from scripts.manager.ai_manager import AIManager, AI_FACTORIES
+from scripts.manager.checkpoint_manager import CheckpointManager
+from scripts.manager.training_manager import TrainingStats, set_transition_sink
+from scripts.game.headless_pilot_game import HeadlessPilotGame
+from scripts.ai.replay_buffer import ReplayBuffer
+
+from scripts.ai.dqn import DQNAI
+
+from typing import Tuple, List, Dict
+
+def get_actor_epsilons(actor_num: int, base_epsilon: float = 0.4, alpha: float = 7.0) -> List[float]:
+    """
+    Exploration rate of every actor, spread from `base_epsilon` down to `base_epsilon ** (1 + alpha)`
+    so some actors explore while others play close to greedy
+    """
+    if actor_num == 1:
+        return [base_epsilon]
+    return [base_epsilon ** (1 + alpha * idx / (actor_num - 1)) for idx in range(actor_num)]
+
+
+# about actor process
+def _run_actor(actor_idx: int, ai_name: str, grid_size: Tuple[int, int], feed_amount: int, clear_goal: float, epsilon: float, seed: int, send_every: int,
+               transition_queue: multiprocessing.Queue, weight_queue: multiprocessing.Queue, stop_event):
+    """
+    Play episodes with a stale copy of the learner's policy and a fixed epsilon,
+    shipping the transitions with initial priorities and the episode scores every `send_every` transitions.
+    """
+    torch.set_num_threads(1)  # every actor gets one core
+
+    ai: DQNAI = AIManager.create_ai(ai_name)
+    sink = []
+    set_transition_sink(ai, sink)
+    game = HeadlessPilotGame(ai, grid_size, feed_amount, clear_goal)
+
+    scores = []
+    episode_idx = 0
+    while not stop_event.is_set():
+        # adopt the newest weights broadcast by the learner, if any
+        state_dict = None
+        try:
+            while True:
+                state_dict = weight_queue.get_nowait()
+        except queue.Empty:
+            pass
+        if state_dict is not None:
+            ai.agent.policy_net.load_state_dict(state_dict)
+
+        ai.agent.epsilon = epsilon
+        scores.append(game.play_episode(seed if episode_idx == 0 else None))
+        episode_idx += 1
+
+        if len(sink) < send_every:
+            continue
+
+        states, actions, rewards, next_states, dones = (np.array(column) for column in zip(*sink))
+        priorities = ai.agent.compute_td_errors(states, actions, rewards, next_states, dones)
+        batch = (actor_idx, scores, states, actions, rewards, next_states, dones, priorities)
+        sink.clear()
+        scores = []
+
+        # wait for the learner to catch up rather than piling up transitions
+        while not stop_event.is_set():
+            try:
+                transition_queue.put(batch, timeout=0.1)
+                break
+            except queue.Full:
+                pass
+
+
+class ActorLearnerManager:
+    """
+    Trains a DQN pilot in the Ape-X fashion.
+
+    Actor processes play with stale copies of the policy, each with its own epsilon,
+    and ship their transitions with initial priorities. The learner (this process)
+    keeps them in one prioritized replay buffer, trains continuously on it,
+    and broadcasts its weights to the actors every `broadcast_every` updates.
+    Playing and training run at their own pace, each on its own cores.
+    """
+    def __init__(self, ai_name: str, grid_size: Tuple[int, int], feed_amount: int, clear_goal: float, actor_num: int = None, buffer_size: int = 100000,
+                 send_every: int = 200, broadcast_every: int = 100, seed: int = 0, checkpoint_manager: CheckpointManager = None):
+        """
+        Create ActorLearnerManager Class
+
+        Args:
+            ai_name (str): Name of a DQN pilot in `AIManager`.
+            grid_size (Tuple[int, int]): Size of the grid as (width, height).
+            feed_amount (int): Number of feeds spawned at once.
+            clear_goal (float): Ratio of the grid to be filled to clear the game.
+            actor_num (int): Number of actor processes. `None` for the number of cores but one, left to the learner.
+            buffer_size (int): Capacity of the shared prioritized replay buffer.
+            send_every (int): Transitions an actor gathers before shipping them.
+            broadcast_every (int): Learner updates between two weight broadcasts.
+            seed (int): Base seed of the actors' games.
+            checkpoint_manager (CheckpointManager): Resume from its latest snapshot and save new ones while training.
+        """
+        if ai_name not in AI_FACTORIES:
+            raise ValueError(f"Unknown AI on `ActorLearnerManager()`: {ai_name}")
+
+        self.ai_name = ai_name
+        self.grid_size = grid_size
+        self.feed_amount = feed_amount
+        self.clear_goal = clear_goal
+        self.actor_num = actor_num if actor_num is not None else max(1, multiprocessing.cpu_count() - 1)
+        self.send_every = send_every
+        self.broadcast_every = broadcast_every
+        self.seed = seed
+
+        self.ai: DQNAI = AIManager.create_ai(ai_name)  # the learner
+        if not isinstance(self.ai, DQNAI):
+            raise ValueError(f"parameter(ai_name) must be a DQN pilot: {ai_name}")
+        self.agent = self.ai.agent
+        self.agent.memory = ReplayBuffer(buffer_size, self.agent.state_size, prioritized=True)
+
+        self.stats = TrainingStats()
+        self.update_count: int = 0
+        self.transition_count: int = 0
+
+        self.checkpoint_manager = checkpoint_manager
+        if checkpoint_manager is not None:
+            meta = checkpoint_manager.load_latest(self.agent)
+            if meta is not None:
+                self.stats = TrainingStats.from_dict(meta["extra"])
+
+    def train(self, epoch_num: int, verbose: bool = True, report_every: int = 100) -> TrainingStats:
+        """
+        Train until the actors have played `epoch_num` games in total.
+        """
+        context = multiprocessing.get_context("spawn")
+        transition_queue = context.Queue(maxsize=4 * self.actor_num)
+        weight_queues = [context.Queue() for _ in range(self.actor_num)]
+        stop_event = context.Event()
+
+        epsilons = get_actor_epsilons(self.actor_num)
+        actors = []
+        for actor_idx in range(self.actor_num):
+            seed = self.seed + self.stats.get_epoch() + actor_idx  # a resumed run keeps fresh seeds
+            args = (actor_idx, self.ai_name, self.grid_size, self.feed_amount, self.clear_goal, epsilons[actor_idx], seed, self.send_every,
+                    transition_queue, weight_queues[actor_idx], stop_event)
+            actor = context.Process(target=_run_actor, args=args, daemon=True)
+            actor.start()
+            actors.append(actor)
+
+        self.broadcast_weights(weight_queues)
+
+        start_time = time.perf_counter()
+        next_report = self.stats.get_epoch() + report_every
+        try:
+            while self.stats.get_epoch() < epoch_num:
+                # wait for transitions only while there are too few to train on
+                self.receive_transitions(transition_queue, block=len(self.agent.memory) < self.agent.batch_size)
+                if any(not actor.is_alive() for actor in actors):
+                    raise RuntimeError("An actor process died on `ActorLearnerManager.train()`")
+
+                if len(self.agent.memory) >= self.agent.batch_size:
+                    self.agent.update()
+                    self.update_count += 1
+                    if self.update_count % self.broadcast_every == 0:
+                        self.broadcast_weights(weight_queues)
+
+                if self.stats.get_epoch() >= next_report:
+                    next_report += report_every
+                    self.save_checkpoint()
+                    if verbose:
+                        elapsed = time.perf_counter() - start_time
+                        print(f"{self.stats.to_text()} | {self.transition_count / elapsed:,.0f} transitions/s | {self.update_count / elapsed:,.1f} updates/s")
+        finally:
+            self.stop_actors(actors, transition_queue, stop_event)
+
+        self.save_checkpoint(force=True)
+        return self.stats
+
+    def receive_transitions(self, transition_queue: multiprocessing.Queue, block: bool):
+        """
+        Move every batch the actors shipped into the replay buffer
+        """
+        try:
+            batch = transition_queue.get(timeout=1.0) if block else transition_queue.get_nowait()
+            while True:
+                _, scores, states, actions, rewards, next_states, dones, priorities = batch
+                for score in scores:
+                    self.stats.add_score(score)
+                self.agent.store_transitions(states, actions, rewards, next_states, dones, priorities)
+                self.transition_count += len(states)
+
+                batch = transition_queue.get_nowait()
+        except queue.Empty:
+            pass
+
+    def broadcast_weights(self, weight_queues: List[multiprocessing.Queue]):
+        with self.agent.net_lock:
+            state_dict = {name: tensor.clone() for name, tensor in self.agent.policy_net.state_dict().items()}
+        for weight_queue in weight_queues:
+            weight_queue.put(state_dict)
+
+    def stop_actors(self, actors: List[multiprocessing.Process], transition_queue: multiprocessing.Queue, stop_event):
+        stop_event.set()
+
+        # keep draining, an actor cannot exit while its last batch is stuck in the queue
+        while any(actor.is_alive() for actor in actors):
+            try:
+                transition_queue.get(timeout=0.1)
+            except queue.Empty:
+                pass
+            for actor in actors:
+                actor.join(timeout=0)
+
+    def save_checkpoint(self, force: bool = False):
+        if self.checkpoint_manager is None:
+            return
+
+        extra: Dict[str, any] = self.stats.to_dict()
+        if force:
+            self.checkpoint_manager.save(self.agent, self.stats.get_epoch(), extra)
+        else:
+            self.checkpoint_manager.maybe_save(self.agent, self.stats.get_epoch(), extra)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a DQN pilot with actor processes feeding one learner (Ape-X)")
+    parser.add_argument("ai_name", choices=[name for name, factory in AI_FACTORIES.items() if factory is DQNAI])
+    parser.add_argument("--epochs", type=int, default=1000)
+    parser.add_argument("--actors", type=int, default=None)
+    parser.add_argument("--buffer-size", type=int, default=100000)
+    parser.add_argument("--send-every", type=int, default=200)
+    parser.add_argument("--broadcast-every", type=int, default=100)
+    parser.add_argument("--grid", type=int, nargs=2, default=[10, 10], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--feeds", type=int, default=3)
+    parser.add_argument("--clear-goal", type=float, default=0.75)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint-dir", default=None, help="resume from and save snapshots into this directory")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="epochs between two snapshots")
+    args = parser.parse_args()
+
+    checkpoint_manager = None
+    if args.checkpoint_dir is not None:
+        checkpoint_manager = CheckpointManager(args.checkpoint_dir, args.checkpoint_every, with_memory=True)
+
+    manager = ActorLearnerManager(args.ai_name, tuple(args.grid), args.feeds, args.clear_goal, args.actors, args.buffer_size,
+                                  args.send_every, args.broadcast_every, args.seed, checkpoint_manager)
+    manager.train(args.epochs)
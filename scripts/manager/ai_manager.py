@@ -1,23 +1,45 @@
-from typing import Dict, List
+from typing import Dict, List, Callable
+from functools import partial
 
+from scripts.ai.base_ai import BaseAI
 from scripts.ai.rule_based_ai import RuleBasedAI
 from scripts.ai.greedy_ai import GreedyAI
+from scripts.ai.pathfinding_ai import PathfindingAI
+from scripts.ai.hamiltonian_ai import HamiltonianAI
 from scripts.ai.q_learning import QLearningAI
 from scripts.ai.dqn import DQNAI
 from scripts.ai.policy_gradient import PolicyGradientAI
 
+# name -> function creating a fresh pilot
+AI_FACTORIES: Dict[str, Callable[[], BaseAI]] = {
+    "Rule-based-Smaller": partial(RuleBasedAI, "priority-smaller"),
+    "Rule-based-Larger": partial(RuleBasedAI, "priority-larger"),
+    "Rule-based-Maximalism": partial(RuleBasedAI, "maximalism"),
+    "Greedy-Algorithm": GreedyAI,
+    "Pathfinding": PathfindingAI,
+    "Hamiltonian": HamiltonianAI,
+    "Q-Learning": QLearningAI,
+    "DQN": DQNAI,
+    "Policy-Gradient": PolicyGradientAI,
+    # "PPO": PPO,
+}
+
+# name -> parameters of the pilots played in the AI Lab, where a move must not wait for training
+LAB_AI_PARAMS: Dict[str, Dict[str, any]] = {
+    "DQN": {"train_every": 4, "gradient_steps": 4, "background_learner": True},
+}
+
 class AIManager:
     def __init__(self):
         self.ai_list: Dict[str, any] = {}
 
-        self.ai_list["Rule-based-Smaller"] = RuleBasedAI("priority-smaller")
-        self.ai_list["Rule-based-Larger"] = RuleBasedAI("priority-larger")
-        self.ai_list["Rule-based-Maximalism"] = RuleBasedAI("maximalism")
-        self.ai_list["Greedy-Algorithm"] = GreedyAI()
-        self.ai_list["Q-Learning"] = QLearningAI()
-        self.ai_list["DQN"] = DQNAI()
-        self.ai_list["Policy-Gradient"] = PolicyGradientAI()
-        # self.ai_list["PPO"] = PPO()
+        for ai_name in AI_FACTORIES:
+            self.ai_list[ai_name] = self.create_ai(ai_name, **LAB_AI_PARAMS.get(ai_name, {}))
+
+    @staticmethod
+    def create_ai(ai_name: str, **params) -> BaseAI:
+        """Create a fresh pilot, independent from the ones in `ai_list`, with `params` overriding its defaults"""
+        return AI_FACTORIES[ai_name](**params)
     
     def get_ai_list(self) -> List[str]:
         return self.ai_list.keys()
@@ -0,0 +1,189 @@
+import argparse
+import time
+
+import numpy as np
+import torch
+
+from scripts.manager.ai_manager import AIManager, AI_FACTORIES
+from scripts.manager.checkpoint_manager import CheckpointManager
+from scripts.manager.training_manager import TrainingStats
+from scripts.game.batch_snake_env import BatchSnakeEnv
+
+from scripts.ai.dqn import DQNAI
+from scripts.ai.policy_gradient import PolicyGradientAI
+
+from typing import Tuple, List, Dict
+
+# learned pilots the manager trains, with the shaping of `get_shaped_rewards()` they play with alone
+BATCH_AI_REWARDS: Dict[type, Dict[str, float]] = {
+    DQNAI: {"closer_reward": 0.5, "alive_reward": 0.1},
+    PolicyGradientAI: {"closer_reward": 0.2, "alive_reward": 0.25},
+}
+
+def get_feed_dists(states: np.ndarray, grid_size: Tuple[int, int]) -> np.ndarray:
+    """
+    Manhattan distance from the head to the nearest feed, read back from the relative x/y features
+    """
+    return np.rint(np.abs(states[:, 0]) * grid_size[0] + np.abs(states[:, 1]) * grid_size[1])
+
+def get_shaped_rewards(eats: np.ndarray, feed_dists: np.ndarray, next_feed_dists: np.ndarray, dones: np.ndarray, clears: np.ndarray, closer_reward: float = 0.5, alive_reward: float = 0.1) -> np.ndarray:
+    """
+    Rewards of a batch of moves, shaped the same way the learned pilots and `learn_on_game_end()` shape them:
+    the score gained, else `closer_reward` closer to the feed or minus it away from it plus `alive_reward` for staying alive,
+    5 on a clear and -1 on a game over.
+    """
+    rewards = np.where(eats > 0, eats, np.where(next_feed_dists < feed_dists, closer_reward, -closer_reward) + alive_reward)
+    return np.where(dones, np.where(clears, 5.0, -1.0), rewards).astype(np.float32)
+
+
+class BatchTrainingManager:
+    """
+    Trains a DQN or policy gradient pilot on `BatchSnakeEnv` in a single process.
+
+    `env_num` games are stepped in lockstep, and one forward pass picks the actions of all of them.
+    A DQN pilot stores their transitions at once and runs one update per lockstep on a batch `env_num` times
+    its own, its exploration and target network schedules counted in updates are shortened to match.
+    A policy gradient pilot gets the episodes finished on a lockstep together, and learns from them at once.
+    Finished games are restarted right away, a game that has not eaten for `stall_limit` moves is over.
+    """
+    def __init__(self, ai_name: str, grid_size: Tuple[int, int], feed_amount: int, clear_goal: float, env_num: int = 32, seed: int = 0,
+                 stall_limit: int = None, checkpoint_manager: CheckpointManager = None):
+        """
+        Create BatchTrainingManager Class
+
+        Args:
+            ai_name (str): Name of a DQN or policy gradient pilot in `AIManager`.
+            grid_size (Tuple[int, int]): Size of the grid as (width, height).
+            feed_amount (int): Number of feeds spawned at once.
+            clear_goal (float): Ratio of the grid to be filled to clear the game.
+            env_num (int): Number of games stepped together.
+            seed (int): Seed of the games.
+            stall_limit (int): Moves allowed without eating before the game is over,
+                defaults to 4 times the grid area as in `HeadlessPilotGame`.
+            checkpoint_manager (CheckpointManager): If given, resume from its latest snapshot and save new ones.
+        """
+        if ai_name not in AI_FACTORIES or AI_FACTORIES[ai_name] not in BATCH_AI_REWARDS:
+            raise ValueError(f"parameter(ai_name) must be a DQN or policy gradient pilot: {ai_name}")
+
+        self.ai_name = ai_name
+        self.grid_size = grid_size
+        self.env_num = env_num
+        self.seed = seed
+        self.stall_limit = stall_limit if stall_limit is not None else grid_size[0] * grid_size[1] * 4
+
+        self.ai = AIManager.create_ai(ai_name)
+        self.agent = self.ai.agent
+        self.reward_params = BATCH_AI_REWARDS[type(self.ai)]
+        self.env = BatchSnakeEnv(env_num, grid_size, feed_amount, clear_goal, seed=seed)
+
+        if isinstance(self.ai, DQNAI):
+            # one update stands for the `env_num` ones of a pilot playing alone
+            self.agent.batch_size *= env_num
+            self.agent.epsilon_update_period = max(1, self.agent.epsilon_update_period // env_num)
+            self.agent.tar_net_update_period = max(1, self.agent.tar_net_update_period // env_num)
+        else:
+            self.episodes: List[list] = [[] for _ in range(env_num)]  # transitions of the running episode of every game
+        self.stats = TrainingStats()
+
+        self.checkpoint_manager = checkpoint_manager
+        if checkpoint_manager is not None:
+            meta = checkpoint_manager.load_latest(self.agent)
+            if meta is not None:
+                self.stats = TrainingStats.from_dict(meta["extra"])
+
+    def train(self, epoch_num: int, verbose: bool = True) -> TrainingStats:
+        """
+        Train until `epoch_num` games have been played in total.
+        """
+        env = self.env
+        stalls = np.zeros(self.env_num, dtype=np.int64)
+
+        states = env.reset().copy()
+        feed_dists = get_feed_dists(states, self.grid_size)
+
+        start_time = time.perf_counter()
+        report_epoch = self.stats.get_epoch()
+        while self.stats.get_epoch() < epoch_num:
+            actions = self.agent.choose_actions(states)
+            eats, dones = env.step(actions)
+
+            stalls = np.where(eats > 0, 0, stalls + 1)
+            stalled = ~dones & (stalls >= self.stall_limit)
+            env.dones |= stalled
+            dones |= stalled
+
+            next_states = env.get_states().copy()
+            next_feed_dists = get_feed_dists(next_states, self.grid_size)
+            rewards = get_shaped_rewards(eats, feed_dists, next_feed_dists, dones, env.clears, **self.reward_params)
+
+            if isinstance(self.ai, DQNAI):
+                next_states[dones] = 0  # same as `DQNAI.learn()` on a finished game
+                self.agent.store_transitions(states, actions, rewards, next_states, dones)
+                self.agent.update()
+            else:
+                self.learn_episodes(states, actions, rewards, dones)
+
+            for score in env.scores[dones]:
+                self.stats.add_score(int(score))
+            done_envs = env.reset_done()
+            stalls[done_envs] = 0
+
+            states = env.get_states().copy()
+            feed_dists = get_feed_dists(states, self.grid_size)
+
+            if len(done_envs):
+                self.save_checkpoint(force=self.stats.get_epoch() >= epoch_num)
+            if verbose and self.stats.get_epoch() - report_epoch >= 100:
+                report_epoch = self.stats.get_epoch()
+                print(f"{self.stats.to_text()} | {time.perf_counter() - start_time:,.1f}s")
+
+        return self.stats
+
+    def learn_episodes(self, states: np.ndarray, actions: np.ndarray, rewards: np.ndarray, dones: np.ndarray):
+        """
+        Keep the moves of every game, and give the policy gradient pilot the episodes finished on this lockstep
+        """
+        for env_idx in range(self.env_num):  # every game has just moved, finished ones are restarted after
+            self.episodes[env_idx].append((states[env_idx], int(actions[env_idx]), float(rewards[env_idx]), bool(dones[env_idx])))
+
+        done_envs = np.flatnonzero(dones)
+        for env_idx in done_envs:
+            for transition in self.episodes[env_idx]:
+                self.agent.store_transition(*transition)
+            self.episodes[env_idx] = []
+        if len(done_envs):
+            self.agent.learn()
+
+    def save_checkpoint(self, force: bool = False):
+        if self.checkpoint_manager is None:
+            return
+
+        extra = self.stats.to_dict()
+        if force:
+            self.checkpoint_manager.save(self.agent, self.stats.get_epoch(), extra)
+        else:
+            self.checkpoint_manager.maybe_save(self.agent, self.stats.get_epoch(), extra)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train a DQN or policy gradient pilot on many games stepped in lockstep")
+    parser.add_argument("ai_name", choices=[name for name, factory in AI_FACTORIES.items() if factory in BATCH_AI_REWARDS])
+    parser.add_argument("--epochs", type=int, default=1000)
+    parser.add_argument("--envs", type=int, default=32, help="games stepped together")
+    parser.add_argument("--grid", type=int, nargs=2, default=[10, 10], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--feeds", type=int, default=3)
+    parser.add_argument("--clear-goal", type=float, default=0.75)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint-dir", default=None, help="resume from and save snapshots into this directory")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="epochs between two snapshots")
+    args = parser.parse_args()
+
+    torch.manual_seed(args.seed)
+    np.random.seed(args.seed)
+
+    checkpoint_manager = None
+    if args.checkpoint_dir is not None:
+        checkpoint_manager = CheckpointManager(args.checkpoint_dir, args.checkpoint_every)
+
+    manager = BatchTrainingManager(args.ai_name, tuple(args.grid), args.feeds, args.clear_goal, args.envs, args.seed, checkpoint_manager=checkpoint_manager)
+    manager.train(args.epochs)
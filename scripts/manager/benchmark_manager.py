@@ -0,0 +1,195 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import random
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import torch
+
+from constants import CHECKPOINT_DIRECTORY
+from scripts.manager.ai_manager import AIManager, AI_FACTORIES
+from scripts.manager.checkpoint_manager import CheckpointManager, get_checkpoint_agent
+from scripts.manager.training_manager import set_transition_sink
+from scripts.manager.state_manager import GameState
+from scripts.game.headless_pilot_game import HeadlessPilotGame
+
+from typing import Tuple, List, Dict
+
+# about benchmark process
+def _run_games(ai_name: str, grid_size: Tuple[int, int], feed_amount: int, clear_goal: float, seeds: List[int], checkpoint_dir: str) -> Dict[str, any]:
+    """
+    Play one seeded game per seed with a fresh pilot, timing every decision.
+
+    Learned pilots are restored from their latest snapshot under `checkpoint_dir` if there is one,
+    then play greedily without learning, so every run of the benchmark sees the same pilot.
+    """
+    torch.set_num_threads(1)  # every process gets one core
+    random.seed(seeds[0])
+    np.random.seed(seeds[0])
+    torch.manual_seed(seeds[0])
+
+    ai = AIManager.create_ai(ai_name)
+    sink = []
+    agent = get_checkpoint_agent(ai)
+    if agent is not None:
+        if checkpoint_dir is not None:
+            CheckpointManager(os.path.join(checkpoint_dir, ai_name)).load_latest(agent, mmap=False)
+        set_transition_sink(ai, sink)
+        if hasattr(agent, "epsilon"):
+            agent.epsilon = 0.0
+
+    game = HeadlessPilotGame(ai, grid_size, feed_amount, clear_goal)
+    game.decision_times = []
+
+    scores, clears, moves = [], [], []
+    for seed in seeds:
+        scores.append(game.play_episode(seed))
+        clears.append(game.sim.is_state(GameState.CLEAR))
+        moves.append(game.sim.move_count)
+        sink.clear()
+
+    return {"scores": scores, "clears": clears, "moves": moves, "decision_times": np.array(game.decision_times, dtype=np.int64)}
+
+def summarize(ai_name: str, grid_size: Tuple[int, int], runs: List[Dict[str, any]]) -> Dict[str, any]:
+    """
+    Aggregate the games of one pilot on one grid size into one row of the report
+    """
+    scores = np.concatenate([run["scores"] for run in runs]).astype(np.float64)
+    clears = np.concatenate([run["clears"] for run in runs]).astype(bool)
+    moves = np.concatenate([run["moves"] for run in runs])
+    decision_times = np.concatenate([run["decision_times"] for run in runs])
+
+    clear_moves = moves[clears]
+    total_seconds = decision_times.sum() / 1e9
+    return {
+        "ai": ai_name,
+        "grid": f"{grid_size[0]}x{grid_size[1]}",
+        "games": len(scores),
+        "score_mean": float(scores.mean()),
+        "score_std": float(scores.std()),
+        "score_min": float(scores.min()),
+        "score_p25": float(np.percentile(scores, 25)),
+        "score_p50": float(np.percentile(scores, 50)),
+        "score_p75": float(np.percentile(scores, 75)),
+        "score_max": float(scores.max()),
+        "clear_rate": float(clears.mean()),
+        "steps_to_clear_mean": float(clear_moves.mean()) if len(clear_moves) else None,
+        "steps_to_clear_p50": float(np.percentile(clear_moves, 50)) if len(clear_moves) else None,
+        "decisions": int(len(decision_times)),
+        "decisions_per_sec": float(len(decision_times) / total_seconds) if total_seconds > 0 else None,
+        "latency_p50_us": float(np.percentile(decision_times, 50) / 1e3) if len(decision_times) else None,
+        "latency_p99_us": float(np.percentile(decision_times, 99) / 1e3) if len(decision_times) else None,
+    }
+
+
+class BenchmarkManager:
+    """
+    Plays a tournament of AIManager pilots on seeded games, in a process pool.
+
+    Every pilot plays the same `game_num` seeds on every grid size, split into chunks of
+    `chunk_size` games, one chunk per task. The report holds, per pilot and grid size,
+    the score distribution, the clear rate, the moves to clear and the decision latency.
+    """
+    def __init__(self, ai_names: List[str], grid_sizes: List[Tuple[int, int]], game_num: int, feed_amount: int, clear_goal: float, worker_num: int = None,
+                 chunk_size: int = 5, seed: int = 0, checkpoint_dir: str = CHECKPOINT_DIRECTORY):
+        """
+        Create BenchmarkManager Class
+
+        Args:
+            ai_names (List[str]): Names of the pilots in `AIManager`.
+            grid_sizes (List[Tuple[int, int]]): Sizes of the grid as (width, height).
+            game_num (int): Games per pilot and grid size.
+            feed_amount (int): Number of feeds spawned at once.
+            clear_goal (float): Ratio of the grid to be filled to clear the game.
+            worker_num (int): Number of processes. `None` for the number of cores.
+            chunk_size (int): Games per task.
+            seed (int): Seed of the first game, the others follow.
+            checkpoint_dir (str): Directory of the learned pilots' snapshots. `None` to benchmark them untrained.
+        """
+        for ai_name in ai_names:
+            if ai_name not in AI_FACTORIES:
+                raise ValueError(f"Unknown AI on `BenchmarkManager()`: {ai_name}")
+
+        self.ai_names = ai_names
+        self.grid_sizes = grid_sizes
+        self.game_num = game_num
+        self.feed_amount = feed_amount
+        self.clear_goal = clear_goal
+        self.worker_num = worker_num if worker_num is not None else multiprocessing.cpu_count()
+        self.chunk_size = chunk_size
+        self.seed = seed
+        self.checkpoint_dir = checkpoint_dir
+
+        self.report: List[Dict[str, any]] = []
+
+    def run(self, verbose: bool = True) -> List[Dict[str, any]]:
+        seeds = [self.seed + idx for idx in range(self.game_num)]
+        seed_chunks = [seeds[idx:idx + self.chunk_size] for idx in range(0, len(seeds), self.chunk_size)]
+        context = multiprocessing.get_context("spawn")
+
+        with ProcessPoolExecutor(self.worker_num, mp_context=context) as executor:
+            futures = {}
+            for ai_name in self.ai_names:
+                for grid_size in self.grid_sizes:
+                    futures[(ai_name, grid_size)] = [
+                        executor.submit(_run_games, ai_name, grid_size, self.feed_amount, self.clear_goal, seed_chunk, self.checkpoint_dir)
+                        for seed_chunk in seed_chunks
+                    ]
+
+            for (ai_name, grid_size), chunk_futures in futures.items():
+                row = summarize(ai_name, grid_size, [future.result() for future in chunk_futures])
+                self.report.append(row)
+                if verbose:
+                    print(self.row_to_text(row))
+
+        return self.report
+
+    def row_to_text(self, row: Dict[str, any]) -> str:
+        steps = f"{row['steps_to_clear_mean']:,.0f}" if row["steps_to_clear_mean"] is not None else "-"
+        return (f"{row['ai']:<22} {row['grid']:>7} | score {row['score_mean']:7.2f} ± {row['score_std']:6.2f} (p50 {row['score_p50']:g}, max {row['score_max']:g})"
+                f" | clear {row['clear_rate']:6.1%} in {steps} moves | {row['decisions_per_sec'] or 0:,.0f} dec/s"
+                f" | p50 {row['latency_p50_us'] or 0:,.1f}us p99 {row['latency_p99_us'] or 0:,.1f}us")
+
+    def write_report(self, file_path: str):
+        """
+        Write the report as json, or as csv if `file_path` ends with `.csv`
+        """
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+
+        if file_path.endswith(".csv"):
+            with open(file_path, 'w', newline='') as f:
+                writer = csv.DictWriter(f, list(self.report[0].keys()))
+                writer.writeheader()
+                writer.writerows(self.report)
+            return
+
+        with open(file_path, 'w') as f:
+            json.dump(self.report, f, indent=4)
+
+
+def parse_grid_size(text: str) -> Tuple[int, int]:
+    width, height = text.lower().split("x")
+    return (int(width), int(height))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark AI pilots on seeded games on several processes")
+    parser.add_argument("--ai", nargs="+", default=list(AI_FACTORIES.keys()), choices=list(AI_FACTORIES.keys()), help="pilots to benchmark, all by default")
+    parser.add_argument("--grid", nargs="+", type=parse_grid_size, default=[(10, 10), (20, 20)], metavar="WIDTHxHEIGHT")
+    parser.add_argument("--games", type=int, default=20, help="games per pilot and grid size")
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--chunk-size", type=int, default=5)
+    parser.add_argument("--feeds", type=int, default=3)
+    parser.add_argument("--clear-goal", type=float, default=0.75)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint-dir", default=CHECKPOINT_DIRECTORY, help="snapshots of the learned pilots, see CheckpointManager")
+    parser.add_argument("--untrained", action="store_true", help="ignore the snapshots of the learned pilots")
+    parser.add_argument("--output", default="benchmark.json", help="report, json or csv by extension")
+    args = parser.parse_args()
+
+    checkpoint_dir = None if args.untrained else args.checkpoint_dir
+    manager = BenchmarkManager(args.ai, args.grid, args.games, args.feeds, args.clear_goal, args.workers, args.chunk_size, args.seed, checkpoint_dir)
+    manager.run()
+    manager.write_report(args.output)
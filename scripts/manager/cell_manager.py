@@ -1,25 +1,57 @@
-from random import sample
-from typing import Tuple, Set, List
+import random
+from typing import Tuple, Dict, List, Iterable
 
 class CellManager:
     """
     Manages grid size, available cells.
+
+    Available cells are kept in an array-backed free-list with an index map,
+    so marking a cell and sampling `k` cells never copies the whole grid.
+
+    Body cells also keep when they will be free again: `body_expiry` holds, per cell,
+    the number of tail releases after which the body part on it is released.
+    Values are absolute, so a move only writes the new head and the old tail.
     """
-    def __init__(self, grid_size: Tuple[int, int]):
+    def __init__(self, grid_size: Tuple[int, int], rng: random.Random = None, seed: int = None, available_cells: Iterable[Tuple[int, int]] = None):
         """
         Initialize the game state manager with the given grid size.
 
         Args:
             grid_size (Tuple[int, int]): Size of the grid as (width, height).
+            rng (random.Random): Random generator used for sampling. `None` for the global one.
+            seed (int): Sample with a dedicated generator seeded by this value. Ignored if `rng` is given.
+            available_cells (Iterable[Tuple[int, int]]): Start from these available cells instead of the whole grid.
         """
         self.grid_size: Tuple[int, int] = grid_size
-        self.available_cells: Set[Tuple[int, int]] = set(
-            (x, y) for x in range(grid_size[0]) for y in range(grid_size[1])
-        )
-    
+        if rng is not None:
+            self.rng = rng
+        elif seed is not None:
+            self.rng = random.Random(seed)
+        else:
+            self.rng = random
+
+        self.available_cells: List[Tuple[int, int]] = []
+        self._cell_index: Dict[Tuple[int, int], int] = {}  # coord -> position in `available_cells`
+
+        self.body_expiry: List[int] = [0] * (grid_size[0] * grid_size[1])  # flat grid, `0` for no body
+        self.body_push_count: int = 0
+        self.body_pop_count: int = 0
+
+        if available_cells is None:
+            self.reset()
+        else:
+            self.available_cells = list(available_cells)
+            self._cell_index = {coord: index for index, coord in enumerate(self.available_cells)}
+
     def get_grid_size(self):
         return self.grid_size
 
+    def _swap(self, i: int, j: int) -> None:
+        cells = self.available_cells
+        cells[i], cells[j] = cells[j], cells[i]
+        self._cell_index[cells[i]] = i
+        self._cell_index[cells[j]] = j
+
     def mark_cell_used(self, coord: Tuple[int, int]) -> None:
         """
         Mark a cell as used and remove it from available cells.
@@ -27,8 +59,15 @@ class CellManager:
         Args:
             coord (Tuple[int, int]): The coordinate of the cell to mark as used.
         """
-        if coord in self.available_cells:
-            self.available_cells.discard(coord)
+        index = self._cell_index.pop(coord, None)
+        if index is None:
+            return
+
+        # swap-remove: move the last cell into the hole
+        last_cell = self.available_cells.pop()
+        if index < len(self.available_cells):
+            self.available_cells[index] = last_cell
+            self._cell_index[last_cell] = index
 
     def mark_cell_free(self, coord: Tuple[int, int]) -> None:
         """
@@ -37,7 +76,47 @@ class CellManager:
         Args:
             coord (Tuple[int, int]): The coordinate of the cell to mark as free.
         """
-        self.available_cells.add(coord)
+        if coord in self._cell_index:
+            return
+
+        self._cell_index[coord] = len(self.available_cells)
+        self.available_cells.append(coord)
+
+    def push_body(self, coord: Tuple[int, int]) -> None:
+        """
+        Mark a cell as used by the new head of the player.
+
+        Args:
+            coord (Tuple[int, int]): The coordinate of the new head.
+        """
+        self.mark_cell_used(coord)
+        self.body_push_count += 1
+        self.body_expiry[coord[1] * self.grid_size[0] + coord[0]] = self.body_push_count
+
+    def pop_body(self, coord: Tuple[int, int]) -> None:
+        """
+        Mark the cell of the released tail of the player as free.
+
+        Args:
+            coord (Tuple[int, int]): The coordinate of the released tail.
+        """
+        self.body_pop_count += 1
+        self.body_expiry[coord[1] * self.grid_size[0] + coord[0]] = 0
+        self.mark_cell_free(coord)
+
+    def get_moves_until_free(self, coord: Tuple[int, int]) -> int:
+        """
+        Get in how many moves the body part on a cell is released, assuming no feed is eaten meanwhile.
+        The head may enter the cell on that very move, as with the tail on the next move.
+
+        Args:
+            coord (Tuple[int, int]): The coordinate of the cell to check.
+
+        Returns:
+            int: Number of moves, `0` if no body part is on the cell.
+        """
+        expiry = self.body_expiry[coord[1] * self.grid_size[0] + coord[0]]
+        return expiry - self.body_pop_count if expiry else 0
 
     def is_cell_available(self, coord: Tuple[int, int]) -> bool:
         """
@@ -49,8 +128,8 @@ class CellManager:
         Returns:
             bool: True if the cell is available, False otherwise.
         """
-        return coord in self.available_cells
-    
+        return coord in self._cell_index
+
     def get_remaining_available_cells_num(self) -> int:
         """
         Get the number of remaining available cells
@@ -63,6 +142,7 @@ class CellManager:
     def get_random_available_cells(self, k: int) -> List[Tuple[int, int]]:
         """
         Get `k` random available cells from the grid.
+        Runs a partial Fisher-Yates shuffle over the free-list, so it costs O(k).
 
         Args:
             k (int): The number of cells to be returned.
@@ -70,12 +150,22 @@ class CellManager:
         Returns:
             List[Tuple[int, int]]: Coordinates of `k` available cells.
         """
-        return sample(list(self.available_cells), k=min(k, len(self.available_cells)))
+        cells_num = len(self.available_cells)
+        k = min(k, cells_num)
+
+        for i in range(k):
+            self._swap(i, self.rng.randrange(i, cells_num))
+
+        return self.available_cells[:k]
 
     def reset(self) -> None:
         """
         Reset all cells in the grid to available state.
         """
-        self.available_cells = set(
+        self.available_cells = [
             (x, y) for x in range(self.grid_size[0]) for y in range(self.grid_size[1])
-        )
\ No newline at end of file
+        ]
+        self._cell_index = {coord: index for index, coord in enumerate(self.available_cells)}
+        self.body_expiry = [0] * (self.grid_size[0] * self.grid_size[1])
+        self.body_push_count = 0
+        self.body_pop_count = 0
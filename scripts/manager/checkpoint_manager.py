@@ -0,0 +1,151 @@
+import json
+import os
+import shutil
+import time
+
+from constants import CHECKPOINT_DIRECTORY
+from scripts.ai.base_ai import BaseAI
+
+from typing import Dict, List, Set
+
+def get_checkpoint_agent(ai: BaseAI):
+    """
+    Get the agent of a learned pilot, `None` for pilots with nothing to checkpoint
+    """
+    agent = getattr(ai, "agent", None)
+    if agent is None or not hasattr(agent, "save_checkpoint"):
+        return None
+    return agent
+
+class CheckpointManager:
+    """
+    Keeps periodic snapshots of a learning agent (DQNAgent, PolicyGradientAgent or QLearningAgent) in one directory.
+
+    Every snapshot is written into a temporary directory and renamed into place once complete,
+    then `latest.json` is swapped to point at it, so a crash never leaves a partial snapshot
+    behind `load_latest()`. A snapshot is never overwritten: saving a step again gets a new directory,
+    and the one `latest.json` points at is only removed once it points elsewhere.
+    Only the `keep_last` newest snapshots are kept, along with the ones an agent memory-maps.
+    """
+    def __init__(self, directory: str, save_every: int = 100, keep_last: int = 2, with_memory: bool = False):
+        """
+        Create CheckpointManager Class
+
+        Args:
+            directory (str): Directory holding the snapshots.
+            save_every (int): Steps (e.g. epochs) between two snapshots of `maybe_save()`.
+            keep_last (int): Number of snapshots kept on disk.
+            with_memory (bool): Also save the replay memory of the agent.
+        """
+        if keep_last < 1:
+            raise ValueError(f"parameter(keep_last) must be positive: {keep_last}")
+
+        self.directory = directory
+        self.save_every = save_every
+        self.keep_last = keep_last
+        self.with_memory = with_memory
+
+        self.last_saved_step: int = None
+        self.mapped_paths: Set[str] = set()  # snapshots loaded with `mmap`, their files back the agent
+
+    @classmethod
+    def for_ai(cls, ai_name: str, **kwargs) -> "CheckpointManager":
+        """Manager of the snapshots of an `AIManager` pilot, under `CHECKPOINT_DIRECTORY`"""
+        return cls(os.path.join(CHECKPOINT_DIRECTORY, ai_name), **kwargs)
+
+    def maybe_save(self, agent, step: int, extra: Dict[str, any] = None) -> bool:
+        """
+        Save a snapshot if `save_every` steps passed since the last one
+
+        Returns:
+            bool: Whether a snapshot was saved.
+        """
+        if step - (self.last_saved_step or 0) < self.save_every:
+            return False
+
+        self.save(agent, step, extra)
+        return True
+
+    def save(self, agent, step: int, extra: Dict[str, any] = None) -> str:
+        """
+        Save a snapshot of the agent at `step`
+
+        Args:
+            agent: Agent with `save_checkpoint()`.
+            step (int): Progress of the training, used to name and order the snapshots.
+            extra (Dict[str, any]): Json-serializable data restored along, e.g. training stats.
+
+        Returns:
+            str: Path of the snapshot.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+
+        name = f"checkpoint-{step:010d}"
+        if os.path.exists(os.path.join(self.directory, name)):
+            name = f"{name}-{time.time_ns()}"  # sorted after the former snapshot of the step
+        path = os.path.join(self.directory, name)
+        temp_path = f"{path}.{os.getpid()}.tmp"
+
+        shutil.rmtree(temp_path, ignore_errors=True)
+        agent.save_checkpoint(temp_path, self.with_memory)
+        with open(os.path.join(temp_path, "meta.json"), 'w') as f:
+            json.dump({"step": step, "extra": extra}, f)
+
+        os.replace(temp_path, path)
+
+        # point at the new snapshot only once it is complete
+        latest_path = os.path.join(self.directory, "latest.json")
+        with open(f"{latest_path}.{os.getpid()}.tmp", 'w') as f:
+            json.dump({"name": name, "step": step}, f)
+        os.replace(f"{latest_path}.{os.getpid()}.tmp", latest_path)
+
+        self.last_saved_step = step
+        self.remove_old_snapshots()
+        return path
+
+    def load_latest(self, agent, mmap: bool = True) -> Dict[str, any]:
+        """
+        Restore the newest snapshot into the agent
+
+        Args:
+            agent: Agent with `load_checkpoint()`.
+            mmap (bool): Memory-map the large arrays instead of reading them in.
+                The snapshot is then never removed by this manager.
+
+        Returns:
+            Dict[str, any]: Meta data of the snapshot, with its `step` and `extra`. `None` if there is none.
+        """
+        path = self.get_latest_path()
+        if path is None:
+            return None
+
+        agent.load_checkpoint(path, mmap)
+        if mmap:
+            self.mapped_paths.add(path)
+        with open(os.path.join(path, "meta.json"), 'r') as f:
+            meta = json.load(f)
+
+        self.last_saved_step = meta["step"]
+        return meta
+
+    def get_latest_path(self) -> str:
+        latest_path = os.path.join(self.directory, "latest.json")
+        if not os.path.exists(latest_path):
+            return None
+
+        with open(latest_path, 'r') as f:
+            path = os.path.join(self.directory, json.load(f)["name"])
+        return path if os.path.isdir(path) else None
+
+    def get_snapshot_names(self) -> List[str]:
+        """Names of the complete snapshots, the oldest first"""
+        if not os.path.isdir(self.directory):
+            return []
+        return sorted(name for name in os.listdir(self.directory) if name.startswith("checkpoint-") and not name.endswith(".tmp"))
+
+    def remove_old_snapshots(self):
+        latest_path = self.get_latest_path()
+        for name in self.get_snapshot_names()[:-self.keep_last]:
+            path = os.path.join(self.directory, name)
+            if path != latest_path and path not in self.mapped_paths:
+                shutil.rmtree(path, ignore_errors=True)
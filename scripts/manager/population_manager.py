@@ -0,0 +1,234 @@
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import torch
+
+from scripts.manager.ai_manager import AIManager, AI_FACTORIES
+from scripts.manager.checkpoint_manager import CheckpointManager
+from scripts.manager.sweep_manager import sample_configs, RANDOM
+from scripts.manager.training_manager import TrainingStats
+from scripts.game.headless_pilot_game import HeadlessPilotGame
+
+from scripts.ai.dqn import DQNAI, DQNAgent
+
+from typing import Tuple, List, Dict
+
+# hyperparameters a member starts from and perturbs, see `sample_configs()`
+DEFAULT_SPACE = {
+    "lr": {"low": 1e-4, "high": 1e-2, "log": True},
+    "gamma": {"low": 0.8, "high": 0.99},
+    "epsilon_decay": {"low": 0.95, "high": 0.999},
+}
+# bounds kept while perturbing
+PARAM_BOUNDS = {"lr": (1e-6, 1.0), "gamma": (0.0, 0.999), "epsilon_decay": (0.5, 0.9999)}
+
+def get_hyperparams(agent: DQNAgent, names: List[str]) -> Dict[str, float]:
+    params = {}
+    for name in names:
+        params[name] = agent.optimizer.param_groups[0]["lr"] if name == "lr" else getattr(agent, name)
+    return params
+
+def set_hyperparams(agent: DQNAgent, params: Dict[str, float]):
+    for name, value in params.items():
+        if name == "lr":
+            for param_group in agent.optimizer.param_groups:
+                param_group["lr"] = value
+        else:
+            setattr(agent, name, value)
+
+def perturb_hyperparams(params: Dict[str, float], rng: random.Random, factors: Tuple[float, float] = (0.8, 1.2)) -> Dict[str, float]:
+    perturbed = {}
+    for name, value in params.items():
+        value *= rng.choice(factors)
+        low, high = PARAM_BOUNDS.get(name, (-float("inf"), float("inf")))
+        perturbed[name] = type(params[name])(min(max(value, low), high))
+    return perturbed
+
+
+# about member process
+def _run_member(member_idx: int, ai_name: str, params: Dict[str, float], grid_size: Tuple[int, int], feed_amount: int, clear_goal: float,
+                epoch_num: int, ready_every: int, quantile: float, checkpoint_dir: str, seed: int, scoreboard, scoreboard_lock) -> Dict[str, any]:
+    """
+    Train one member, and every `ready_every` epochs post its score, snapshot it, and
+    if it ranks in the bottom `quantile`, take over the weights and hyperparameters of a top member, perturbed.
+    """
+    torch.set_num_threads(1)  # every member gets one core
+    rng = random.Random(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+    ai: DQNAI = AIManager.create_ai(ai_name, **params)
+    agent = ai.agent
+    game = HeadlessPilotGame(ai, grid_size, feed_amount, clear_goal)
+    stats = TrainingStats()
+    checkpoint_manager = CheckpointManager(os.path.join(checkpoint_dir, f"member-{member_idx}"), keep_last=2)
+
+    history = []
+    while stats.get_epoch() < epoch_num:
+        stats.add_score(game.play_episode(seed if stats.get_epoch() == 0 else None))
+        if stats.get_epoch() % ready_every != 0:
+            continue
+
+        score = stats.get_average_score_last_100()
+        params = get_hyperparams(agent, list(params.keys()))
+        checkpoint_manager.save(agent, stats.get_epoch())
+        with scoreboard_lock:
+            scoreboard[member_idx] = {"score": score, "epoch": stats.get_epoch(), "params": params}
+            board = dict(scoreboard)
+        history.append({"epoch": stats.get_epoch(), "score": score, "params": params, "exploited": None})
+
+        # exploit: the bottom quantile copies the top quantile
+        ranking = sorted(board.keys(), key=lambda idx: board[idx]["score"])
+        cut = max(1, int(len(ranking) * quantile))
+        if len(ranking) < 2 or member_idx not in ranking[:cut]:
+            continue
+
+        donor_idx = rng.choice(ranking[-cut:])
+        if donor_idx == member_idx:
+            continue
+        donor_manager = CheckpointManager(os.path.join(checkpoint_dir, f"member-{donor_idx}"))
+        try:
+            donor_manager.load_latest(agent, mmap=False)
+        except (OSError, ValueError, RuntimeError):
+            continue  # the donor was replacing its snapshot, try on the next round
+
+        # explore: perturb the hyperparameters of the donor
+        params = perturb_hyperparams(board[donor_idx]["params"], rng)
+        set_hyperparams(agent, params)
+        history[-1]["exploited"] = donor_idx
+        history[-1]["params"] = params
+
+    return {
+        "member": member_idx,
+        "params": get_hyperparams(agent, list(params.keys())),
+        "avg_last_100": stats.get_average_score_last_100(),
+        "top_score": stats.top_score,
+        "history": history,
+    }
+
+
+class PopulationManager:
+    """
+    Population-based training of a DQN pilot.
+
+    `population_size` members train concurrently, one process each, from random hyperparameters.
+    Every `ready_every` epochs a member posts its average of the last 100 scores to a shared
+    scoreboard and snapshots itself with `CheckpointManager`. A member in the bottom `quantile`
+    then loads the snapshot of a member in the top `quantile` and perturbs its hyperparameters,
+    so good schedules spread through the population within one run.
+    """
+    def __init__(self, ai_name: str, grid_size: Tuple[int, int], feed_amount: int, clear_goal: float, population_size: int = None, space: Dict[str, any] = None,
+                 ready_every: int = 200, quantile: float = 0.25, checkpoint_dir: str = "population", seed: int = 0):
+        """
+        Create PopulationManager Class
+
+        Args:
+            ai_name (str): Name of a DQN pilot in `AIManager`.
+            grid_size (Tuple[int, int]): Size of the grid as (width, height).
+            feed_amount (int): Number of feeds spawned at once.
+            clear_goal (float): Ratio of the grid to be filled to clear the game.
+            population_size (int): Number of members. `None` for the number of cores.
+            space (Dict[str, any]): Ranges of the initial hyperparameters, see `sample_configs()`.
+                Only `lr` and attributes of `DQNAgent` can be perturbed. Defaults to `DEFAULT_SPACE`.
+            ready_every (int): Epochs between two exploit/explore steps of a member.
+            quantile (float): Share of the population copied from, and copying.
+            checkpoint_dir (str): Directory of the members' snapshots.
+            seed (int): Base seed of the members.
+        """
+        if ai_name not in AI_FACTORIES or AI_FACTORIES[ai_name] is not DQNAI:
+            raise ValueError(f"parameter(ai_name) must be a DQN pilot: {ai_name}")
+        if not 0 < quantile <= 0.5:
+            raise ValueError(f"parameter(quantile) must be in (0, 0.5]: {quantile}")
+
+        self.ai_name = ai_name
+        self.grid_size = grid_size
+        self.feed_amount = feed_amount
+        self.clear_goal = clear_goal
+        self.population_size = population_size if population_size is not None else multiprocessing.cpu_count()
+        self.space = space if space is not None else DEFAULT_SPACE
+        self.ready_every = ready_every
+        self.quantile = quantile
+        self.checkpoint_dir = checkpoint_dir
+        self.seed = seed
+
+        self.results: List[Dict[str, any]] = []
+
+    def train(self, epoch_num: int, verbose: bool = True) -> List[Dict[str, any]]:
+        """
+        Train every member for `epoch_num` epochs
+
+        Returns:
+            List[Dict[str, any]]: One row per member, the best average of the last 100 scores first.
+        """
+        configs = sample_configs(self.space, RANDOM, self.population_size, self.seed)
+        context = multiprocessing.get_context("spawn")
+
+        start_time = time.perf_counter()
+        # all members run at once, the exploit step needs the others' recent scores
+        with context.Manager() as sync_manager, ProcessPoolExecutor(self.population_size, mp_context=context) as executor:
+            scoreboard = sync_manager.dict()
+            scoreboard_lock = sync_manager.Lock()
+
+            futures = []
+            for member_idx, params in enumerate(configs):
+                args = (member_idx, self.ai_name, params, self.grid_size, self.feed_amount, self.clear_goal,
+                        epoch_num, self.ready_every, self.quantile, self.checkpoint_dir, self.seed + member_idx, scoreboard, scoreboard_lock)
+                futures.append(executor.submit(_run_member, *args))
+
+            for future in as_completed(futures):
+                result = future.result()
+                self.results.append(result)
+                if verbose:
+                    exploit_num = sum(1 for entry in result["history"] if entry["exploited"] is not None)
+                    print(f"member {result['member']} done | avg last 100 {result['avg_last_100']:,.3f} | exploited {exploit_num} times | {result['params']}")
+
+        self.results.sort(key=lambda result: result["avg_last_100"], reverse=True)
+        if verbose:
+            print(f"best member {self.results[0]['member']} in {time.perf_counter() - start_time:,.1f}s: {self.results[0]['params']}")
+        return self.results
+
+    def get_best_checkpoint_manager(self) -> CheckpointManager:
+        """Snapshots of the best member, to load it with `load_latest()`"""
+        return CheckpointManager(os.path.join(self.checkpoint_dir, f"member-{self.results[0]['member']}"))
+
+    def write_results(self, file_path: str):
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+        with open(file_path, 'w') as f:
+            json.dump(self.results, f, indent=4)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Population-based training of a DQN pilot on several processes")
+    parser.add_argument("ai_name", choices=[name for name, factory in AI_FACTORIES.items() if factory is DQNAI])
+    parser.add_argument("--space", default=None, help="initial hyperparameter ranges as json, or the path of a json file")
+    parser.add_argument("--population", type=int, default=None)
+    parser.add_argument("--epochs", type=int, default=2000)
+    parser.add_argument("--ready-every", type=int, default=200)
+    parser.add_argument("--quantile", type=float, default=0.25)
+    parser.add_argument("--grid", type=int, nargs=2, default=[10, 10], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--feeds", type=int, default=3)
+    parser.add_argument("--clear-goal", type=float, default=0.75)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint-dir", default="population")
+    parser.add_argument("--output", default=None, help="write the members' results and histories as json")
+    args = parser.parse_args()
+
+    space = None
+    if args.space is not None:
+        if os.path.exists(args.space):
+            with open(args.space, 'r') as f:
+                space = json.load(f)
+        else:
+            space = json.loads(args.space)
+
+    manager = PopulationManager(args.ai_name, tuple(args.grid), args.feeds, args.clear_goal, args.population, space,
+                                args.ready_every, args.quantile, args.checkpoint_dir, args.seed)
+    manager.train(args.epochs)
+    if args.output is not None:
+        manager.write_results(args.output)
@@ -0,0 +1,235 @@
+import argparse
+import csv
+import itertools
+import json
+import math
+import multiprocessing
+import os
+import random
+import statistics
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import torch
+
+from scripts.manager.ai_manager import AIManager, AI_FACTORIES
+from scripts.manager.training_manager import TrainingStats
+from scripts.game.headless_pilot_game import HeadlessPilotGame
+
+from typing import Tuple, List, Dict
+
+# search modes
+GRID = "grid"
+RANDOM = "random"
+
+def sample_configs(space: Dict[str, any], mode: str, trial_num: int = None, seed: int = 0) -> List[Dict[str, any]]:
+    """
+    Get the hyperparameter sets to try.
+
+    Args:
+        space (Dict[str, any]): Search space, parameter -> candidates.
+            A list holds the values to choose from. For the random mode, a dict
+            `{"low": ..., "high": ..., "log": bool}` is a range, sampled as int if both bounds are.
+        mode (str): `"grid"` for every combination of the lists, `"random"` for `trial_num` random draws.
+        trial_num (int): Number of draws of the random mode.
+        seed (int): Seed of the random draws.
+
+    Returns:
+        List[Dict[str, any]]: One parameter dict per trial.
+    """
+    if mode == GRID:
+        for name, values in space.items():
+            if not isinstance(values, list):
+                raise ValueError(f"parameter({name}) must be a list of values on the grid mode: {values}")
+        names = list(space.keys())
+        return [dict(zip(names, values)) for values in itertools.product(*(space[name] for name in names))]
+
+    elif mode == RANDOM:
+        if trial_num is None:
+            raise ValueError("parameter(trial_num) must be given on the random mode")
+        rng = random.Random(seed)
+        return [{name: sample_value(rng, values) for name, values in space.items()} for _ in range(trial_num)]
+
+    raise ValueError(f"parameter(mode) must be the one of [{GRID}, {RANDOM}]: {mode}")
+
+def sample_value(rng: random.Random, values):
+    if isinstance(values, list):
+        return rng.choice(values)
+
+    low, high = values["low"], values["high"]
+    if values.get("log", False):
+        value = math.exp(rng.uniform(math.log(low), math.log(high)))
+    else:
+        value = rng.uniform(low, high)
+    return int(round(value)) if isinstance(low, int) and isinstance(high, int) else value
+
+
+# about trial process
+def _run_trial(trial_idx: int, ai_name: str, params: Dict[str, any], grid_size: Tuple[int, int], feed_amount: int, clear_goal: float,
+               epoch_num: int, eval_every: int, min_epochs: int, min_score: float, seed: int, reports: list) -> Dict[str, any]:
+    """
+    Train one pilot and stop it early if its average of the last 100 scores is poor,
+    either below `min_score` or below the median of the other trials at the same epoch.
+    """
+    torch.set_num_threads(1)  # every trial gets one core
+    random.seed(seed)
+    np.random.seed(seed)
+    torch.manual_seed(seed)
+
+    start_time = time.perf_counter()
+    ai = AIManager.create_ai(ai_name, **params)
+    game = HeadlessPilotGame(ai, grid_size, feed_amount, clear_goal)
+    stats = TrainingStats()
+
+    pruned = False
+    while stats.get_epoch() < epoch_num:
+        stats.add_score(game.play_episode(seed if stats.get_epoch() == 0 else None))
+
+        epoch = stats.get_epoch()
+        if epoch % eval_every != 0 or epoch < min_epochs:
+            continue
+
+        average = stats.get_average_score_last_100()
+        others = [score for report_epoch, score in list(reports) if report_epoch == epoch]
+        reports.append((epoch, average))
+
+        if average < min_score or (len(others) >= 2 and average < statistics.median(others)):
+            pruned = True
+            break
+
+    return {
+        "trial": trial_idx,
+        **params,
+        "epochs": stats.get_epoch(),
+        "avg_last_100": stats.get_average_score_last_100(),
+        "top_score": stats.top_score,
+        "overall_avg": stats.get_average_score(),
+        "pruned": pruned,
+        "seconds": time.perf_counter() - start_time,
+    }
+
+
+class SweepManager:
+    """
+    Runs hyperparameter trials of an AIManager pilot in a process pool, one trial per process.
+
+    Every `eval_every` epochs past `min_epochs`, a trial is stopped if its average of the last 100 scores
+    is below `min_score`, or below the median reported by the other trials at the same epoch.
+    Results are gathered into a table, best trials first.
+    """
+    def __init__(self, ai_name: str, configs: List[Dict[str, any]], grid_size: Tuple[int, int], feed_amount: int, clear_goal: float, worker_num: int = None,
+                 eval_every: int = 100, min_epochs: int = 300, min_score: float = 0.0, seed: int = 0):
+        """
+        Create SweepManager Class
+
+        Args:
+            ai_name (str): Name of the pilot in `AIManager`.
+            configs (List[Dict[str, any]]): Parameter sets to try, see `sample_configs()`.
+            grid_size (Tuple[int, int]): Size of the grid as (width, height).
+            feed_amount (int): Number of feeds spawned at once.
+            clear_goal (float): Ratio of the grid to be filled to clear the game.
+            worker_num (int): Number of trials run at once. `None` for the number of cores.
+            eval_every (int): Epochs between two early stopping checks.
+            min_epochs (int): Epochs every trial plays before it may be stopped.
+            min_score (float): Average of the last 100 scores under which a trial is stopped.
+            seed (int): Base seed of the trials.
+        """
+        if ai_name not in AI_FACTORIES:
+            raise ValueError(f"Unknown AI on `SweepManager()`: {ai_name}")
+
+        self.ai_name = ai_name
+        self.configs = configs
+        self.grid_size = grid_size
+        self.feed_amount = feed_amount
+        self.clear_goal = clear_goal
+        self.worker_num = worker_num if worker_num is not None else multiprocessing.cpu_count()
+        self.eval_every = eval_every
+        self.min_epochs = min_epochs
+        self.min_score = min_score
+        self.seed = seed
+
+        self.results: List[Dict[str, any]] = []
+
+    def run(self, epoch_num: int, verbose: bool = True) -> List[Dict[str, any]]:
+        """
+        Run every trial for up to `epoch_num` epochs
+
+        Returns:
+            List[Dict[str, any]]: One row per trial, the best average of the last 100 scores first.
+        """
+        context = multiprocessing.get_context("spawn")
+
+        with context.Manager() as sync_manager, ProcessPoolExecutor(self.worker_num, mp_context=context) as executor:
+            reports = sync_manager.list()  # (epoch, avg last 100) of every check, shared for the median rule
+
+            futures = []
+            for trial_idx, params in enumerate(self.configs):
+                args = (trial_idx, self.ai_name, params, self.grid_size, self.feed_amount, self.clear_goal,
+                        epoch_num, self.eval_every, self.min_epochs, self.min_score, self.seed + trial_idx, reports)
+                futures.append(executor.submit(_run_trial, *args))
+
+            for future in as_completed(futures):
+                result = future.result()
+                self.results.append(result)
+                if verbose:
+                    status = "pruned" if result["pruned"] else "done"
+                    print(f"trial {result['trial']} {status} on epoch {result['epochs']:,} | avg last 100 {result['avg_last_100']:,.3f} | {self.configs[result['trial']]}")
+
+        self.results.sort(key=lambda result: result["avg_last_100"], reverse=True)
+        return self.results
+
+    def write_results(self, file_path: str):
+        """
+        Write the results table as csv, or as json if `file_path` ends with `.json`
+        """
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+
+        if file_path.endswith(".json"):
+            with open(file_path, 'w') as f:
+                json.dump(self.results, f, indent=4)
+            return
+
+        columns = ["trial", *dict.fromkeys(name for params in self.configs for name in params), "epochs", "avg_last_100", "top_score", "overall_avg", "pruned", "seconds"]
+        with open(file_path, 'w', newline='') as f:
+            writer = csv.DictWriter(f, columns)
+            writer.writeheader()
+            writer.writerows(self.results)
+
+    def to_text(self, row_num: int = 10) -> str:
+        lines = []
+        for rank, result in enumerate(self.results[:row_num], 1):
+            lines.append(f"#{rank} trial {result['trial']} | avg last 100 {result['avg_last_100']:,.3f} | top {result['top_score']:,} | {self.configs[result['trial']]}")
+        return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Search the hyperparameters of an AI pilot on several processes")
+    parser.add_argument("ai_name", choices=list(AI_FACTORIES.keys()))
+    parser.add_argument("space", help="search space as json, or the path of a json file (see `sample_configs()`)")
+    parser.add_argument("--mode", choices=[GRID, RANDOM], default=GRID)
+    parser.add_argument("--trials", type=int, default=None, help="number of draws of the random mode")
+    parser.add_argument("--epochs", type=int, default=2000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--eval-every", type=int, default=100)
+    parser.add_argument("--min-epochs", type=int, default=300)
+    parser.add_argument("--min-score", type=float, default=0.0)
+    parser.add_argument("--grid", type=int, nargs=2, default=[10, 10], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--feeds", type=int, default=3)
+    parser.add_argument("--clear-goal", type=float, default=0.75)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default="sweep_results.csv", help="results table, csv or json by extension")
+    args = parser.parse_args()
+
+    if os.path.exists(args.space):
+        with open(args.space, 'r') as f:
+            space = json.load(f)
+    else:
+        space = json.loads(args.space)
+
+    configs = sample_configs(space, args.mode, args.trials, args.seed)
+    manager = SweepManager(args.ai_name, configs, tuple(args.grid), args.feeds, args.clear_goal, args.workers,
+                           args.eval_every, args.min_epochs, args.min_score, args.seed)
+    manager.run(args.epochs)
+    manager.write_results(args.output)
+    print(manager.to_text())
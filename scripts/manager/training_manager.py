@@ -0,0 +1,241 @@
+import argparse
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import torch
+
+from scripts.manager.ai_manager import AIManager, AI_FACTORIES
+from scripts.manager.checkpoint_manager import CheckpointManager, get_checkpoint_agent
+from scripts.game.headless_pilot_game import HeadlessPilotGame
+from scripts.ai.base_ai import BaseAI
+
+from scripts.ai.q_learning import QLearningAI
+from scripts.ai.dqn import DQNAI
+from scripts.ai.policy_gradient import PolicyGradientAI
+
+from typing import Tuple, List, Dict
+
+# about pilot parameters shared between the learner and the workers
+def get_pilot_params(ai: BaseAI) -> Dict[str, any]:
+    """
+    Get what a worker needs to act like the learner, `None` for pilots that do not learn
+    """
+    if isinstance(ai, DQNAI):
+        return {"policy_net": ai.agent.policy_net.state_dict(), "epsilon": ai.agent.epsilon}
+    elif isinstance(ai, PolicyGradientAI):
+        return {"policy_net": ai.agent.policy_net.state_dict()}
+    elif isinstance(ai, QLearningAI):
+        return {"q_table": np.array(ai.agent.q_table), "epsilon": ai.agent.epsilon}
+    return None
+
+def set_pilot_params(ai: BaseAI, params: Dict[str, any]):
+    if params is None:
+        return
+
+    if isinstance(ai, (DQNAI, PolicyGradientAI)):
+        ai.agent.policy_net.load_state_dict(params["policy_net"])
+    elif isinstance(ai, QLearningAI):
+        ai.agent.q_table[:] = params["q_table"]
+
+    if "epsilon" in params:
+        ai.agent.epsilon = params["epsilon"]
+
+def set_transition_sink(ai: BaseAI, sink: list):
+    if isinstance(ai, (DQNAI, PolicyGradientAI, QLearningAI)):
+        ai.agent.transition_sink = sink
+
+def learn_transitions(ai: BaseAI, transitions: list):
+    """
+    Train the learner on transitions collected by a worker, in the order they were played
+    """
+    if isinstance(ai, DQNAI):
+        for transition in transitions:
+            ai.agent.store_transition(*transition)
+            ai.agent.learn()
+    elif isinstance(ai, PolicyGradientAI):
+        for transition in transitions:
+            ai.agent.store_transition(*transition)
+            if transition[-1]:  # an episode ended
+                ai.agent.learn()
+    elif isinstance(ai, QLearningAI):
+        for transition in transitions:
+            ai.agent.learn(*transition)
+
+
+# about worker process
+_worker_game: HeadlessPilotGame = None
+_worker_sink: list = None
+
+def _init_worker(ai_name: str, grid_size: Tuple[int, int], feed_amount: int, clear_goal: float):
+    global _worker_game, _worker_sink
+
+    torch.set_num_threads(1)  # every worker gets one core
+
+    ai = AIManager.create_ai(ai_name)
+    _worker_sink = []
+    set_transition_sink(ai, _worker_sink)
+    _worker_game = HeadlessPilotGame(ai, grid_size, feed_amount, clear_goal)
+
+def _run_episodes(params: Dict[str, any], episode_num: int, seed: int) -> Tuple[List[int], list]:
+    set_pilot_params(_worker_game.pilot_ai, params)
+
+    scores = [_worker_game.play_episode(seed if idx == 0 else None) for idx in range(episode_num)]
+
+    transitions = list(_worker_sink)
+    _worker_sink.clear()
+
+    return scores, transitions
+
+
+class TrainingStats:
+    """
+    Epoch scores aggregated the same way AIPilotGame reports them.
+    Only the aggregates and the last 100 scores are kept, so the stats saved along every snapshot stay small.
+    """
+    def __init__(self):
+        self.epoch: int = 0
+        self.top_score: int = 0
+        self.score_sum: int = 0
+        self.last_scores: deque = deque(maxlen=100)
+
+    def add_score(self, score: int):
+        self.epoch += 1
+        self.score_sum += score
+        self.top_score = max(self.top_score, score)
+        self.last_scores.append(score)
+
+    def get_epoch(self) -> int:
+        return self.epoch
+
+    def get_average_score(self) -> float:
+        return self.score_sum / self.epoch if self.epoch else 0.0
+
+    def get_average_score_last_100(self) -> float:
+        return sum(self.last_scores) / len(self.last_scores) if self.last_scores else 0.0
+
+    # about checkpoint
+    def to_dict(self) -> Dict[str, any]:
+        return {"epoch": self.epoch, "top_score": self.top_score, "score_sum": self.score_sum, "last_scores": list(self.last_scores)}
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, any]) -> "TrainingStats":
+        stats = cls()
+        stats.epoch = data["epoch"]
+        stats.top_score = data["top_score"]
+        stats.score_sum = data["score_sum"]
+        stats.last_scores.extend(data["last_scores"])
+        return stats
+
+    def to_text(self) -> str:
+        return f"epoch {self.get_epoch():,} | top {self.top_score:,} | avg last 100 {self.get_average_score_last_100():,.3f} | overall avg {self.get_average_score():,.3f}"
+
+class TrainingManager:
+    """
+    Trains an AIManager pilot headlessly with `worker_num` processes.
+    Workers play episodes with a copy of the learner's parameters and ship the
+    transitions back, the learner trains on them and broadcasts new parameters every round.
+    """
+    def __init__(self, ai_name: str, grid_size: Tuple[int, int], feed_amount: int, clear_goal: float, worker_num: int = None, episodes_per_round: int = 10, seed: int = 0, checkpoint_manager: CheckpointManager = None):
+        """
+        Create TrainingManager Class
+
+        Args:
+            ai_name (str): Name of the pilot in `AIManager`.
+            grid_size (Tuple[int, int]): Size of the grid as (width, height).
+            feed_amount (int): Number of feeds spawned at once.
+            clear_goal (float): Ratio of the grid to be filled to clear the game.
+            worker_num (int): Number of worker processes. `None` for the number of cores.
+            episodes_per_round (int): Episodes each worker plays between two parameter broadcasts.
+            seed (int): Base seed of the workers' games.
+            checkpoint_manager (CheckpointManager): Resume from its latest snapshot and save new ones while training.
+        """
+        if ai_name not in AI_FACTORIES:
+            raise ValueError(f"Unknown AI on `TrainingManager()`: {ai_name}")
+
+        self.ai_name = ai_name
+        self.grid_size = grid_size
+        self.feed_amount = feed_amount
+        self.clear_goal = clear_goal
+        self.worker_num = worker_num if worker_num is not None else multiprocessing.cpu_count()
+        self.episodes_per_round = episodes_per_round
+        self.seed = seed
+
+        self.ai: BaseAI = AIManager.create_ai(ai_name)  # the learner
+        self.stats = TrainingStats()
+
+        self.checkpoint_manager = checkpoint_manager
+        self.agent = get_checkpoint_agent(self.ai)
+        if checkpoint_manager is not None and self.agent is not None:
+            meta = checkpoint_manager.load_latest(self.agent)
+            if meta is not None:
+                self.stats = TrainingStats.from_dict(meta["extra"])
+
+    def train(self, epoch_num: int, verbose: bool = True) -> TrainingStats:
+        """
+        Train until `epoch_num` games have been played in total.
+        """
+        context = multiprocessing.get_context("spawn")
+        init_args = (self.ai_name, self.grid_size, self.feed_amount, self.clear_goal)
+
+        with ProcessPoolExecutor(self.worker_num, mp_context=context, initializer=_init_worker, initargs=init_args) as executor:
+            round_idx = self.stats.get_epoch() // (self.worker_num * self.episodes_per_round)  # a resumed run keeps fresh seeds
+            while self.stats.get_epoch() < epoch_num:
+                params = get_pilot_params(self.ai)
+
+                remaining = epoch_num - self.stats.get_epoch()
+                futures = []
+                for worker_idx in range(self.worker_num):
+                    episode_num = min(self.episodes_per_round, remaining - worker_idx * self.episodes_per_round)
+                    if episode_num < 1:
+                        break
+                    seed = self.seed + round_idx * self.worker_num + worker_idx
+                    futures.append(executor.submit(_run_episodes, params, episode_num, seed))
+
+                for future in as_completed(futures):
+                    scores, transitions = future.result()
+                    for score in scores:
+                        self.stats.add_score(score)
+                    learn_transitions(self.ai, transitions)
+
+                round_idx += 1
+                if verbose:
+                    print(self.stats.to_text())
+
+                self.save_checkpoint(force=self.stats.get_epoch() >= epoch_num)
+
+        return self.stats
+
+    def save_checkpoint(self, force: bool = False):
+        if self.checkpoint_manager is None or self.agent is None:
+            return
+
+        extra = self.stats.to_dict()
+        if force:
+            self.checkpoint_manager.save(self.agent, self.stats.get_epoch(), extra)
+        else:
+            self.checkpoint_manager.maybe_save(self.agent, self.stats.get_epoch(), extra)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Train an AI pilot headlessly on several processes")
+    parser.add_argument("ai_name", choices=list(AI_FACTORIES.keys()))
+    parser.add_argument("--epochs", type=int, default=1000)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--episodes-per-round", type=int, default=10)
+    parser.add_argument("--grid", type=int, nargs=2, default=[10, 10], metavar=("WIDTH", "HEIGHT"))
+    parser.add_argument("--feeds", type=int, default=3)
+    parser.add_argument("--clear-goal", type=float, default=0.75)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--checkpoint-dir", default=None, help="resume from and save snapshots into this directory")
+    parser.add_argument("--checkpoint-every", type=int, default=1000, help="epochs between two snapshots")
+    parser.add_argument("--checkpoint-memory", action="store_true", help="also snapshot the replay memory")
+    args = parser.parse_args()
+
+    checkpoint_manager = None
+    if args.checkpoint_dir is not None:
+        checkpoint_manager = CheckpointManager(args.checkpoint_dir, args.checkpoint_every, with_memory=args.checkpoint_memory)
+
+    manager = TrainingManager(args.ai_name, tuple(args.grid), args.feeds, args.clear_goal, args.workers, args.episodes_per_round, args.seed, checkpoint_manager)
+    manager.train(args.epochs)
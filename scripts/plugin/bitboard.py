@@ -0,0 +1,79 @@
+from typing import Tuple, List, Iterable
+
+class Bitboard:
+    """
+    Encodes sets of cells of a grid as Python big-int bitboards.
+
+    Each row is stored with one extra guard bit on its right end,
+    so shifting by one never wraps a cell onto the next row.
+    The bit of (x, y) is `1 << (y * stride + x)` with `stride = width + 1`.
+    """
+    def __init__(self, grid_size: Tuple[int, int]):
+        """
+        Create Bitboard Class
+
+        Args:
+            grid_size (Tuple[int, int]): Size of the grid as (width, height).
+        """
+        self.grid_size = grid_size
+        self.width, self.height = grid_size
+        self.stride = self.width + 1
+
+        row_mask = (1 << self.width) - 1
+        self.board_mask: int = 0  # every cell inside the grid
+        for y in range(self.height):
+            self.board_mask |= row_mask << (y * self.stride)
+
+    def is_in_bound(self, coord: Tuple[int, int]) -> bool:
+        return (0 <= coord[0] < self.width) and (0 <= coord[1] < self.height)
+
+    def get_bit(self, coord: Tuple[int, int]) -> int:
+        """
+        Get the bit of the given coordinate, `0` if it is out of the grid
+        """
+        if not self.is_in_bound(coord):
+            return 0
+        return 1 << (coord[1] * self.stride + coord[0])
+
+    def from_coords(self, coords: Iterable[Tuple[int, int]]) -> int:
+        bits = 0
+        for coord in coords:
+            bits |= self.get_bit(coord)
+        return bits
+
+    def to_coords(self, bits: int) -> List[Tuple[int, int]]:
+        coords = []
+        while bits:
+            low_bit = bits & -bits
+            index = low_bit.bit_length() - 1
+            coords.append((index % self.stride, index // self.stride))
+            bits ^= low_bit
+        return coords
+
+    def count(self, bits: int) -> int:
+        return bits.bit_count()
+
+    def expand(self, bits: int) -> int:
+        """
+        Get the given cells together with their 4-directional neighbours inside the grid
+        """
+        return (bits | (bits << 1) | (bits >> 1) | (bits << self.stride) | (bits >> self.stride)) & self.board_mask
+
+    def flood_fill(self, seed_bits: int, free_bits: int) -> int:
+        """
+        Get every cell of `free_bits` 4-directionally connected to `seed_bits`.
+
+        Args:
+            seed_bits (int): Cells to start from. Cells outside `free_bits` are ignored.
+            free_bits (int): Cells that can be passed through.
+
+        Returns:
+            int: Bits of the reachable region.
+        """
+        free_bits &= self.board_mask
+        region = seed_bits & free_bits
+        while True:
+            grown = self.expand(region) & free_bits
+            if grown == region:
+                return region
+            region = grown
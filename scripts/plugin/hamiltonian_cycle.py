@@ -0,0 +1,152 @@
+import json
+import os
+
+from constants import DIR_OFFSET_DICT, HAMILTONIAN_CYCLE_DIRECTORY
+
+from typing import Tuple, List, Dict
+
+OFFSET_DIR_DICT = {offset: dir for dir, offset in DIR_OFFSET_DICT.items()}
+
+def build_cycle_coords(grid_size: Tuple[int, int]) -> List[Tuple[int, int]]:
+    """
+    Build a cycle visiting every cell of the grid once.
+
+    Column 0 is the way back north, the other columns are covered by a row zig-zag.
+    An odd x odd grid has no Hamiltonian cycle, so its bottom-right corner is skipped:
+    the last two rows are covered by a column zig-zag running
+    (W-1, H-2) -> (W-2, H-2) -> (W-2, H-1), around the corner.
+    If only the width is even, the grid is built transposed.
+
+    Args:
+        grid_size (Tuple[int, int]): Size of the grid as (width, height).
+
+    Returns:
+        List[Tuple[int, int]]: Coordinates in the order of the cycle, starting at (0, 0).
+    """
+    width, height = grid_size
+    if width < 2 or height < 2:
+        raise ValueError(f"Grid too small for a cycle: {grid_size}")
+
+    if height % 2 == 1 and width % 2 == 0:
+        return [(y, x) for x, y in build_cycle_coords((height, width))]
+
+    coords = [(0, 0)]
+    zigzag_rows = height if height % 2 == 0 else height - 2
+    for y in range(zigzag_rows):
+        xs = range(1, width) if y % 2 == 0 else range(width - 1, 0, -1)
+        coords.extend((x, y) for x in xs)
+
+    if height % 2 == 1:  # odd x odd, the bottom-right corner is left out
+        coords.append((width - 1, height - 2))
+        for idx, x in enumerate(range(width - 2, 0, -1)):
+            ys = (height - 2, height - 1) if idx % 2 == 0 else (height - 1, height - 2)
+            coords.extend((x, y) for y in ys)
+
+    coords.extend((0, y) for y in range(height - 1, 0, -1))
+    return coords
+
+class HamiltonianCycle:
+    """
+    Precomputed cycle tables of a grid size: the order of every cell on the cycle,
+    and the direction to the next cell of the cycle.
+
+    Tables are built once per grid size, kept in memory,
+    and cached on disk as json under `HAMILTONIAN_CYCLE_DIRECTORY`.
+    On odd x odd grids the skipped corner shares the order of the cell
+    it can replace, so it can still be visited as a detour.
+    """
+    _loaded: Dict[Tuple[int, int], "HamiltonianCycle"] = {}
+
+    def __init__(self, grid_size: Tuple[int, int], orders: List[int], next_dirs: str):
+        """
+        Create HamiltonianCycle Class
+
+        Args:
+            grid_size (Tuple[int, int]): Size of the grid as (width, height).
+            orders (List[int]): Order on the cycle of every cell, indexed by `y * width + x`.
+            next_dirs (str): Direction to the next cell of the cycle of every cell, same indexing.
+        """
+        self.grid_size = tuple(grid_size)
+        self.orders = orders
+        self.next_dirs = next_dirs
+        self.length: int = max(orders) + 1  # number of cells on the cycle
+
+        # the bottom-right corner left out on odd x odd grids, entered from (W-1, H-2) as a detour
+        width, height = self.grid_size
+        self.skipped_corner: Tuple[int, int] = (width - 1, height - 1) if self.length < width * height else None
+        self.detour_entry: Tuple[int, int] = (width - 1, height - 2) if self.skipped_corner is not None else None
+
+    @classmethod
+    def get(cls, grid_size: Tuple[int, int], cache_dir: str = HAMILTONIAN_CYCLE_DIRECTORY) -> "HamiltonianCycle":
+        """
+        Get the tables of the grid size, from memory, the disk cache, or built anew
+        """
+        grid_size = tuple(grid_size)
+        if grid_size in cls._loaded:
+            return cls._loaded[grid_size]
+
+        file_path = os.path.join(cache_dir, f"{grid_size[0]}x{grid_size[1]}.json")
+        if os.path.exists(file_path):
+            cycle = cls.load(file_path)
+        else:
+            cycle = cls.build(grid_size)
+            cycle.save(file_path)
+
+        cls._loaded[grid_size] = cycle
+        return cycle
+
+    @classmethod
+    def build(cls, grid_size: Tuple[int, int]) -> "HamiltonianCycle":
+        width, height = grid_size
+        coords = build_cycle_coords(grid_size)
+
+        orders = [0] * (width * height)
+        next_dirs = ['E'] * (width * height)
+        for order, coord in enumerate(coords):
+            next_coord = coords[(order + 1) % len(coords)]
+            orders[coord[1] * width + coord[0]] = order
+            next_dirs[coord[1] * width + coord[0]] = OFFSET_DIR_DICT[(next_coord[0] - coord[0], next_coord[1] - coord[1])]
+
+        if len(coords) < width * height:
+            # the skipped corner takes the place of (W-2, H-2), between (W-1, H-2) and (W-2, H-1)
+            corner = (width - 1) + (height - 1) * width
+            orders[corner] = orders[(width - 2) + (height - 2) * width]
+            next_dirs[corner] = 'W'
+
+        return cls(grid_size, orders, "".join(next_dirs))
+
+    @classmethod
+    def load(cls, file_path: str) -> "HamiltonianCycle":
+        with open(file_path, 'r') as f:
+            data = json.load(f)
+        return cls(data["grid_size"], data["orders"], data["next_dirs"])
+
+    def save(self, file_path: str):
+        os.makedirs(os.path.dirname(file_path) or ".", exist_ok=True)
+
+        # write aside and swap, so concurrent readers never see a partial file
+        temp_path = f"{file_path}.{os.getpid()}.tmp"
+        with open(temp_path, 'w') as f:
+            json.dump({"grid_size": list(self.grid_size), "orders": self.orders, "next_dirs": self.next_dirs}, f)
+        os.replace(temp_path, file_path)
+
+
+    # about lookup
+    def get_order(self, coord: Tuple[int, int]) -> int:
+        return self.orders[coord[1] * self.grid_size[0] + coord[0]]
+
+    def get_next_dir(self, coord: Tuple[int, int]) -> str:
+        return self.next_dirs[coord[1] * self.grid_size[0] + coord[0]]
+
+    def get_detour_dir(self, coord: Tuple[int, int]) -> str:
+        """
+        Get the direction into the skipped corner if `coord` is the cell the detour starts from, else `None`.
+        The corner takes the place of (W-2, H-2) on that lap, so the cycle order is kept.
+        """
+        return 'S' if coord == self.detour_entry else None
+
+    def get_distance(self, coord_from: Tuple[int, int], coord_to: Tuple[int, int]) -> int:
+        """
+        Get how many cells ahead `coord_to` is from `coord_from` along the cycle
+        """
+        return (self.get_order(coord_to) - self.get_order(coord_from)) % self.length
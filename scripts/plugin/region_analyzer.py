@@ -0,0 +1,64 @@
+from typing import Tuple, List, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from scripts.plugin.bitboard import Bitboard
+
+class RegionAnalyzer:
+    """
+    Labels the connected free regions of a grid, so the reachable area from
+    several cells costs one flood fill per region instead of one per cell.
+
+    Regions are not labeled in one pass over preallocated label buffers:
+    each is labeled lazily, the first time a cell of it is queried, by a bitwise
+    flood fill over big-int bitboards. Every region is filled at most once per analysis,
+    regions no query reaches are never filled, and neighbouring cells usually share a region,
+    which then costs a single fill. Only the list of regions is kept across analyses.
+    """
+    def __init__(self, bitboard: "Bitboard"):
+        """
+        Create RegionAnalyzer Class
+
+        Args:
+            bitboard (Bitboard): Bitboard geometry of the grid.
+        """
+        self.bitboard = bitboard
+        self.free_bits: int = bitboard.board_mask
+        self.regions: List[Tuple[int, int]] = []  # label -> (bits, size), reused on every analysis
+
+    def analyze(self, blocked_bits: int):
+        """
+        Start a new analysis with the given cells blocked (e.g. the player's bodies).
+        """
+        self.free_bits = self.bitboard.board_mask & ~blocked_bits
+        self.regions.clear()
+
+    def get_region_label(self, coord: Tuple[int, int]) -> int:
+        """
+        Get the label of the region holding the given coordinate,
+        `-1` if it is blocked or out of the grid.
+        """
+        bit = self.bitboard.get_bit(coord)
+        if not bit & self.free_bits:
+            return -1
+
+        for label, (region_bits, _) in enumerate(self.regions):
+            if bit & region_bits:
+                return label
+
+        region_bits = self.bitboard.flood_fill(bit, self.free_bits)
+        self.regions.append((region_bits, self.bitboard.count(region_bits)))
+        return len(self.regions) - 1
+
+    def get_region_bits(self, coord: Tuple[int, int]) -> int:
+        """
+        Get the cells reachable from the given coordinate (itself included) as bits
+        """
+        label = self.get_region_label(coord)
+        return 0 if label < 0 else self.regions[label][0]
+
+    def get_region_size(self, coord: Tuple[int, int]) -> int:
+        """
+        Get the number of free cells reachable from the given coordinate (itself included)
+        """
+        label = self.get_region_label(coord)
+        return 0 if label < 0 else self.regions[label][1]
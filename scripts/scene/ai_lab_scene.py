@@ -8,6 +8,7 @@ from matplotlib.ticker import MaxNLocator
 from .base_scene import BaseScene
 from scripts.ui.ui_components import UILayout, RelativeRect
 from scripts.manager.ai_manager import AIManager
+from scripts.manager.checkpoint_manager import CheckpointManager, get_checkpoint_agent
 
 from scripts.game.ai_pilot_game import AIPilotGame
 
@@ -27,6 +28,11 @@ class AILabScene(BaseScene):
         self.ai_manager: AIManager = AIManager()
         self.ai = None
         self.target_ai_name = None
+
+        # learned pilots resume from their last checkpoint, once per pilot
+        self.checkpoint_managers: Dict[str, CheckpointManager] = {}
+        self.checkpoint_manager: CheckpointManager = None
+        self.checkpoint_epoch_base: int = 0  # epochs trained in the former sessions
         
         self.ui_state = CONFIG
 
@@ -83,6 +89,34 @@ class AILabScene(BaseScene):
     def initialize_ai(self):
         # Initialize the ai with the given settings
         self.ai = self.ai_manager.get_ai(self.target_ai_name)
+        self.resume_ai_checkpoint()
+
+    def resume_ai_checkpoint(self):
+        self.checkpoint_manager = None
+        self.checkpoint_epoch_base = 0
+
+        agent = get_checkpoint_agent(self.ai)
+        if agent is None:
+            return
+
+        if self.target_ai_name not in self.checkpoint_managers:
+            checkpoint_manager = CheckpointManager.for_ai(self.target_ai_name, save_every=CHECKPOINT_PERIOD, with_memory=True)
+            checkpoint_manager.load_latest(agent)
+            self.checkpoint_managers[self.target_ai_name] = checkpoint_manager
+
+        self.checkpoint_manager = self.checkpoint_managers[self.target_ai_name]
+        self.checkpoint_epoch_base = self.checkpoint_manager.last_saved_step or 0
+
+    def save_ai_checkpoint(self, epoch: int, force: bool = False):
+        if self.checkpoint_manager is None:
+            return
+
+        agent = get_checkpoint_agent(self.ai)
+        step = self.checkpoint_epoch_base + epoch
+        if force:
+            self.checkpoint_manager.save(agent, step)
+        else:
+            self.checkpoint_manager.maybe_save(agent, step)
 
     def initialize_game(self, settings: Dict[str, any]):
         # Initialize the game with the given settings
@@ -102,6 +136,7 @@ class AILabScene(BaseScene):
         self.scores = []
         self.average_score_last_100 = []
         self.overall_average_score = []
+        self.is_figure_dirty: bool = False
 
         self.plot_scores, = self.ax.plot([], [], label="Scores", marker='o', color='skyblue')
         self.plot_average_scores_last_100, = self.ax.plot([], [], label="Average Score(Last 100)", linestyle='--', color='red')
@@ -151,6 +186,7 @@ class AILabScene(BaseScene):
         self.set_ui_state(IN_GAME)
     
     def restart_new_game(self):
+        self.save_ai_checkpoint(self.game.scores["epoch"], force=True)
         self.set_ui_state(CONFIG)
         self.manager.finish_to_record()
         self.game = None
@@ -163,13 +199,23 @@ class AILabScene(BaseScene):
     def return_to_main_scene(self):
         self.manager.set_active_scene("MainScene")
     
-    def add_score_to_figure(self, epoch: int, score: int):
+    def add_score_to_figure(self, epoch: int, score: int, redraw: bool = True):
         self.epochs.append(epoch)
         self.scores.append(score)
         last_data_num = min(len(self.scores), 100)
         self.average_score_last_100.append(sum(self.scores[-last_data_num:]) / last_data_num)
         self.overall_average_score.append(self.get_average_score())
 
+        self.is_figure_dirty = True
+        if redraw:
+            self.refresh_figure()
+
+    def refresh_figure(self):
+        if not self.is_figure_dirty:
+            return
+        self.is_figure_dirty = False
+
+        last_data_num = min(len(self.scores), 100)
         self.plot_scores.set_data(self.epochs[-last_data_num:], self.scores[-last_data_num:])
         self.plot_average_scores_last_100.set_data(self.epochs[-last_data_num:], self.average_score_last_100[-last_data_num:])
         self.plot_overall_average_scores.set_data(self.epochs[-last_data_num:], self.overall_average_score[-last_data_num:])
@@ -0,0 +1,25 @@
+import random
+
+import pytest
+
+from scripts.game.snake_simulation import SnakeSimulation, GameSnapshot
+from scripts.manager.state_manager import GameState
+
+
+def restore_simulation(grid_size, bodies, feeds, direction: str = None) -> SnakeSimulation:
+    """
+    SnakeSimulation restored on an arbitrary board, every cell neither body nor feed being free.
+    Bodies go from the head to the tail, feeds are all 'normal'.
+    """
+    taken = set(bodies) | set(feeds)
+    free_cells = [(x, y) for y in range(grid_size[1]) for x in range(grid_size[0]) if (x, y) not in taken]
+
+    sim = SnakeSimulation(tuple(grid_size), len(feeds), 1.0)
+    sim.restore(GameSnapshot(tuple(bodies), direction, tuple((coord, 'normal') for coord in feeds), tuple(free_cells),
+                             0, 0, GameState.ACTIVE, random.Random().getstate()))
+    return sim
+
+
+@pytest.fixture
+def make_simulation():
+    return restore_simulation
@@ -0,0 +1,64 @@
+import numpy as np
+
+from scripts.ai.feature_extractor import FeatureExtractor
+from scripts.game.batch_snake_env import BatchSnakeEnv
+from scripts.manager.batch_training_manager import BatchTrainingManager
+
+
+def test_states_match_feature_extractor(make_simulation):
+    env = BatchSnakeEnv(16, (8, 6), 3, 1.0, seed=0)
+    extractor = FeatureExtractor()
+    rng = np.random.default_rng(0)
+
+    env.reset()
+    for _ in range(30):
+        states = env.get_states()
+        for env_idx in np.flatnonzero(~env.dones):
+            np.testing.assert_allclose(states[env_idx], extractor.extract(make_simulation(env.grid_size, env.get_bodies(env_idx), env.get_feed_coords(env_idx))), err_msg=f"env {env_idx}")
+
+        env.step(rng.integers(0, 4, env.num_envs))
+        env.reset_done()
+
+
+def count_calls(obj, name: str) -> dict:
+    counts = {"calls": 0}
+    method = getattr(obj, name)
+    def counted(*args, **kwargs):
+        counts["calls"] += 1
+        return method(*args, **kwargs)
+    setattr(obj, name, counted)
+    return counts
+
+
+def test_batch_training_manager_trains_dqn_once_per_lockstep():
+    manager = BatchTrainingManager("DQN", (6, 6), 2, 0.75, env_num=8, seed=0)
+    steps = count_calls(manager.env, "step")
+    updates = count_calls(manager.agent, "update")
+    stats = manager.train(40, verbose=False)
+
+    assert stats.get_epoch() >= 40
+    assert len(manager.agent.memory) == 8 * steps["calls"]
+    assert updates["calls"] == steps["calls"]
+    assert manager.agent.batch_size == 32 * 8
+
+
+def test_batch_training_manager_trains_policy_gradient_on_whole_episodes():
+    manager = BatchTrainingManager("Policy-Gradient", (6, 6), 2, 0.75, env_num=8, seed=0)
+    learn = manager.agent.learn
+    def check_learn():
+        dones = [transition[-1] for transition in manager.agent.memory]
+        assert dones[-1] and sum(dones) == manager.agent.episode_count
+        learn()
+    manager.agent.learn = check_learn
+
+    episode_ends = {"calls": 0}
+    store_transition = manager.agent.store_transition
+    def count_episode_ends(state, action, reward, done):
+        episode_ends["calls"] += done
+        store_transition(state, action, reward, done)
+    manager.agent.store_transition = count_episode_ends
+
+    stats = manager.train(40, verbose=False)
+
+    assert stats.get_epoch() >= 40
+    assert episode_ends["calls"] == stats.get_epoch()
@@ -0,0 +1,50 @@
+from scripts.plugin.bitboard import Bitboard
+
+
+def test_coords_round_trip_and_out_of_grid_bits():
+    bitboard = Bitboard((5, 3))
+    coords = [(0, 0), (4, 0), (0, 2), (4, 2), (2, 1)]
+
+    bits = bitboard.from_coords(coords + [(5, 0), (-1, 1), (0, 3)])
+    assert sorted(bitboard.to_coords(bits)) == sorted(coords)
+    assert bitboard.count(bits) == len(coords)
+    assert bitboard.get_bit((5, 0)) == 0
+    assert bitboard.count(bitboard.board_mask) == 15
+
+
+def test_expand_does_not_wrap_rows():
+    bitboard = Bitboard((4, 3))
+
+    east_edge = bitboard.expand(bitboard.get_bit((3, 0)))
+    assert sorted(bitboard.to_coords(east_edge)) == [(2, 0), (3, 0), (3, 1)]
+
+    west_edge = bitboard.expand(bitboard.get_bit((0, 1)))
+    assert sorted(bitboard.to_coords(west_edge)) == [(0, 0), (0, 1), (0, 2), (1, 1)]
+
+
+def test_flood_fill_stops_at_walls():
+    # a wall on column 2 with a gap at the bottom, and a cell sealed off in the top-right corner
+    bitboard = Bitboard((5, 4))
+    walls = bitboard.from_coords([(2, 0), (2, 1), (2, 2), (3, 0), (4, 1)])
+    free_bits = bitboard.board_mask & ~walls
+
+    region = bitboard.flood_fill(bitboard.get_bit((0, 0)), free_bits)
+    assert bitboard.count(region) == 14
+    assert not region & bitboard.get_bit((4, 0))
+
+    sealed = bitboard.flood_fill(bitboard.get_bit((4, 0)), free_bits)
+    assert bitboard.to_coords(sealed) == [(4, 0)]
+
+    # a seed on a wall reaches nothing
+    assert bitboard.flood_fill(bitboard.get_bit((2, 0)), free_bits) == 0
+
+
+def test_collision_reads_the_bitboards(make_simulation):
+    sim = make_simulation((4, 4), [(1, 1), (1, 2), (2, 2)], [(3, 1)], 'N')
+
+    assert sim.check_collision((4, 1)) == ('wall', None)
+    assert sim.check_collision((1, 2)) == ('body', None)
+    assert sim.check_collision((2, 2)) == ('none', None)  # the tail leaves on this move
+    collision, feed = sim.check_collision((3, 1))
+    assert collision == 'feed' and feed.get_coord() == (3, 1)
+    assert sim.check_collision((0, 0)) == ('none', None)
@@ -0,0 +1,36 @@
+from scripts.manager.cell_manager import CellManager
+
+
+def test_marking_cells_keeps_the_free_list_consistent():
+    cell_manager = CellManager((4, 3), seed=0)
+    used = [(0, 0), (3, 2), (1, 1), (2, 0)]
+    for coord in used:
+        cell_manager.mark_cell_used(coord)
+    cell_manager.mark_cell_used((0, 0))  # already used, nothing changes
+    cell_manager.mark_cell_free((1, 1))
+    cell_manager.mark_cell_free((1, 2))  # already free, nothing changes
+
+    expected = {(x, y) for x in range(4) for y in range(3)} - {(0, 0), (3, 2), (2, 0)}
+    assert set(cell_manager.available_cells) == expected
+    assert cell_manager.get_remaining_available_cells_num() == len(expected)
+    for index, coord in enumerate(cell_manager.available_cells):
+        assert cell_manager._cell_index[coord] == index
+    assert not cell_manager.is_cell_available((3, 2))
+    assert cell_manager.is_cell_available((1, 1))
+
+
+def test_random_available_cells_are_distinct_free_and_seeded():
+    samples = []
+    for _ in range(2):
+        cell_manager = CellManager((5, 5), seed=3)
+        for coord in [(x, 2) for x in range(5)]:
+            cell_manager.mark_cell_used(coord)
+        samples.append(cell_manager.get_random_available_cells(6))
+
+    assert samples[0] == samples[1]
+    assert len(set(samples[0])) == 6
+    assert all(coord[1] != 2 for coord in samples[0])
+
+    # `k` is capped by the free cells left
+    assert sorted(cell_manager.get_random_available_cells(100)) == sorted(cell_manager.available_cells)
+
@@ -0,0 +1,85 @@
+import json
+import os
+
+import numpy as np
+import torch
+
+from scripts.ai.dqn import DQNAgent
+from scripts.manager.batch_training_manager import BatchTrainingManager
+from scripts.manager.checkpoint_manager import CheckpointManager
+
+
+def make_trained_agent() -> DQNAgent:
+    torch.manual_seed(0)
+    agent = DQNAgent(11, 4, batch_size=8, epsilon=0.5)
+    rng = np.random.default_rng(0)
+    for _ in range(40):
+        agent.store_transition(rng.random(11), rng.integers(4), rng.random(), rng.random(11), False)
+        agent.learn()
+    return agent
+
+
+def test_save_and_load_latest_round_trip(tmp_path):
+    agent = make_trained_agent()
+    manager = CheckpointManager(str(tmp_path), with_memory=True)
+    manager.save(agent, 40, {"epoch": 40})
+
+    restored = DQNAgent(11, 4, batch_size=8)
+    meta = CheckpointManager(str(tmp_path)).load_latest(restored)
+
+    assert meta == {"step": 40, "extra": {"epoch": 40}}
+    for param, restored_param in zip(agent.policy_net.parameters(), restored.policy_net.parameters()):
+        assert torch.equal(param, restored_param)
+    assert restored.epsilon == agent.epsilon
+    assert restored.update_target_counter == agent.update_target_counter
+    assert restored.optimizer.state_dict()["state"].keys() == agent.optimizer.state_dict()["state"].keys()
+    assert len(restored.memory) == len(agent.memory)
+    np.testing.assert_array_equal(restored.memory.states[:len(agent.memory)], agent.memory.states[:len(agent.memory)])
+
+
+def test_saving_a_step_again_never_removes_the_latest_snapshot_first(tmp_path, monkeypatch):
+    agent = make_trained_agent()
+    manager = CheckpointManager(str(tmp_path), keep_last=1)
+    first_path = manager.save(agent, 10)
+
+    replace = os.replace
+    def checked_replace(src, dst):
+        assert os.path.isdir(manager.get_latest_path())
+        replace(src, dst)
+    monkeypatch.setattr(os, "replace", checked_replace)
+
+    second_path = manager.save(agent, 10)
+
+    assert second_path != first_path
+    assert manager.get_latest_path() == second_path
+    assert manager.get_snapshot_names() == [os.path.basename(second_path)]
+
+
+def test_memory_mapped_snapshot_is_kept(tmp_path):
+    agent = make_trained_agent()
+    CheckpointManager(str(tmp_path), with_memory=True).save(agent, 1)
+
+    restored = DQNAgent(11, 4, batch_size=8)
+    manager = CheckpointManager(str(tmp_path), keep_last=1, with_memory=True)
+    manager.load_latest(restored, mmap=True)
+    mapped_path = manager.get_latest_path()
+    for step in range(2, 5):
+        manager.save(restored, step)
+
+    assert os.path.isdir(mapped_path)
+    assert len(manager.get_snapshot_names()) == 2
+    np.testing.assert_array_equal(restored.memory.states[:len(agent.memory)], agent.memory.states[:len(agent.memory)])
+
+
+def test_training_stats_resume_from_a_snapshot(tmp_path):
+    manager = BatchTrainingManager("DQN", (6, 6), 2, 0.75, env_num=4, seed=0, checkpoint_manager=CheckpointManager(str(tmp_path), save_every=10))
+    stats = manager.train(30, verbose=False)
+
+    with open(os.path.join(manager.checkpoint_manager.get_latest_path(), "meta.json"), 'r') as f:
+        extra = json.load(f)["extra"]
+    assert extra["epoch"] == stats.get_epoch()
+    assert len(extra["last_scores"]) <= 100
+
+    resumed = BatchTrainingManager("DQN", (6, 6), 2, 0.75, env_num=4, seed=0, checkpoint_manager=CheckpointManager(str(tmp_path), save_every=10))
+    assert resumed.stats.to_dict() == stats.to_dict()
+    assert resumed.stats.to_text() == stats.to_text()
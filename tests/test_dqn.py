@@ -0,0 +1,66 @@
+import threading
+
+import numpy as np
+import torch
+
+from scripts.ai.dqn import DQNAgent, DQNAI
+from scripts.game.snake_simulation import SnakeSimulation
+from scripts.manager.ai_manager import AIManager, LAB_AI_PARAMS
+
+
+def fill_memory(agent: DQNAgent, num: int):
+    rng = np.random.default_rng(0)
+    for _ in range(num):
+        agent.store_transition(rng.random(agent.state_size), rng.integers(agent.action_size), rng.random(), rng.random(agent.state_size), False)
+
+
+def test_background_learner_trains_on_learn():
+    agent = DQNAgent(11, 4, batch_size=8, train_every=2, gradient_steps=3)
+    fill_memory(agent, 32)
+    weights = [param.detach().clone() for param in agent.policy_net.parameters()]
+
+    agent.start_background_learner()
+    try:
+        for _ in range(10):
+            agent.learn()
+        agent.wait_background_learner()
+    finally:
+        agent.stop_background_learner()
+
+    assert agent.update_target_counter == 5 * 3
+    assert any(not torch.equal(before, param) for before, param in zip(weights, agent.policy_net.parameters()))
+
+
+def test_learn_waits_for_a_learner_behind():
+    agent = DQNAgent(11, 4, batch_size=8, max_pending_updates=2)
+    fill_memory(agent, 32)
+
+    agent.start_background_learner()
+    try:
+        with agent.net_lock:  # the learner is stuck in its first update
+            learner = threading.Thread(target=lambda: [agent.learn() for _ in range(4)])
+            learner.start()
+            learner.join(0.2)
+            assert learner.is_alive()
+            assert agent.pending_updates.qsize() == 2
+
+        learner.join(5)
+        assert not learner.is_alive()
+        agent.wait_background_learner()
+    finally:
+        agent.stop_background_learner()
+
+    assert agent.update_target_counter == 4
+
+
+def test_lab_dqn_learns_in_the_background():
+    ai: DQNAI = AIManager.create_ai("DQN", **LAB_AI_PARAMS["DQN"])
+    sim = SnakeSimulation((6, 6), 1, 1.0, seed=0)
+    sim.reset()
+
+    ai.set_current_game(sim)
+    try:
+        assert ai.agent.learner_running
+        assert ai.agent.train_every > 1
+    finally:
+        ai.agent.stop_background_learner()
@@ -0,0 +1,54 @@
+import random
+
+import numpy as np
+
+from constants import OBJECT_DICT
+from scripts.ai.feature_extractor import FeatureExtractor
+from scripts.game.snake_simulation import SnakeSimulation
+
+
+def to_cell(coord, width):
+    return coord[1] * width + coord[0]
+
+def stack_boards(sims, feed_slots):
+    width, height = sims[0].grid_size
+    grids = np.full((len(sims), width * height), OBJECT_DICT['none'], dtype=np.int8)
+    feeds = np.full((len(sims), feed_slots), -1, dtype=np.int64)
+    heads, tails, necks, lengths = [], [], [], []
+    for idx, sim in enumerate(sims):
+        bodies = sim.player.get_bodies()
+        grids[idx, [to_cell(coord, width) for coord in bodies]] = OBJECT_DICT['body']
+        for slot, feed in enumerate(sim.fs.get_feeds()):
+            feeds[idx, slot] = to_cell(feed.get_coord(), width)
+            grids[idx, feeds[idx, slot]] = OBJECT_DICT['feed']
+        heads.append(to_cell(bodies[0], width))
+        necks.append(to_cell(bodies[1], width))
+        tails.append(to_cell(bodies[-1], width))
+        lengths.append(len(bodies))
+    return np.array(heads), np.array(tails), np.array(lengths), grids, feeds, np.array(necks)
+
+def play_random_games(grid_size, feed_amount, num, move_num):
+    rng = random.Random(0)
+    sims = []
+    for seed in range(num):
+        sim = SnakeSimulation(grid_size, feed_amount, 1.0, seed=seed)
+        sim.reset()
+        for _ in range(rng.randrange(move_num)):
+            snapshot = sim.snapshot()
+            sim.step(rng.choice("EWSN"))
+            if sim.is_done():
+                sim.restore(snapshot)
+                break
+        sims.append(sim)
+    return sims
+
+
+def test_extract_batch_matches_extract():
+    sims = play_random_games((7, 5), 3, 40, 30)
+    extractor = FeatureExtractor(with_neck_dir=True)
+
+    heads, tails, lengths, grids, feeds, necks = stack_boards(sims, 3)
+    batch = extractor.extract_batch((7, 5), heads, tails, lengths, grids, feeds, necks).copy()
+
+    for idx, sim in enumerate(sims):
+        np.testing.assert_allclose(batch[idx], extractor.extract(sim), err_msg=f"game {idx}")
@@ -0,0 +1,44 @@
+import random
+
+from scripts.entity.feed_system import FeedSystem
+
+
+def scan_nearest_feed_coord(feed_coords, coord):
+    # first feed inserted among the nearest ones
+    return min(feed_coords, key=lambda feed_coord: abs(feed_coord[0] - coord[0]) + abs(feed_coord[1] - coord[1]))
+
+
+def test_nearest_feed_matches_a_plain_scan():
+    rng = random.Random(0)
+    cells = [(x, y) for x in range(30) for y in range(20)]
+    feed_coords = rng.sample(cells, 60)  # above `linear_scan_limit`, so the spatial index is searched
+
+    fs = FeedSystem(bucket_size=4)
+    for coord in feed_coords:
+        fs.add_feed(coord)
+    for coord in feed_coords[::3]:
+        fs.remove_feed(coord)
+    feed_coords = [coord for coord in feed_coords if fs.is_feed_exist(coord)]
+    assert len(feed_coords) > FeedSystem.linear_scan_limit
+
+    for coord in cells + [(-5, 3), (40, 25)]:
+        assert fs.get_nearest_feed_coord(coord) == scan_nearest_feed_coord(feed_coords, coord), coord
+
+
+def test_nearest_feed_ties_go_to_the_first_inserted():
+    fs = FeedSystem(bucket_size=2)
+    feed_coords = [(9, 5), (1, 5), (5, 9), (5, 1)] + [(x, 19) for x in range(20)]  # the first four tie around (5, 5)
+    for coord in feed_coords:
+        fs.add_feed(coord)
+
+    assert fs.get_nearest_feed_coord((5, 5)) == (9, 5)
+    fs.remove_feed((9, 5))
+    assert fs.get_nearest_feed_coord((5, 5)) == (1, 5)
+
+
+def test_no_feed_gives_none():
+    fs = FeedSystem()
+    assert fs.get_nearest_feed_coord((0, 0)) is None
+    fs.add_feed((2, 2))
+    fs.remove_feed((2, 2))
+    assert fs.get_nearest_feed_coord((0, 0)) is None
@@ -0,0 +1,34 @@
+from scripts.ai.greedy_ai import GreedyAI
+
+
+def test_moves_into_the_leaving_tail(make_simulation):
+    # walls on the west and north, the neck on the east, only the tail on the south
+    sim = make_simulation((4, 4), [(0, 0), (1, 0), (1, 1), (0, 1)], [(3, 3)], 'W')
+    ai = GreedyAI()
+    ai.set_current_game(sim)
+
+    assert ai.decide_direction() == 'S'
+
+
+def test_body_released_in_time_counts_as_reachable(make_simulation):
+    # the free row on the south is walled off by the body, which is released from the tail on the east
+    sim = make_simulation((5, 3), [(0, 0), (0, 1), (1, 1), (2, 1), (3, 1), (4, 1), (4, 0)], [(0, 2)], 'W')
+    ai = GreedyAI()
+    ai.set_current_game(sim)
+    ai.get_region_analyzer()
+    ai.analyze()
+
+    assert ai.region_analyzer.get_region_size((1, 0)) == 3
+    assert ai.get_region_size((1, 0), 0) == 15
+
+
+def test_body_released_too_late_does_not_count(make_simulation):
+    # the west column is a pocket walled by the neck, released only after the head has walked it
+    sim = make_simulation((3, 3), [(1, 0), (1, 1), (1, 2), (2, 2), (2, 1), (2, 0)], [(0, 2)], 'W')
+    ai = GreedyAI()
+    ai.set_current_game(sim)
+    ai.get_region_analyzer()
+    ai.analyze()
+
+    assert ai.get_region_size((0, 0), 0) == 3
+    assert ai.get_region_size((2, 0), 0) == 9
@@ -0,0 +1,25 @@
+from scripts.ai.pathfinding_ai import PathfindingAI
+from scripts.game.headless_pilot_game import HeadlessPilotGame
+
+
+def test_feed_search_is_not_run_on_every_decision():
+    ai = PathfindingAI()
+    counts = {"feed": 0, "decision": 0}
+
+    search_feed_path = ai.search_feed_path
+    def count_feed_search(head):
+        counts["feed"] += 1
+        return search_feed_path(head)
+    ai.search_feed_path = count_feed_search
+
+    decide_direction = ai.decide_direction
+    def count_decision():
+        counts["decision"] += 1
+        return decide_direction()
+    ai.decide_direction = count_decision
+
+    game = HeadlessPilotGame(ai, (8, 8), 1, 0.9)
+    scores = [game.play_episode(seed) for seed in range(5)]
+
+    assert sum(scores) / len(scores) >= 20
+    assert counts["feed"] * 3 < counts["decision"]
@@ -0,0 +1,28 @@
+import numpy as np
+import pytest
+
+from scripts.ai.policy_gradient import PolicyGradientAgent
+
+
+def compute_returns_by_loop(gamma, rewards, dones):
+    returns = np.zeros(len(rewards))
+    R = 0.0
+    for idx in range(len(rewards) - 1, -1, -1):
+        if dones[idx]:
+            R = 0.0
+        R = rewards[idx] + gamma * R
+        returns[idx] = R
+    return returns
+
+
+@pytest.mark.parametrize("gamma", [0.0, 0.5, 0.9, 0.99, 1.0])
+@pytest.mark.parametrize("done_rate", [0.0, 0.01, 0.3])
+def test_compute_returns_matches_reverse_scan(gamma, done_rate):
+    rng = np.random.default_rng(0)
+    rewards = rng.choice([-1.0, -0.4, 0.6, 1.0, 5.0], 3000)  # several blocks for gamma 0.5
+    dones = rng.random(3000) < done_rate
+
+    agent = PolicyGradientAgent(11, 4, gamma=gamma)
+    returns = agent.compute_returns(list(rewards), list(dones))
+
+    np.testing.assert_allclose(returns, compute_returns_by_loop(gamma, rewards, dones), rtol=1e-5, atol=1e-5)
@@ -0,0 +1,66 @@
+import numpy as np
+import pytest
+
+from scripts.ai.replay_buffer import ReplayBuffer
+
+
+def test_clear_resets_priorities_and_keeps_max_priority():
+    buffer = ReplayBuffer(100, 4, prioritized=True)
+    for idx in range(10):
+        buffer.push(np.full(4, idx), idx % 3, 1.0, np.full(4, idx), False)
+    buffer.update_priorities(np.arange(10), np.linspace(1.0, 5.0, 10))
+    max_priority = buffer.max_priority
+
+    buffer.clear()
+
+    assert len(buffer) == 0
+    assert buffer.tree.total() == 0
+    assert not buffer.tree.tree.any()
+    assert buffer.max_priority == max_priority
+
+    buffer.push(np.zeros(4), 0, 1.0, np.zeros(4), False)
+    assert buffer.tree.total() == max_priority ** buffer.alpha
+
+
+def fill(buffer: ReplayBuffer, num: int, start: int = 0):
+    for idx in range(start, start + num):
+        buffer.push(np.full(4, idx), idx % 3, 1.0, np.full(4, idx), False)
+
+
+def test_stale_priority_update_skips_overwritten_slots():
+    buffer = ReplayBuffer(8, 4, prioritized=True)
+    fill(buffer, 8)
+    buffer.sample(4)
+    indices, generations = buffer.sampled_indices, buffer.sampled_generations
+
+    fill(buffer, 1, start=8)  # overwrites slot 0 after the batch was sampled
+    fresh_priority = buffer.tree.get([0])[0]
+    buffer.update_priorities(np.append(indices, 0), np.full(len(indices) + 1, 100.0), np.append(generations, 1))
+
+    assert buffer.tree.get([0])[0] == fresh_priority
+    kept = indices[indices != 0]
+    np.testing.assert_allclose(buffer.tree.get(kept), (100.0 + buffer.priority_epsilon) ** buffer.alpha)
+
+
+def test_load_rejects_priorities_of_another_tree(tmp_path):
+    buffer = ReplayBuffer(8, 4, prioritized=True)
+    fill(buffer, 8)
+    buffer.save(str(tmp_path))
+    np.save(tmp_path / "priorities.npy", np.zeros(64))
+
+    with pytest.raises(ValueError):
+        ReplayBuffer(8, 4, prioritized=True).load(str(tmp_path))
+
+
+def test_uniform_load_into_used_buffer_starts_even(tmp_path):
+    saved = ReplayBuffer(16, 4)
+    fill(saved, 5)
+    saved.save(str(tmp_path))
+
+    buffer = ReplayBuffer(16, 4, prioritized=True)
+    fill(buffer, 12)
+    buffer.update_priorities(np.arange(12), np.linspace(1.0, 5.0, 12))
+    buffer.load(str(tmp_path))
+
+    assert buffer.tree.total() == 5
+    np.testing.assert_array_equal(buffer.tree.get(np.arange(16)), [1.0] * 5 + [0.0] * 11)
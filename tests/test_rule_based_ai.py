@@ -0,0 +1,54 @@
+import pytest
+
+from scripts.ai.hamiltonian_ai import HamiltonianAI
+from scripts.ai.rule_based_ai import RuleBasedAI
+from scripts.game.headless_pilot_game import HeadlessPilotGame
+from scripts.manager.state_manager import GameState
+
+
+def move_feed_to(game: HeadlessPilotGame, coord):
+    sim = game.sim
+    for feed in list(sim.fs.get_feeds()):
+        sim.fs.remove_feed(feed.get_coord())
+        sim.cell_manager.mark_cell_free(feed.get_coord())
+    sim.add_feed(coord)
+
+
+@pytest.mark.parametrize("grid_size", [(5, 5), (7, 7)])
+def test_maximalism_eats_feed_in_skipped_corner(grid_size, tmp_path):
+    corner = (grid_size[0] - 1, grid_size[1] - 1)
+    game = HeadlessPilotGame(RuleBasedAI("maximalism", str(tmp_path)), grid_size, 1, 0.9)
+
+    # a spawn whose body does not cover the corner
+    for seed in range(100):
+        game.sim.reset(seed)
+        if not game.sim.player.is_body(corner):
+            break
+    move_feed_to(game, corner)
+
+    for _ in range(4 * grid_size[0] * grid_size[1]):
+        direction = game.pilot_ai.decide_direction()
+        game.sim.step(None if direction == "surrender" else direction)
+        if not game.sim.fs.is_feed_exist(corner):
+            break
+
+    assert not game.sim.fs.is_feed_exist(corner)
+    assert game.sim.is_state(GameState.ACTIVE)
+
+
+@pytest.mark.parametrize("grid_size", [(5, 5), (7, 7), (6, 6)])
+def test_maximalism_clears_games(grid_size, tmp_path):
+    game = HeadlessPilotGame(RuleBasedAI("maximalism", str(tmp_path)), grid_size, 1, 0.9)
+
+    for seed in range(20):
+        game.play_episode(seed)
+        assert game.sim.is_state(GameState.CLEAR), f"seed {seed} not cleared"
+
+
+@pytest.mark.parametrize("grid_size", [(6, 6), (8, 6), (5, 5), (7, 5)])
+def test_hamiltonian_clears_games(grid_size, tmp_path):
+    game = HeadlessPilotGame(HamiltonianAI(cycle_directory=str(tmp_path)), grid_size, 1, 0.9)
+
+    for seed in range(20):
+        game.play_episode(seed)
+        assert game.sim.is_state(GameState.CLEAR), f"seed {seed} not cleared"
@@ -0,0 +1,69 @@
+import random
+
+from scripts.game.snake_simulation import SnakeSimulation
+from scripts.manager.state_manager import GameState
+
+
+def get_safe_dirs(sim: SnakeSimulation):
+    return [dir for dir in "EWSN" if sim.check_collision(sim.player.get_next_head(dir))[0] in ('none', 'feed')]
+
+
+def play(sim: SnakeSimulation, rng: random.Random, moves: int):
+    """Random moves staying on the grid and off the body while there is one"""
+    for _ in range(moves):
+        if sim.is_done():
+            return
+        sim.step(rng.choice(get_safe_dirs(sim) or "EWSN"))
+
+
+def get_board(sim: SnakeSimulation):
+    return (sim.player.get_bodies(), sim.direction, [(feed.get_coord(), feed.get_type()) for feed in sim.fs.get_feeds()],
+            sorted(sim.cell_manager.available_cells), sim.score, sim.move_count, sim.state)
+
+
+def test_restore_replays_the_same_game():
+    sim = SnakeSimulation((8, 8), 3, 0.9, seed=0)
+    sim.reset()
+    play(sim, random.Random(1), 20)
+    snapshot = sim.snapshot()
+    assert sim.is_state(GameState.ACTIVE)
+
+    play(sim, random.Random(2), 200)
+    played = get_board(sim)
+    assert played[4] > snapshot.score  # feeds were eaten and spawned again
+
+    sim.restore(snapshot)
+    assert get_board(sim) == (list(snapshot.bodies), snapshot.direction, list(snapshot.feeds), sorted(snapshot.available_cells),
+                              snapshot.score, snapshot.move_count, snapshot.state)
+    for coord in snapshot.bodies:
+        assert sim.check_collision(coord)[0] in ('body', 'none')
+        assert sim.get_moves_until_free(coord) > 0
+
+    # the random state is restored too, so the same moves spawn the same feeds
+    play(sim, random.Random(2), 200)
+    assert get_board(sim) == played
+
+
+def test_clone_is_independent():
+    sim = SnakeSimulation((6, 6), 2, 0.9, seed=3)
+    sim.reset()
+    board = get_board(sim)
+
+    clone = sim.clone()
+    assert get_board(clone) == board
+
+    clone.step(get_safe_dirs(clone)[0])
+    assert clone.is_state(GameState.ACTIVE) and clone.move_count == 1
+    assert get_board(sim) == board
+
+
+def test_restore_keeps_a_finished_game_finished(make_simulation):
+    sim = make_simulation((4, 4), [(0, 0), (1, 0), (2, 0)], [(3, 3)], 'W')
+    sim.step('N')
+    assert sim.is_state(GameState.GAMEOVER)
+
+    snapshot = sim.snapshot()
+    sim.reset(0)
+    sim.restore(snapshot)
+    assert sim.is_state(GameState.GAMEOVER)
+    assert sim.is_done()